@@ -0,0 +1,158 @@
+"""
+Archiver - Moves finished rows out of the live tables
+
+Paid deliveries, completed pickups and completed or cancelled SMS
+conversations are never edited again, but every list, calendar and stats
+query would keep scanning them. Once they have been finished for
+archive_after_days, the archiver moves them in batches to *_archive tables
+with the same columns (see the *Fields mixins in models.py), keeping their ids.
+Ids are never handed out again: PostgreSQL sequences don't reuse them, and
+the live tables use AUTOINCREMENT on SQLite (migration 0005).
+
+Rows are moved through the ORM session, so the usual hooks run: the change
+feed publishes a delete for each row (clients and the calendar cache drop
+it), and file references move to the archived row, so its photos and
+signature are not garbage collected.
+
+Read endpoints opt in to history with include_archived, which queries
+with_archive(Model): the live table and its archive combined, used exactly
+like the model.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select, text, union_all
+from sqlalchemy.orm import Session, aliased
+
+from database import SessionLocal, engine
+from models import (
+    DeliveryTask, ArchivedDeliveryTask, TaskStatus,
+    PickupRequest, ArchivedPickupRequest, PickupStatus,
+    SMSConversation, ArchivedSMSConversation, SMSConversationStatus,
+)
+from config import get_settings
+
+settings = get_settings()
+
+# Arbitrary key for pg_try_advisory_lock, so one worker archives at a time
+ARCHIVE_LOCK_KEY = 380050
+
+
+class ArchivePolicy:
+    """Which rows of a table are finished, and since when"""
+
+    def __init__(self, model, archive_model, finished, finished_at):
+        self.model = model
+        self.archive_model = archive_model
+        self.finished = finished
+        self.finished_at = finished_at
+
+
+ARCHIVE_POLICIES = [
+    ArchivePolicy(
+        DeliveryTask, ArchivedDeliveryTask,
+        finished=DeliveryTask.status == TaskStatus.paid,
+        finished_at=func.coalesce(DeliveryTask.paid_at, DeliveryTask.updated_at),
+    ),
+    ArchivePolicy(
+        PickupRequest, ArchivedPickupRequest,
+        finished=PickupRequest.status == PickupStatus.completed,
+        finished_at=func.coalesce(PickupRequest.completed_at, PickupRequest.updated_at),
+    ),
+    ArchivePolicy(
+        SMSConversation, ArchivedSMSConversation,
+        finished=SMSConversation.status.in_([SMSConversationStatus.completed, SMSConversationStatus.cancelled]),
+        finished_at=SMSConversation.updated_at,
+    ),
+]
+
+ARCHIVES = {policy.model: policy.archive_model for policy in ARCHIVE_POLICIES}
+
+
+# ============================================
+# READING
+# ============================================
+
+def with_archive(model):
+    """The model's live and archived rows together, as an alias queried like the model"""
+    archive = ARCHIVES[model].__table__
+    columns = [column.name for column in model.__table__.columns]
+    rows = union_all(
+        select(*[model.__table__.c[name] for name in columns]),
+        select(*[archive.c[name] for name in columns]),
+    ).subquery(f"{model.__tablename__}_with_archive")
+    return aliased(model, rows)
+
+
+def archived_counts(db: Session, model) -> Dict[str, int]:
+    """Archived rows per status"""
+    archive = ARCHIVES[model]
+    rows = db.query(archive.status, func.count()).group_by(archive.status).all()
+    return {status.value: count for status, count in rows}
+
+
+# ============================================
+# ARCHIVING
+# ============================================
+
+def _archive_batch(db: Session, policy: ArchivePolicy, cutoff: datetime, batch_size: int) -> int:
+    """Move up to batch_size finished rows older than the cutoff; returns how many moved"""
+    model = policy.model
+    rows = (
+        db.query(model)
+        .filter(policy.finished, policy.finished_at < cutoff)
+        .order_by(model.id)
+        .limit(batch_size)
+        .all()
+    )
+    archived_at = datetime.utcnow()
+    for row in rows:
+        values = {column.key: getattr(row, column.key) for column in model.__table__.columns}
+        db.add(policy.archive_model(**values, archived_at=archived_at))
+        db.delete(row)
+    db.commit()
+    return len(rows)
+
+
+def archive_finished_rows() -> Dict[str, int]:
+    """Archive everything past the retention age. Returns rows moved per table."""
+    moved = {policy.model.__tablename__: 0 for policy in ARCHIVE_POLICIES}
+    cutoff = datetime.utcnow() - timedelta(days=settings.archive_after_days)
+
+    with engine.connect() as lock_connection:
+        if engine.dialect.name == "postgresql":
+            locked = lock_connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": ARCHIVE_LOCK_KEY}).scalar()
+            if not locked:
+                return moved  # Another worker is archiving
+
+        db = SessionLocal()
+        try:
+            for policy in ARCHIVE_POLICIES:
+                table = policy.model.__tablename__
+                while True:
+                    count = _archive_batch(db, policy, cutoff, settings.archive_batch_size)
+                    moved[table] += count
+                    if count < settings.archive_batch_size:
+                        break
+        finally:
+            db.close()
+            if engine.dialect.name == "postgresql":
+                lock_connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": ARCHIVE_LOCK_KEY})
+
+    if any(moved.values()):
+        summary = ", ".join(f"{count} {table}" for table, count in moved.items() if count)
+        print(f"[Archive] Archived {summary}")
+    return moved
+
+
+async def run_archiver():
+    """Archive finished rows every archive_interval_seconds (runs until cancelled)"""
+    while True:
+        await asyncio.sleep(settings.archive_interval_seconds)
+        try:
+            await run_in_threadpool(archive_finished_rows)
+        except Exception as e:
+            print(f"[Archive] Archiving failed: {e}")
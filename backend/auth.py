@@ -1,18 +1,26 @@
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_db, get_async_db
 from models import User
+from change_bus import change_bus
 from config import get_settings
 
 settings = get_settings()
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+USER_ENTITY = "users"
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -28,7 +36,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(hours=settings.access_token_expire_hours)
-    to_encode.update({"exp": expire})
+    # iat keys the principal cache, so each login gets its own entry
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
     encoded_jwt = jwt.encode(to_encode, settings.jwt_secret, algorithm=settings.jwt_algorithm)
     return encoded_jwt
 
@@ -50,38 +59,147 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
     return user
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    token = credentials.credentials
+class Principal:
+    """Snapshot of an authenticated user's columns, safe to share between requests and sessions"""
+
+    def __init__(self, user: User):
+        self.id = user.id
+        self.username = user.username
+        self.email = user.email
+        self.full_name = user.full_name
+        self.role = user.role
+        self.is_active = user.is_active
+        self.created_at = user.created_at
+
+
+class PrincipalCache:
+    """Thread-safe LRU cache of active principals keyed by (username, token issue time)"""
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: int = 60):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, Optional[int]], Tuple[float, Principal]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, username: str, issued_at: Optional[int]) -> Optional[Principal]:
+        key = (username, issued_at)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            cached_at, principal = entry
+            if time.monotonic() - cached_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return principal
+
+    def put(self, username: str, issued_at: Optional[int], principal: Principal):
+        with self._lock:
+            self._entries[(username, issued_at)] = (time.monotonic(), principal)
+            self._entries.move_to_end((username, issued_at))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, username: str):
+        """Drop every cached token of a user"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == username]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+principal_cache = PrincipalCache(
+    max_entries=settings.principal_cache_max_entries,
+    ttl_seconds=settings.principal_cache_ttl_seconds,
+)
+
+
+def invalidate_principal(username: str):
+    """Forget a changed user's cached principals, in this worker and the others"""
+    principal_cache.invalidate(username)
+    change_bus.publish({"entity": USER_ENTITY, "id": username, "action": "updated", "fields": []})
+
+
+def invalidate_principal_from_change(change: dict):
+    """Change bus subscriber - drop principals changed by other workers"""
+    if change["action"] == "resync":
+        principal_cache.clear()
+    elif change.get("entity") == USER_ENTITY:
+        principal_cache.invalidate(change["id"])
+
+
+change_bus.subscribe(invalidate_principal_from_change)
+
+
+def _token_identity(token: str) -> Tuple[str, Optional[int]]:
+    """(username, issued at) of a valid bearer token, raising 401 otherwise"""
     payload = decode_access_token(token)
     
-    if payload is None:
-        raise credentials_exception
-    
-    username: str = payload.get("sub")
-    if username is None:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.username == username).first()
+    if payload is None or payload.get("sub") is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return payload["sub"], payload.get("iat")
+
+
+def _remember_principal(username: str, issued_at: Optional[int], user: Optional[User]) -> Principal:
+    """Cache the principal for a user looked up by username, raising 401/400 if unusable"""
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
+
+    principal = Principal(user)
+    principal_cache.put(username, issued_at, principal)
+    return principal
+
+
+def get_user_from_token(token: str, db: Session) -> Principal:
+    """Resolve a bearer token to an active user, raising 401/400 otherwise"""
+    username, issued_at = _token_identity(token)
+    principal = principal_cache.get(username, issued_at)
+    if principal is not None:
+        return principal
     
-    return user
+    user = db.query(User).filter(User.username == username).first()
+    return _remember_principal(username, issued_at, user)
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    username, issued_at = _token_identity(credentials.credentials)
+    principal = principal_cache.get(username, issued_at)
+    if principal is not None:
+        return principal
+
+    user = await db.scalar(select(User).where(User.username == username))
+    return _remember_principal(username, issued_at, user)
+
+
+def get_current_user_from_query(
+    token: str = Query(..., description="Access token (EventSource cannot send headers)"),
+    db: Session = Depends(get_db)
+) -> Principal:
+    """Authenticate requests that can only carry the token in the query string"""
+    return get_user_from_token(token, db)
 
 
 def require_role(allowed_roles: list[str]):
-    def role_checker(current_user: User = Depends(get_current_user)):
+    # Served from the cached principal - no database access
+    def role_checker(current_user: Principal = Depends(get_current_user)):
         if current_user.role not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -0,0 +1,156 @@
+"""
+Calendar Cache - Per-day segments of FullCalendar events
+
+Every staff member viewing the same week asks for the same events. Instead of
+rebuilding the payload on each request, events are cached in one bucket per
+calendar day ([00:00, next 00:00)). A requested [start, end] range is assembled
+from cached days, and only the missing days are loaded from the database.
+
+Writes invalidate just the days they touch (old and new scheduled_start), so a
+reschedule only drops two buckets instead of the whole cache. Changes made by
+other workers arrive through the change bus and invalidate the same way.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import get_settings
+from change_bus import change_bus
+
+settings = get_settings()
+
+# A cached day is a list of (scheduled_start, event) pairs sorted by start
+DayEvents = List[Tuple[datetime, dict]]
+
+
+def normalize_datetime(value: datetime) -> datetime:
+    """Drop timezone info - scheduled times are stored as naive wall-clock times"""
+    if value.tzinfo is not None:
+        return value.replace(tzinfo=None)
+    return value
+
+
+class CalendarCache:
+    """Thread-safe LRU cache of calendar events keyed by day"""
+
+    def __init__(self, max_days: int = 1000, ttl_seconds: int = 300):
+        self.max_days = max_days
+        self.ttl_seconds = ttl_seconds
+        self._days: "OrderedDict[date, Tuple[float, DayEvents]]" = OrderedDict()
+        # Bumped on every invalidation so a load that raced a write is discarded
+        self._versions: Dict[date, int] = {}
+        self._lock = threading.Lock()
+
+    def get_range(
+        self,
+        start: datetime,
+        end: datetime,
+        loader: Callable[[datetime, datetime], DayEvents],
+    ) -> List[dict]:
+        """
+        Return events with start <= scheduled_start <= end.
+
+        `loader(range_start, range_end)` is called at most once, for the span of
+        days that are not cached, and must return (scheduled_start, event) pairs.
+        """
+        start = normalize_datetime(start)
+        end = normalize_datetime(end)
+        if end < start:
+            return []
+
+        days = [start.date() + timedelta(days=i) for i in range((end.date() - start.date()).days + 1)]
+        segments, missing, versions = self._lookup(days)
+
+        if missing:
+            first_day, last_day = missing[0], missing[-1]
+            loaded: Dict[date, DayEvents] = {}
+            for scheduled_start, event in loader(
+                datetime.combine(first_day, datetime.min.time()),
+                datetime.combine(last_day + timedelta(days=1), datetime.min.time()),
+            ):
+                loaded.setdefault(scheduled_start.date(), []).append((scheduled_start, event))
+
+            span_day = first_day
+            while span_day <= last_day:
+                day_events = sorted(loaded.get(span_day, []), key=lambda pair: pair[0])
+                segments[span_day] = day_events
+                self._store(span_day, day_events, versions.get(span_day))
+                span_day += timedelta(days=1)
+
+        events = []
+        for day in days:
+            for scheduled_start, event in segments[day]:
+                if start <= scheduled_start <= end:
+                    events.append(event)
+        return events
+
+    def invalidate(self, *values: Optional[datetime]):
+        """Drop the cached days containing any of the given datetimes (None is ignored)"""
+        self.invalidate_days(normalize_datetime(value).date() for value in values if value is not None)
+
+    def invalidate_days(self, days: Iterable[date]):
+        """Drop the given cached days"""
+        with self._lock:
+            for day in days:
+                self._days.pop(day, None)
+                self._versions[day] = self._versions.get(day, 0) + 1
+
+    def clear(self):
+        """Drop every cached day"""
+        with self._lock:
+            for day in self._days:
+                self._versions[day] = self._versions.get(day, 0) + 1
+            self._days.clear()
+
+    def _lookup(self, days: Iterable[date]):
+        """Split requested days into cached segments and missing days"""
+        segments: Dict[date, DayEvents] = {}
+        missing: List[date] = []
+        versions: Dict[date, int] = {}
+        now = time.monotonic()
+
+        with self._lock:
+            for day in days:
+                entry = self._days.get(day)
+                if entry and entry[0] > now:
+                    self._days.move_to_end(day)
+                    segments[day] = entry[1]
+                else:
+                    missing.append(day)
+                versions[day] = self._versions.get(day, 0)
+        return segments, missing, versions
+
+    def _store(self, day: date, day_events: DayEvents, version: Optional[int]):
+        """Cache a day unless it was invalidated while it was being loaded"""
+        with self._lock:
+            if version is not None and self._versions.get(day, 0) != version:
+                return
+            self._days[day] = (time.monotonic() + self.ttl_seconds, day_events)
+            self._days.move_to_end(day)
+            while len(self._days) > self.max_days:
+                self._days.popitem(last=False)
+
+
+calendar_cache = CalendarCache(
+    max_days=settings.calendar_cache_max_days,
+    ttl_seconds=settings.calendar_cache_ttl_seconds,
+)
+
+
+def invalidate_calendar_days(*values: Optional[datetime]):
+    """Invalidate cached calendar days for the given scheduled times"""
+    calendar_cache.invalidate(*values)
+
+
+def invalidate_from_change(change: dict):
+    """Change bus subscriber - drop the days a change touched"""
+    if change["action"] == "resync":
+        calendar_cache.clear()
+        return
+    calendar_cache.invalidate_days(date.fromisoformat(day) for day in change.get("days", []))
+
+
+change_bus.subscribe(invalidate_from_change)
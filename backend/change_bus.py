@@ -0,0 +1,176 @@
+"""
+Change Bus - Cross-worker change notifications
+
+In-process caches and push channels only see writes made by their own worker.
+The change bus relays change events between workers:
+
+- PostgreSQL: events are sent with NOTIFY on a shared channel, and a listener
+  thread in every worker LISTENs and hands them to local subscribers.
+- SQLite: single-process deployments use an in-process bus with the same API.
+
+Publishing always delivers to local subscribers immediately. Remote workers
+receive the event as soon as the NOTIFY arrives. Row changes are relayed
+inside the committing transaction (see change_feed), on the session's own
+connection, so they reach other workers exactly when the rows do and a commit
+never waits for a second pooled connection. If the listener loses its
+connection, subscribers get a "resync" event after reconnecting, because
+anything sent in the meantime was missed.
+"""
+
+import json
+import select
+import threading
+import uuid
+from typing import Callable, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from database import engine
+from config import get_settings
+
+settings = get_settings()
+
+Subscriber = Callable[[dict], None]
+
+RESYNC_CHANGE = {"entity": None, "id": None, "action": "resync", "fields": []}
+
+
+class LocalChangeBus:
+    """In-process bus - used for SQLite and as the base for the Postgres bus"""
+
+    def __init__(self):
+        self._subscribers: List[Subscriber] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Subscriber):
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def publish(self, change: dict):
+        """Deliver a change made outside a database transaction"""
+        self._dispatch(change)
+
+    def relay(self, connection: Connection, changes: List[dict]):
+        """Send changes to other workers within the transaction on `connection`"""
+
+    def deliver(self, changes: List[dict]):
+        """Hand relayed changes to this worker's subscribers (after the commit)"""
+        for change in changes:
+            self._dispatch(change)
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def _dispatch(self, change: dict):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(change)
+            except Exception as e:
+                print(f"[ChangeBus] Subscriber error: {e}")
+
+
+class PostgresChangeBus(LocalChangeBus):
+    """Relays changes between workers with PostgreSQL LISTEN/NOTIFY"""
+
+    # NOTIFY payloads are limited to 8000 bytes
+    MAX_PAYLOAD_BYTES = 7900
+
+    def __init__(self, channel: str, poll_seconds: float = 5.0):
+        super().__init__()
+        self.channel = channel
+        self.poll_seconds = poll_seconds
+        # Lets a worker ignore its own notifications (already delivered locally)
+        self.origin = uuid.uuid4().hex
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def publish(self, change: dict):
+        self._dispatch(change)
+        try:
+            with engine.connect() as conn:
+                self.relay(conn, [change])
+                conn.commit()
+        except Exception as e:
+            print(f"[ChangeBus] NOTIFY failed: {e}")
+
+    def relay(self, connection: Connection, changes: List[dict]):
+        # One statement per transaction; the notifications are sent on commit
+        connection.execute(
+            text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+            {"channel": self.channel, "payloads": [self._payload(change) for change in changes]},
+        )
+
+    def _payload(self, change: dict) -> str:
+        payload = json.dumps({"origin": self.origin, "change": change})
+        if len(payload.encode("utf-8")) > self.MAX_PAYLOAD_BYTES:
+            # Too large to relay - make other workers refetch instead
+            payload = json.dumps({"origin": self.origin, "change": RESYNC_CHANGE})
+        return payload
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._listen_forever, name="change-bus-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout=self.poll_seconds + 1)
+
+    def _listen_forever(self):
+        backoff = 1
+        first_connect = True
+        while not self._stopping.is_set():
+            try:
+                connection = engine.raw_connection()
+                dbapi_conn = connection.driver_connection
+                connection.detach()  # Dedicated connection, never returned to the pool
+                dbapi_conn.autocommit = True
+                try:
+                    with dbapi_conn.cursor() as cursor:
+                        cursor.execute(f'LISTEN "{self.channel}"')
+                    if not first_connect:
+                        # Events may have been missed while disconnected
+                        self._dispatch(RESYNC_CHANGE)
+                    first_connect = False
+                    backoff = 1
+                    self._poll(dbapi_conn)
+                finally:
+                    connection.close()
+            except Exception as e:
+                print(f"[ChangeBus] Listener error, reconnecting in {backoff}s: {e}")
+                self._stopping.wait(backoff)
+                backoff = min(backoff * 2, 30)
+
+    def _poll(self, dbapi_conn):
+        while not self._stopping.is_set():
+            readable, _, _ = select.select([dbapi_conn], [], [], self.poll_seconds)
+            if not readable:
+                continue
+            dbapi_conn.poll()
+            while dbapi_conn.notifies:
+                notify = dbapi_conn.notifies.pop(0)
+                try:
+                    message = json.loads(notify.payload)
+                except ValueError:
+                    continue
+                if message.get("origin") != self.origin:
+                    self._dispatch(message["change"])
+
+
+def create_change_bus():
+    """Pick the bus implementation for the configured database"""
+    if "postgresql" in settings.database_url:
+        return PostgresChangeBus(settings.change_bus_channel)
+    return LocalChangeBus()
+
+
+change_bus = create_change_bus()
@@ -0,0 +1,166 @@
+"""
+Change Feed - Broadcasts row changes to live subscribers
+
+Committed creates, updates and deletes of delivery tasks, pickup requests and
+SMS conversations are captured from SQLAlchemy session events, so every router
+publishes changes without extra code. Each change becomes an event:
+
+    {"entity": "delivery_tasks", "id": 12, "action": "updated",
+     "fields": ["status", "paid_at"], "days": ["2024-05-02"], "version": 431}
+
+`days` lists the calendar days (old and new scheduled_start) the row touches.
+Changes go through the change bus, so subscribers in every worker see them.
+
+SSE subscribers (events_router) each get a bounded asyncio queue.
+A slow client never blocks writers: when its queue is full the backlog is
+dropped and replaced with a single "resync" event telling it to refetch.
+"""
+
+import asyncio
+import itertools
+import threading
+from typing import Dict, List, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from change_bus import change_bus
+from models import DeliveryTask, PickupRequest, SMSConversation
+from config import get_settings
+
+settings = get_settings()
+
+# Models whose changes are published, keyed by entity (table) name
+TRACKED_MODELS = {
+    DeliveryTask.__tablename__: DeliveryTask,
+    PickupRequest.__tablename__: PickupRequest,
+    SMSConversation.__tablename__: SMSConversation,
+}
+
+RESYNC_EVENT = {"entity": None, "id": None, "action": "resync", "fields": [], "version": None}
+
+
+class ChangeBroadcaster:
+    """Fans change events out to per-connection asyncio queues"""
+
+    def __init__(self, queue_size: int = 100, max_subscribers: int = 500):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscribers: Dict[asyncio.Queue, asyncio.AbstractEventLoop] = {}
+        self._lock = threading.Lock()
+        self._versions = itertools.count(1)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> Optional[asyncio.Queue]:
+        """Register a subscriber on the running loop. Returns None when at capacity."""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            self._subscribers[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    def publish(self, change: dict) -> dict:
+        """Stamp a change with a version and deliver it. Safe to call from any thread."""
+        change = {**change, "version": next(self._versions)}
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, change)
+            except RuntimeError:
+                # Loop already closed - the subscriber is gone
+                self.unsubscribe(queue)
+        return change
+
+    @staticmethod
+    def _deliver(queue: asyncio.Queue, change: dict):
+        """Runs on the subscriber's loop, so queue access is not racy"""
+        try:
+            queue.put_nowait(change)
+        except asyncio.QueueFull:
+            # Client is not keeping up - replace the backlog with a resync marker
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(RESYNC_EVENT)
+
+
+broadcaster = ChangeBroadcaster(
+    queue_size=settings.change_feed_queue_size,
+    max_subscribers=settings.change_feed_max_subscribers,
+)
+change_bus.subscribe(broadcaster.publish)
+
+
+# ============================================
+# SESSION HOOKS
+# ============================================
+
+def _changed_fields(obj) -> List[str]:
+    """Names of column attributes modified on a dirty object"""
+    state = inspect(obj)
+    return [
+        attr.key for attr in state.attrs
+        if attr.key in state.mapper.columns and attr.history.has_changes()
+    ]
+
+
+def _scheduled_days(obj) -> List[str]:
+    """Calendar days of the current and previous scheduled_start, if any"""
+    if "scheduled_start" not in inspect(obj).mapper.columns:
+        return []
+    history = inspect(obj).attrs.scheduled_start.history
+    values = set(history.added) | set(history.unchanged) | set(history.deleted)
+    return sorted({value.date().isoformat() for value in values if value is not None})
+
+
+def _collect(session: Session, action: str, objects) -> None:
+    pending = session.info.setdefault("pending_changes", [])
+    for obj in objects:
+        entity = getattr(obj, "__tablename__", None)
+        if entity not in TRACKED_MODELS:
+            continue
+        fields = _changed_fields(obj) if action == "updated" else []
+        if action == "updated" and not fields:
+            continue
+        pending.append({
+            "entity": entity,
+            "id": obj.id,
+            "action": action,
+            "fields": fields,
+            "days": _scheduled_days(obj),
+        })
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _record_changes(session: Session, flush_context):
+    _collect(session, "created", session.new)
+    _collect(session, "updated", session.dirty)
+    _collect(session, "deleted", session.deleted)
+
+
+@event.listens_for(SessionLocal, "before_commit")
+def _relay_changes(session: Session):
+    # Commit only flushes after this hook, so flush now to collect every change
+    session.flush()
+    changes = session.info.get("pending_changes")
+    if changes:
+        change_bus.relay(session.connection(), changes)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _publish_changes(session: Session):
+    change_bus.deliver(session.info.pop("pending_changes", []))
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_changes(session: Session):
+    session.info.pop("pending_changes", None)
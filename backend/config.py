@@ -17,6 +17,22 @@ class Settings(BaseSettings):
         )
         return pg_url
     
+    # Read-only replica for list and stats endpoints (empty: everything uses the primary)
+    database_replica_url: str = ""
+
+    # PostgreSQL connection pools, per worker process
+    db_pool_size: int = 10
+    db_max_overflow: int = 30                    # 10 + 30 = the 40 threads sync endpoints run on
+    db_async_pool_size: int = 10                 # Async endpoints have their own engine
+    db_async_max_overflow: int = 10
+    db_pool_timeout_seconds: int = 30            # Wait this long for a free connection, then fail
+    db_pool_recycle_seconds: int = 1800          # Replace connections older than this
+    
+    # SQLite tuning (applied to every connection, see database.py)
+    sqlite_busy_timeout_ms: int = 5000           # Wait this long for a lock before "database is locked"
+    sqlite_cache_size_kb: int = 64 * 1024        # Page cache per connection
+    sqlite_mmap_size: int = 256 * 1024 * 1024    # Memory-mapped reads
+    
     # JWT
     jwt_secret: str
     jwt_algorithm: str = "HS256"
@@ -38,7 +54,59 @@ class Settings(BaseSettings):
     frontend_url: str = "http://localhost:5173"
     backend_url: str = "http://localhost:8000"
     scheduler_phone: str = ""
-    
+
+    # Authenticated principal cache (skips the users lookup on every request)
+    principal_cache_ttl_seconds: int = 60
+    principal_cache_max_entries: int = 1000
+
+    # Per-request SQL instrumentation (Server-Timing header and warnings, see query_metrics.py)
+    sql_instrumentation: bool = True
+    sql_warn_query_count: int = 30           # More queries than this in one request
+    sql_warn_repeated_statement: int = 10    # Same statement more often than this (likely N+1)
+    sql_slow_query_ms: int = 250             # Any single statement slower than this
+
+    # Calendar cache (per-day event segments)
+    calendar_cache_ttl_seconds: int = 300
+    calendar_cache_max_days: int = 1000
+
+    # Change feed (server-sent events)
+    change_feed_queue_size: int = 100
+    change_feed_max_subscribers: int = 500
+    change_feed_heartbeat_seconds: int = 15
+
+    # Change bus (PostgreSQL LISTEN/NOTIFY channel shared by all workers)
+    change_bus_channel: str = "delivery_app_changes"
+
+    # ETA cache (geohash precision 7 is a ~150m cell)
+    eta_cache_max_entries: int = 5000
+    eta_cache_geohash_precision: int = 7
+
+    # Driver location tracking
+    driver_trail_size: int = 500                   # Pings kept in memory per driver
+    driver_location_persist_seconds: int = 60      # At most one stored ping per interval
+    driver_eta_recompute_meters: int = 200         # Movement that triggers new ETAs
+    driver_eta_max_age_seconds: int = 300          # ETAs are refreshed at least this often
+    driver_eta_stop_limit: int = 8                 # Upcoming stops with ETAs
+
+    # Image derivatives (thumbnails rendered in a process pool)
+    image_worker_processes: int = 2
+    image_render_retry_seconds: int = 3600   # A photo that failed to render serves the original this long
+
+    # Upload garbage collection (files no longer used by any task, pickup or conversation)
+    upload_gc_interval_seconds: int = 3600
+    upload_gc_grace_seconds: int = 86400    # Uploads are attached after they are sent
+    upload_gc_batch_size: int = 200
+
+    # Archive tier (finished rows moved out of the live tables, see archiver.py)
+    archive_after_days: int = 180            # Paid/completed this long ago; 0 turns archiving off
+    archive_interval_seconds: int = 6 * 3600
+    archive_batch_size: int = 500
+
+    # Resumable uploads
+    upload_session_ttl_seconds: int = 86400  # Unfinished uploads are discarded after this
+    upload_chunk_size: int = 256 * 1024      # Suggested chunk size for clients
+    upload_chunk_timeout_seconds: int = 300  # Longest a chunk may take; its claim lapses after this
+
     # Environment
     environment: str = "development"
     
@@ -1,30 +1,252 @@
-from sqlalchemy import create_engine
+"""
+Database - Engines, sessions and SQLite tuning
+
+SQLite runs in a production profile: WAL journaling (readers never block the
+writer), synchronous=NORMAL, a busy timeout and larger page and mmap caches,
+applied to every new connection.
+
+SQLite allows one writer at a time. Without coordination, concurrent webhook
+and staff writes race for the file lock and fail with "database is locked".
+Writes in this process are therefore queued on a single-writer lock: a
+connection takes it at its first write statement and releases it when it
+goes back to the pool, after its transaction committed or rolled back.
+Waiting is bounded by the busy timeout, after which SQLite's own locking
+takes over, so a thread holding two write transactions can never deadlock
+itself.
+
+Async endpoints use a second engine on the same database (asyncpg or
+aiosqlite) through get_async_db, so their queries don't block the event loop.
+Its sessions are built on SessionLocal's class, so the change feed and file
+reference hooks apply to them too. Async SQLite connections get the same
+pragmas but not the writer lock, which would block the event loop; they rely
+on the busy timeout.
+
+PostgreSQL pools are sized from settings and time every checkout, so
+pool_stats() shows how many connections are in use and how long requests
+waited for one. When database_replica_url is set, read-only endpoints
+(lists and stats) take their sessions from get_read_db and query the replica.
+"""
+
+import threading
+import time
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from config import get_settings
 
 settings = get_settings()
 
-# Configure engine based on database type
-if "sqlite" in settings.database_url:
-    engine = create_engine(
-        settings.database_url,
-        connect_args={"check_same_thread": False}
-    )
-else:
-    # PostgreSQL configuration
-    engine = create_engine(
-        settings.database_url,
-        pool_pre_ping=True,  # Verify connections before using
-        pool_size=5,
-        max_overflow=10
-    )
+WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE", "REPLACE", "CREATE", "ALTER", "DROP")
+
+
+# ============================================
+# CONNECTION POOLS
+# ============================================
+
+class PoolMetrics:
+    """How often and how long requests waited for a pooled connection"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.peak_checked_out = 0
+
+    def record(self, seconds: float, checked_out: int, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self.peak_checked_out = max(self.peak_checked_out, checked_out)
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.wait_seconds / attempts * 1000, 2) if attempts else 0.0,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 2),
+                "peak_checked_out": self.peak_checked_out,
+            }
+
+
+class _MeteredPool:
+    """Times every checkout, including the wait for a free connection"""
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record(time.perf_counter() - started, self.checkedout(), timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - started, self.checkedout())
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool - keep counting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class MeteredQueuePool(_MeteredPool, QueuePool):
+    pass
+
+
+class MeteredAsyncQueuePool(_MeteredPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def _pool_options(pool_size: int, max_overflow: int) -> dict:
+    return {
+        "pool_pre_ping": True,  # Verify connections before using
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+    }
+
+
+def _metered(engine):
+    engine.pool.metrics = PoolMetrics()
+    return engine
+
+
+def _create_sync_engine(url: str):
+    if make_url(url).get_backend_name() == "sqlite":
+        return create_engine(url, connect_args={"check_same_thread": False})
+    return _metered(create_engine(
+        url,
+        poolclass=MeteredQueuePool,
+        **_pool_options(settings.db_pool_size, settings.db_max_overflow)
+    ))
+
+
+def async_database_url(url: str):
+    """The same database with its asyncio driver, plus connect args the driver needs"""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite"), {}
+    # asyncpg takes `ssl` instead of libpq's sslmode
+    sslmode = url.query.get("sslmode")
+    url = url.difference_update_query(["sslmode"]).set(drivername="postgresql+asyncpg")
+    return url, {"ssl": sslmode} if sslmode else {}
+
+
+def _create_async_engine(url: str):
+    async_url, connect_args = async_database_url(url)
+    if async_url.get_backend_name() == "sqlite":
+        # aiosqlite defaults to no pooling: a new connection (and thread) per session
+        return create_async_engine(async_url, poolclass=AsyncAdaptedQueuePool)
+    return _metered(create_async_engine(
+        async_url,
+        connect_args=connect_args,
+        poolclass=MeteredAsyncQueuePool,
+        **_pool_options(settings.db_async_pool_size, settings.db_async_max_overflow)
+    ))
+
+
+engine = _create_sync_engine(settings.database_url)
+async_engine = _create_async_engine(settings.database_url)
+
+# Read-only endpoints (lists, stats) use the replica when one is configured
+read_engine = _create_sync_engine(settings.database_replica_url) if settings.database_replica_url else engine
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# Same session class as SessionLocal, so its event hooks fire for async sessions
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,  # Reloading expired attributes would need an await
+    sync_session_class=SessionLocal.class_,
+)
+
+
+def _pool_status(pool) -> dict:
+    status = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+        })
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        status.update(metrics.snapshot())
+    return status
+
+
+def pool_stats() -> dict:
+    """Connection usage and checkout waits per engine"""
+    stats = {
+        "primary": _pool_status(engine.pool),
+        "async": _pool_status(async_engine.sync_engine.pool),
+    }
+    if read_engine is not engine:
+        stats["replica"] = _pool_status(read_engine.pool)
+    return stats
+
 
 Base = declarative_base()
 
 
+# ============================================
+# SQLITE PROFILE
+# ============================================
+
+_write_lock = threading.Lock()
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL; fsync at checkpoints only
+    cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+    cursor.execute(f"PRAGMA cache_size=-{settings.sqlite_cache_size_kb}")  # Negative means KiB
+    cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def _acquire_write_lock(conn, cursor, statement, parameters, context, executemany):
+    """Queue behind other writers at a transaction's first write"""
+    if conn.info.get("holds_write_lock"):
+        return
+    if statement.lstrip()[:7].upper().startswith(WRITE_STATEMENTS):
+        acquired = _write_lock.acquire(timeout=settings.sqlite_busy_timeout_ms / 1000)
+        # On timeout, carry on and let SQLite's busy handler decide
+        conn.info["holds_write_lock"] = acquired
+
+
+def _release_write_lock(info: dict):
+    if info.pop("holds_write_lock", False):
+        _write_lock.release()
+
+
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+    event.listen(engine, "before_cursor_execute", _acquire_write_lock)
+    # Sessions return their connection once the transaction ends (the pool rolls back unfinished ones)
+    event.listen(engine.pool, "checkin", lambda dbapi_connection, record: _release_write_lock(record.info))
+    event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -33,6 +255,15 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
 
 
-
+def get_read_db():
+    """Session for endpoints that only read; may lag writes by the replica's delay"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,309 @@
+"""
+Driver Tracking - Location pings, recent trails and ETAs to upcoming stops
+
+Driver phones post their position every few seconds. Pings are cheap:
+
+- Each ping goes into a bounded per-driver ring buffer (the recent trail).
+- At most one ping per driver_location_persist_seconds is written to the
+  driver_locations table.
+- ETAs to the driver's next stops are recomputed in the background only after
+  the driver has moved driver_eta_recompute_meters since the last computation
+  (or the ETAs are older than driver_eta_max_age_seconds). One upstream row
+  request covers every upcoming stop.
+
+Viewers read the stored ETA snapshot, so any number of them cost no upstream
+calls. New snapshots are saved to driver_eta_snapshots and announced on the
+change bus as small "drivers" events (driver and computed_at only, so any
+number of stops fits in a NOTIFY). SSE clients refetch the driver's ETAs, and
+the trackers of other workers load the snapshot from the table.
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import date, datetime, timedelta
+from typing import Deque, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from database import SessionLocal
+from models import DriverLocation, DriverETASnapshot
+from routing import load_day_stops, stop_location, location_key, matrix_cache, build_travel_row
+from route_planner import haversine_meters, estimate_travel_seconds, SERVICE_SECONDS
+from change_bus import change_bus
+from config import get_settings
+
+settings = get_settings()
+
+DRIVER_ENTITY = "drivers"
+
+
+class DriverState:
+    """Trail and ETA bookkeeping for one driver"""
+
+    def __init__(self, trail_size: int):
+        self.trail: Deque[dict] = deque(maxlen=trail_size)
+        self.last_persisted_at: Optional[float] = None   # time.monotonic()
+        self.eta_origin: Optional[Tuple[float, float]] = None
+        self.eta_computed_at: Optional[float] = None     # time.monotonic()
+        self.etas: Optional[dict] = None
+        self.refreshing = False
+
+
+class DriverTracker:
+    """Thread-safe store of driver trails and ETA snapshots"""
+
+    def __init__(
+        self,
+        trail_size: int = 500,
+        persist_seconds: int = 60,
+        recompute_meters: int = 200,
+        max_age_seconds: int = 300,
+    ):
+        self.trail_size = trail_size
+        self.persist_seconds = persist_seconds
+        self.recompute_meters = recompute_meters
+        self.max_age_seconds = max_age_seconds
+        self._drivers: Dict[str, DriverState] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, driver: str) -> DriverState:
+        state = self._drivers.get(driver)
+        if state is None:
+            state = self._drivers[driver] = DriverState(self.trail_size)
+        return state
+
+    def record(self, driver: str, ping: dict) -> Tuple[bool, bool]:
+        """Add a ping to the trail. Returns (persist, refresh_etas)."""
+        now = time.monotonic()
+        with self._lock:
+            state = self._state(driver)
+            state.trail.append(ping)
+
+            persist = state.last_persisted_at is None or now - state.last_persisted_at >= self.persist_seconds
+            if persist:
+                state.last_persisted_at = now
+
+            refresh = not state.refreshing and self._etas_stale(state, ping, now)
+            if refresh:
+                state.refreshing = True
+        return persist, refresh
+
+    def _etas_stale(self, state: DriverState, ping: dict, now: float) -> bool:
+        if state.eta_origin is None or now - state.eta_computed_at >= self.max_age_seconds:
+            return True
+        moved = haversine_meters(state.eta_origin[0], state.eta_origin[1], ping["lat"], ping["lng"])
+        return moved >= self.recompute_meters
+
+    def finish_refresh(self, driver: str, origin: Tuple[float, float], etas: Optional[dict]):
+        """Record a finished refresh; a failed one (etas=None) still waits for the next threshold"""
+        with self._lock:
+            state = self._state(driver)
+            state.refreshing = False
+            state.eta_origin = origin
+            state.eta_computed_at = time.monotonic()
+            if etas is not None:
+                state.etas = etas
+
+    def store_etas(self, driver: str, etas: dict):
+        """Keep a snapshot computed elsewhere (another worker)"""
+        with self._lock:
+            self._state(driver).etas = etas
+
+    def latest(self, driver: str) -> Optional[dict]:
+        with self._lock:
+            state = self._drivers.get(driver)
+            return state.trail[-1] if state and state.trail else None
+
+    def trail(self, driver: str, limit: Optional[int] = None) -> List[dict]:
+        """Recent pings, oldest first"""
+        with self._lock:
+            state = self._drivers.get(driver)
+            pings = list(state.trail) if state else []
+        return pings[-limit:] if limit else pings
+
+    def etas(self, driver: str) -> Optional[dict]:
+        with self._lock:
+            state = self._drivers.get(driver)
+            return state.etas if state else None
+
+    def positions(self) -> List[dict]:
+        """Latest ping of every driver seen by this worker"""
+        with self._lock:
+            return [
+                {"driver": driver, **state.trail[-1]}
+                for driver, state in self._drivers.items() if state.trail
+            ]
+
+    def stop_eta(self, stop_type: str, stop_id: int) -> Optional[dict]:
+        """Find a stop in the current snapshots"""
+        with self._lock:
+            snapshots = [state.etas for state in self._drivers.values() if state.etas]
+        for snapshot in snapshots:
+            for stop in snapshot["stops"]:
+                if stop["type"] == stop_type and stop["id"] == stop_id:
+                    return {"driver": snapshot["driver"], "computed_at": snapshot["computed_at"], **stop}
+        return None
+
+
+tracker = DriverTracker(
+    trail_size=settings.driver_trail_size,
+    persist_seconds=settings.driver_location_persist_seconds,
+    recompute_meters=settings.driver_eta_recompute_meters,
+    max_age_seconds=settings.driver_eta_max_age_seconds,
+)
+
+
+def save_driver_location(driver: str, ping: dict):
+    """Persist one sampled ping"""
+    db = SessionLocal()
+    try:
+        db.add(DriverLocation(
+            driver=driver,
+            lat=ping["lat"],
+            lng=ping["lng"],
+            accuracy=ping.get("accuracy"),
+            recorded_at=ping["recorded_at"],
+        ))
+        db.commit()
+    except Exception as e:
+        print(f"[Drivers] Failed to save location for {driver}: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+def load_upcoming_stops(driver: str, day: date) -> List[dict]:
+    """The driver's open stops for the day, in scheduled order (see routing.FINISHED_TASK_STATUSES)"""
+    db = SessionLocal()
+    try:
+        stops = load_day_stops(db, day, assigned_to=driver)
+    finally:
+        db.close()
+    return stops[:settings.driver_eta_stop_limit]
+
+
+async def compute_etas(driver: str, lat: float, lng: float, stops: List[dict]) -> dict:
+    """
+    ETAs from the driver's position through the stops in order.
+
+    Every stop gets a direct drive time from the driver (one upstream request
+    for the whole row). Arrival at later stops also accounts for the stops
+    before them: waiting for windows, service time and the legs in between.
+    """
+    now = datetime.now()
+    origin = {"lat": lat, "lng": lng}
+    row = await build_travel_row(f"{lat},{lng}", [stop_location(stop) for stop in stops]) if stops else []
+
+    entries = []
+    clock = now
+    previous = None
+    for stop, direct in zip(stops, row):
+        if direct is not None:
+            travel_seconds, distance_meters = direct
+        else:
+            travel_seconds, distance_meters = estimate_travel_seconds(origin, stop), None
+
+        if previous is None:
+            arrival = now + timedelta(seconds=travel_seconds)
+        else:
+            cached_leg = matrix_cache.get((location_key(stop_location(previous)), location_key(stop_location(stop))))
+            leg_seconds = cached_leg[0] if cached_leg else estimate_travel_seconds(previous, stop)
+            arrival = max(clock + timedelta(seconds=leg_seconds), now + timedelta(seconds=travel_seconds))
+
+        window_end = stop["scheduled_end"] or stop["scheduled_start"] + timedelta(hours=1)
+        entries.append({
+            "type": stop["type"],
+            "id": stop["id"],
+            "customer_name": stop["customer_name"],
+            "address": stop["address"],
+            "scheduled_start": stop["scheduled_start"].isoformat(),
+            "scheduled_end": stop["scheduled_end"].isoformat() if stop["scheduled_end"] else None,
+            "eta": arrival.isoformat(),
+            "travel_seconds": travel_seconds,
+            "distance_meters": distance_meters,
+            "source": "traffic" if direct is not None else "estimate",
+            "late": arrival > window_end,
+        })
+        clock = max(arrival, stop["scheduled_start"]) + timedelta(seconds=SERVICE_SECONDS)
+        previous = stop
+
+    return {
+        "driver": driver,
+        "lat": lat,
+        "lng": lng,
+        "computed_at": now.isoformat(),
+        "stops": entries,
+    }
+
+
+async def refresh_etas(driver: str, lat: float, lng: float):
+    """Recompute a driver's ETAs and publish the snapshot"""
+    etas = None
+    try:
+        stops = await run_in_threadpool(load_upcoming_stops, driver, date.today())
+        etas = await compute_etas(driver, lat, lng, stops)
+    except Exception as e:
+        print(f"[Drivers] ETA refresh failed for {driver}: {e}")
+    finally:
+        tracker.finish_refresh(driver, (lat, lng), etas)
+
+    if etas is not None:
+        await run_in_threadpool(save_eta_snapshot, driver, etas)
+
+
+def save_eta_snapshot(driver: str, etas: dict):
+    """Store a snapshot and announce it, in the same transaction"""
+    change = {
+        "entity": DRIVER_ENTITY,
+        "id": driver,
+        "action": "updated",
+        "fields": ["etas"],
+        "computed_at": etas["computed_at"],
+    }
+    db = SessionLocal()
+    try:
+        db.merge(DriverETASnapshot(
+            driver=driver,
+            snapshot=etas,
+            computed_at=datetime.fromisoformat(etas["computed_at"]),
+        ))
+        db.flush()
+        change_bus.relay(db.connection(), [change])
+        db.commit()
+    except Exception as e:
+        print(f"[Drivers] Failed to save ETAs for {driver}: {e}")
+        db.rollback()
+        return
+    finally:
+        db.close()
+    change_bus.deliver([change])
+
+
+def load_eta_snapshot(driver: str) -> Optional[dict]:
+    """The latest stored snapshot of a driver, whichever worker computed it"""
+    db = SessionLocal()
+    try:
+        row = db.get(DriverETASnapshot, driver)
+        return row.snapshot if row else None
+    finally:
+        db.close()
+
+
+def store_etas_from_change(change: dict):
+    """Change bus subscriber - load snapshots computed by other workers"""
+    if change.get("entity") != DRIVER_ENTITY:
+        return
+    current = tracker.etas(change["id"])
+    if current and current["computed_at"] == change.get("computed_at"):
+        return  # Computed by this worker
+    try:
+        etas = load_eta_snapshot(change["id"])
+    except Exception as e:
+        print(f"[Drivers] Failed to load ETAs for {change['id']}: {e}")
+        return
+    if etas:
+        tracker.store_etas(change["id"], etas)
+
+
+change_bus.subscribe(store_etas_from_change)
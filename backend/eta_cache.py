@@ -0,0 +1,140 @@
+"""
+ETA Cache - Geohash-bucketed cache for Google Distance Matrix results
+
+Drivers ask for the ETA to the same stop over and over from nearly the same
+spot. Results are cached under (geohash of the origin, normalized destination),
+so every request from within the same ~150m cell reuses one upstream call.
+
+Traffic changes faster at rush hour than at night, so entries expire on a
+time-of-day schedule. The cache is LRU-bounded and keeps hit/miss counters for
+the /api/directions/cache-stats endpoint.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from config import get_settings
+
+settings = get_settings()
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# (start_hour, end_hour, ttl_seconds) in server local time; first match wins
+TTL_SCHEDULE = [
+    (7, 10, 120),    # Morning rush - traffic changes quickly
+    (16, 19, 120),   # Evening rush
+    (10, 16, 300),   # Midday
+    (19, 22, 600),   # Evening
+]
+NIGHT_TTL_SECONDS = 1800
+
+
+def geohash(lat: float, lng: float, precision: int) -> str:
+    """Encode coordinates as a geohash string of the given length"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # Geohash interleaves bits starting with longitude
+
+    while len(chars) < precision:
+        value, bounds = (lng, lng_range) if even else (lat, lat_range)
+        mid = (bounds[0] + bounds[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            bounds[0] = mid
+        else:
+            bits = bits << 1
+            bounds[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def normalize_destination(destination: str) -> str:
+    """Normalize an address so trivial formatting differences share a cache entry"""
+    destination = destination.lower()
+    destination = re.sub(r"[^\w\s]", " ", destination)
+    return " ".join(destination.split())
+
+
+def ttl_for(now: Optional[datetime] = None) -> int:
+    """TTL in seconds for an entry cached at the given time"""
+    hour = (now or datetime.now()).hour
+    for start_hour, end_hour, ttl_seconds in TTL_SCHEDULE:
+        if start_hour <= hour < end_hour:
+            return ttl_seconds
+    return NIGHT_TTL_SECONDS
+
+
+class ETACache:
+    """Thread-safe LRU cache with per-entry expiry and hit statistics"""
+
+    def __init__(self, max_entries: int = 5000, precision: int = 7):
+        self.max_entries = max_entries
+        self.precision = precision
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.upstream_calls = 0
+
+    def key(self, origin_lat: float, origin_lng: float, destination: str) -> Tuple[str, str]:
+        return geohash(origin_lat, origin_lng, self.precision), normalize_destination(destination)
+
+    def get(self, key: Tuple[str, str]) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Tuple[str, str], value: Any, ttl_seconds: Optional[int] = None):
+        expires_at = time.monotonic() + (ttl_seconds if ttl_seconds is not None else ttl_for())
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def record_upstream_call(self):
+        with self._lock:
+            self.upstream_calls += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "upstream_calls": self.upstream_calls,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "current_ttl_seconds": ttl_for(),
+            }
+
+
+eta_cache = ETACache(
+    max_entries=settings.eta_cache_max_entries,
+    precision=settings.eta_cache_geohash_precision,
+)
@@ -0,0 +1,163 @@
+"""
+File Responses - Cache-friendly file serving with validators and byte ranges
+
+Starlette's FileResponse always sends the whole file and ignores conditional
+requests. CachedFileResponse adds what browsers and the service worker need
+to stop re-downloading photos:
+
+- ETag (the content hash for content-addressed files) and Cache-Control,
+  with `immutable` for files whose name is their hash.
+- 304 Not Modified for matching If-None-Match.
+- Single byte ranges (206 / 416), honouring If-Range.
+
+The body is sent with the ASGI zero-copy extensions when the server offers
+them ("http.response.pathsend", "http.response.zerocopysend"), and otherwise
+read in chunks in the threadpool.
+"""
+
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+from hashlib import md5
+from typing import Optional, Tuple
+
+import anyio
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+CHUNK_SIZE = 64 * 1024
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"  # Cache, but check the ETag each time
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def stat_etag(stat_result: os.stat_result) -> str:
+    """ETag from modification time and size, for files not named by their hash"""
+    base = f"{stat_result.st_mtime}-{stat_result.st_size}"
+    return f'"{md5(base.encode(), usedforsecurity=False).hexdigest()}"'
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match comparison (weak, as RFC 9110 requires for this header)"""
+    if header.strip() == "*":
+        return True
+    candidates = [value.strip() for value in header.split(",")]
+    return any(candidate.removeprefix("W/") == etag.removeprefix("W/") for candidate in candidates)
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range Range header into an inclusive (start, end).
+    Returns None to send the whole file; raises ValueError if unsatisfiable.
+    """
+    match = RANGE_PATTERN.match(header.strip())
+    if not match:
+        return None  # Multiple or malformed ranges - a full response is allowed
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("range not satisfiable")
+    return start, end
+
+
+class CachedFileResponse(Response):
+    """A file response that answers conditional and range requests"""
+
+    def __init__(
+        self,
+        request: Request,
+        path: str,
+        media_type: Optional[str] = None,
+        etag: Optional[str] = None,
+        immutable: bool = False,
+        headers: Optional[dict] = None,
+    ):
+        self.path = path
+        self.status_code = 200
+        self.media_type = media_type or mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.background = None
+        self.init_headers(headers)
+
+        self.stat_result = os.stat(path)
+        self.size = self.stat_result.st_size
+        self.offset, self.count = 0, self.size
+
+        etag = etag or stat_etag(self.stat_result)
+        self.headers["etag"] = etag
+        self.headers["last-modified"] = formatdate(self.stat_result.st_mtime, usegmt=True)
+        self.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
+        self.headers["accept-ranges"] = "bytes"
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, etag):
+            self.status_code = 304
+            self.count = 0
+            return
+
+        range_header = request.headers.get("range")
+        if_range = request.headers.get("if-range")
+        if range_header and (not if_range or if_range.strip() == etag):
+            try:
+                byte_range = parse_range(range_header, self.size)
+            except ValueError:
+                self.status_code = 416
+                self.count = 0
+                self.headers["content-range"] = f"bytes */{self.size}"
+                self.headers["content-length"] = "0"
+                return
+            if byte_range:
+                start, end = byte_range
+                self.status_code = 206
+                self.offset, self.count = start, end - start + 1
+                self.headers["content-range"] = f"bytes {start}-{end}/{self.size}"
+
+        self.headers["content-length"] = str(self.count)
+        self.headers["content-type"] = self.media_type
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if self.count == 0 or scope.get("method") == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        extensions = scope.get("extensions") or {}
+        if "http.response.pathsend" in extensions and self.status_code == 200:
+            await send({"type": "http.response.pathsend", "path": self.path})
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            if "http.response.zerocopysend" in extensions:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file.wrapped.fileno(),
+                    "offset": self.offset,
+                    "count": self.count,
+                })
+                return
+
+            await file.seek(self.offset)
+            remaining = self.count
+            while remaining > 0:
+                chunk = await file.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                # File shrank while sending - end the response cleanly
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
@@ -0,0 +1,263 @@
+"""
+File Store - Upload bookkeeping, file references and garbage collection
+
+Uploads are content-addressed (see upload_stream): one file per distinct image,
+named {sha256}{ext}, with a row in uploaded_files.
+
+file_references records which rows use which files. It is maintained by session
+hooks: whenever a task, pickup or SMS conversation is flushed, the upload URLs
+in its image fields are extracted and its references rewritten, so no router
+has to remember to do it.
+
+The garbage collector removes uploaded files that no row references, in batches.
+Files get a grace period first, because photos are uploaded before the task or
+pickup that uses them is saved. It also sweeps ".part" files that interrupted
+uploads left behind.
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, event, exists, inspect, insert, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, engine
+from models import (
+    DeliveryTask, PickupRequest, SMSConversation, UploadedFile, FileReference,
+    ArchivedDeliveryTask, ArchivedPickupRequest, ArchivedSMSConversation,
+)
+from image_derivatives import remove_derivatives
+from resumable_uploads import expire_sessions
+from config import get_settings
+
+settings = get_settings()
+
+UPLOAD_URL_PATTERN = re.compile(r"/api/uploads/images/([0-9a-f]{64}\.[a-z]+)")
+CONTENT_ADDRESSED_NAME = re.compile(r"^([0-9a-f]{64})\.[a-z]+$")
+
+# Columns that may hold upload URLs, per model
+REFERENCE_FIELDS = {
+    DeliveryTask: ["image_url", "signature_url", "items"],
+    PickupRequest: ["item_photos"],
+    SMSConversation: ["photo_urls"],
+    # Archived rows keep their files (see archiver.py)
+    ArchivedDeliveryTask: ["image_url", "signature_url", "items"],
+    ArchivedPickupRequest: ["item_photos"],
+    ArchivedSMSConversation: ["photo_urls"],
+}
+
+# Arbitrary key for pg_try_advisory_lock, so one worker collects at a time
+GC_LOCK_KEY = 380038
+
+
+def referenced_filenames(obj) -> Set[str]:
+    """Uploaded files referenced by a row's image fields"""
+    values = [getattr(obj, field) for field in REFERENCE_FIELDS[type(obj)]]
+    return set(UPLOAD_URL_PATTERN.findall(json.dumps(values, default=str)))
+
+
+def content_hash(filename: str) -> Optional[str]:
+    """The SHA-256 a content-addressed filename is named after, or None for older uploads"""
+    match = CONTENT_ADDRESSED_NAME.match(filename)
+    return match.group(1) if match else None
+
+
+# ============================================
+# UPLOAD REGISTRATION
+# ============================================
+
+def register_uploads(files: Iterable) -> None:
+    """Record stored uploads (objects with filename, sha256 and size); re-uploads refresh the GC grace period"""
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        for file in files:
+            row = db.query(UploadedFile).filter(UploadedFile.filename == file.filename).first()
+            if row:
+                row.last_uploaded_at = now
+            else:
+                db.add(UploadedFile(filename=file.filename, sha256=file.sha256, size=file.size, last_uploaded_at=now))
+            try:
+                db.commit()
+            except IntegrityError:
+                # The same content was registered by a concurrent upload
+                db.rollback()
+    finally:
+        db.close()
+
+
+def is_referenced(db: Session, filename: str) -> bool:
+    return db.query(exists().where(FileReference.filename == filename)).scalar()
+
+
+def forget_upload(db: Session, filename: str) -> None:
+    db.query(UploadedFile).filter(UploadedFile.filename == filename).delete()
+    db.commit()
+
+
+# ============================================
+# SESSION HOOKS
+# ============================================
+
+def _fields_changed(obj) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[field].history.has_changes() for field in REFERENCE_FIELDS[type(obj)])
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _sync_references(session: Session, flush_context):
+    """Rewrite file_references for rows whose image fields changed"""
+    replace: Dict[tuple, Set[str]] = {}
+    for obj in session.new:
+        if type(obj) in REFERENCE_FIELDS:
+            replace[(obj.__tablename__, obj.id)] = referenced_filenames(obj)
+    for obj in session.dirty:
+        if type(obj) in REFERENCE_FIELDS and _fields_changed(obj):
+            replace[(obj.__tablename__, obj.id)] = referenced_filenames(obj)
+    for obj in session.deleted:
+        if type(obj) in REFERENCE_FIELDS:
+            replace[(obj.__tablename__, obj.id)] = set()
+
+    if not replace:
+        return
+
+    connection = session.connection()
+    for (entity, entity_id), filenames in replace.items():
+        connection.execute(
+            delete(FileReference).where(FileReference.entity == entity, FileReference.entity_id == entity_id)
+        )
+        if filenames:
+            connection.execute(insert(FileReference), [
+                {"filename": filename, "entity": entity, "entity_id": entity_id}
+                for filename in sorted(filenames)
+            ])
+
+
+# ============================================
+# GARBAGE COLLECTION
+# ============================================
+
+def _collect_batch(db: Session, upload_dir: str, derivative_dir: str, cutoff: datetime, batch_size: int) -> List[tuple]:
+    """Remove up to batch_size unreferenced files older than the cutoff; returns (filename, size) pairs"""
+    orphans = (
+        db.query(UploadedFile.id, UploadedFile.filename, UploadedFile.size)
+        .filter(
+            UploadedFile.last_uploaded_at < cutoff,
+            ~exists().where(FileReference.filename == UploadedFile.filename),
+        )
+        .order_by(UploadedFile.id)
+        .limit(batch_size)
+        .all()
+    )
+    if not orphans:
+        return []
+
+    removed = []
+    for orphan in orphans:
+        # Re-checked in the DELETE itself: a re-upload may have refreshed the row, or a
+        # task may have started using the file, since the query above
+        deleted = db.execute(
+            delete(UploadedFile).where(
+                UploadedFile.id == orphan.id,
+                UploadedFile.last_uploaded_at < cutoff,
+                ~exists().where(FileReference.filename == UploadedFile.filename),
+            )
+        ).rowcount
+        # Rows go first: a failed unlink leaves a stray file, never a row pointing at nothing
+        db.commit()
+        if not deleted or _is_registered(db, orphan.filename):
+            continue  # Still in use, or the same content was uploaded again meanwhile
+
+        path = os.path.join(upload_dir, orphan.filename)
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+            remove_derivatives(derivative_dir, orphan.filename)
+        except OSError as e:
+            print(f"[Uploads] Failed to remove {orphan.filename}: {e}")
+        removed.append((orphan.filename, orphan.size))
+    return removed
+
+
+def _is_registered(db: Session, filename: str) -> bool:
+    return db.query(exists().where(UploadedFile.filename == filename)).scalar()
+
+
+def _sweep_temp_files(upload_dir: str) -> int:
+    """Remove ".part" files left by uploads that never finished (e.g. the worker died mid-request)"""
+    cutoff = time.time() - settings.upload_gc_grace_seconds
+    swept = 0
+    for entry in os.scandir(upload_dir):
+        if not (entry.is_file() and entry.name.startswith(".") and entry.name.endswith(".part")):
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                swept += 1
+        except OSError as e:
+            print(f"[Uploads] Failed to remove {entry.name}: {e}")
+    return swept
+
+
+def collect_garbage(upload_dir: str, derivative_dir: str) -> dict:
+    """Delete uploaded files no row references and abandoned temp files.
+    Returns {"files_removed", "bytes_freed", "temp_files_removed", "skipped"}."""
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.upload_gc_grace_seconds)
+    stats = {"files_removed": 0, "bytes_freed": 0, "temp_files_removed": 0, "skipped": False}
+
+    with engine.connect() as lock_connection:
+        if engine.dialect.name == "postgresql":
+            locked = lock_connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": GC_LOCK_KEY}).scalar()
+            if not locked:
+                stats["skipped"] = True  # Another worker is collecting
+                return stats
+
+        db = SessionLocal()
+        try:
+            while True:
+                removed = _collect_batch(db, upload_dir, derivative_dir, cutoff, settings.upload_gc_batch_size)
+                stats["files_removed"] += len(removed)
+                stats["bytes_freed"] += sum(size for _, size in removed)
+                if not removed:
+                    break
+            stats["temp_files_removed"] = _sweep_temp_files(upload_dir)
+        finally:
+            db.close()
+            if engine.dialect.name == "postgresql":
+                lock_connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": GC_LOCK_KEY})
+
+    if stats["files_removed"]:
+        print(f"[Uploads] Garbage collection removed {stats['files_removed']} files ({stats['bytes_freed']} bytes)")
+    if stats["temp_files_removed"]:
+        print(f"[Uploads] Garbage collection removed {stats['temp_files_removed']} abandoned temp files")
+    return stats
+
+
+def expire_upload_sessions(partial_dir: str) -> int:
+    """Discard resumable uploads that were abandoned"""
+    db = SessionLocal()
+    try:
+        expired = expire_sessions(db, partial_dir)
+    finally:
+        db.close()
+    if expired:
+        print(f"[Uploads] Discarded {expired} expired upload sessions")
+    return expired
+
+
+async def run_garbage_collector(upload_dir: str, derivative_dir: str, partial_dir: str):
+    """Collect orphaned uploads and expired upload sessions every upload_gc_interval_seconds (runs until cancelled)"""
+    while True:
+        await asyncio.sleep(settings.upload_gc_interval_seconds)
+        try:
+            await run_in_threadpool(expire_upload_sessions, partial_dir)
+            await run_in_threadpool(collect_garbage, upload_dir, derivative_dir)
+        except Exception as e:
+            print(f"[Uploads] Garbage collection failed: {e}")
@@ -0,0 +1,118 @@
+"""
+Geocoding - Geocode each address once and store the coordinates
+
+Addresses are geocoded in the background when tasks and pickups are created
+(or their address changes), never on the request path. Results are kept in the
+geocoded_addresses table, keyed by the normalized address string, so an address
+that was seen before - a repeat customer, a retried SMS request - is resolved
+with one indexed lookup instead of a Google call.
+
+Coordinates are copied onto delivery_tasks/pickup_requests (lat, lng) so the
+routing code can send coordinates upstream and skip geocoding entirely.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+import httpx
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import DeliveryTask, PickupRequest, GeocodedAddress
+from utils import format_address, format_pickup_address
+from eta_cache import normalize_destination
+
+GOOGLE_MAPS_API_KEY = os.environ.get("GOOGLE_MAPS_API_KEY")
+GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+
+# Address fields that invalidate stored coordinates when changed
+TASK_ADDRESS_FIELDS = {
+    "delivery_address_line1", "delivery_address_line2",
+    "delivery_city", "delivery_state", "delivery_zip",
+}
+PICKUP_ADDRESS_FIELDS = {
+    "pickup_address_line1", "pickup_address_line2",
+    "pickup_city", "pickup_state", "pickup_zip",
+}
+
+# Small pool - geocoding is I/O bound and Google rate-limits bursts
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="geocode")
+
+
+def request_geocode(address: str) -> Tuple[str, Optional[dict]]:
+    """Call the Google Geocoding API. Returns (status, result) where status is ok, not_found or error."""
+    try:
+        response = httpx.get(GEOCODE_URL, params={"address": address, "key": GOOGLE_MAPS_API_KEY}, timeout=10.0)
+        response.raise_for_status()
+        data = response.json()
+    except (httpx.HTTPError, ValueError) as e:
+        print(f"[Geocode] Request failed for {address!r}: {e}")
+        return "error", None
+
+    if data.get("status") == "ZERO_RESULTS":
+        return "not_found", None
+    if data.get("status") != "OK" or not data.get("results"):
+        print(f"[Geocode] Error for {address!r}: {data.get('status')}")
+        return "error", None
+    return "ok", data["results"][0]
+
+
+def geocode_address(db: Session, address: str) -> Optional[Tuple[float, float]]:
+    """Get coordinates for an address, calling Google only the first time it is seen"""
+    normalized = normalize_destination(address)
+    cached = db.query(GeocodedAddress).filter(GeocodedAddress.normalized_address == normalized).first()
+    if cached:
+        return (cached.lat, cached.lng) if cached.status == "ok" else None
+
+    if not GOOGLE_MAPS_API_KEY:
+        return None
+
+    status, result = request_geocode(address)
+    if status == "error":
+        return None  # Not stored, so it is retried next time
+
+    entry = GeocodedAddress(normalized_address=normalized, status=status)
+    if result:
+        location = result["geometry"]["location"]
+        entry.lat = location["lat"]
+        entry.lng = location["lng"]
+        entry.formatted_address = result.get("formatted_address")
+
+    db.add(entry)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another worker geocoded the same address first
+        db.rollback()
+        entry = db.query(GeocodedAddress).filter(GeocodedAddress.normalized_address == normalized).first()
+
+    return (entry.lat, entry.lng) if entry and entry.status == "ok" else None
+
+
+def _geocode_row(model, row_id: int, format_row):
+    db = SessionLocal()
+    try:
+        row = db.query(model).filter(model.id == row_id).first()
+        if not row:
+            return
+        coordinates = geocode_address(db, format_row(row))
+        if coordinates:
+            row.lat, row.lng = coordinates
+            db.commit()
+    except Exception as e:
+        print(f"[Geocode] Failed for {model.__tablename__} {row_id}: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+def geocode_task_in_background(task_id: int):
+    """Queue geocoding of a delivery task's address"""
+    _executor.submit(_geocode_row, DeliveryTask, task_id, format_address)
+
+
+def geocode_pickup_in_background(pickup_id: int):
+    """Queue geocoding of a pickup request's address"""
+    _executor.submit(_geocode_row, PickupRequest, pickup_id, format_pickup_address)
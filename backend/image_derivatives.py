@@ -0,0 +1,170 @@
+"""
+Image Derivatives - Resized WebP/AVIF variants of uploaded photos
+
+Phone photos are several megabytes; list and calendar views only need a few
+hundred pixels. After an upload every photo is rendered at each size in
+DERIVATIVE_SIZES as WebP (and AVIF when the Pillow AVIF plugin is installed).
+
+Rendering runs in a process pool so decoding and resizing never occupy an API
+worker. Variants are also rendered on first request for photos uploaded before
+this existed. Pillow is optional: without it, callers get the original file.
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from config import get_settings
+
+try:
+    from PIL import Image, ImageOps
+    try:
+        import pillow_avif  # noqa: F401 - registers the AVIF plugin
+    except ImportError:
+        pass
+    Image.init()
+    PIL_AVAILABLE = True
+except ImportError:
+    Image = ImageOps = None
+    PIL_AVAILABLE = False
+
+settings = get_settings()
+
+# Size name -> longest edge in pixels
+DERIVATIVE_SIZES = {
+    "thumb": 200,
+    "small": 480,
+    "medium": 1024,
+}
+
+# Output formats in order of preference: (extension, Pillow format, media type)
+FORMATS = [
+    ("avif", "AVIF", "image/avif"),
+    ("webp", "WEBP", "image/webp"),
+]
+QUALITY = 80
+
+_pool: Optional[ProcessPoolExecutor] = None
+# Renders in progress, keyed by source path, so a photo is only rendered once
+_inflight: Dict[str, Future] = {}
+# Photos whose render failed (corrupt, undecodable, worker crash): filename ->
+# monotonic time to retry, so one bad photo doesn't keep occupying the pool
+_failed: Dict[str, float] = {}
+
+
+def available_formats() -> List[Tuple[str, str, str]]:
+    if not PIL_AVAILABLE:
+        return []
+    return [entry for entry in FORMATS if entry[1] in Image.SAVE]
+
+
+def derivative_path(derivative_dir: str, filename: str, size: str, ext: str) -> str:
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(derivative_dir, f"{stem}_{size}.{ext}")
+
+
+def render_derivatives(source_path: str, derivative_dir: str, formats: List[Tuple[str, str, str]]):
+    """Render every size and format of one image (runs in a worker process)"""
+    filename = os.path.basename(source_path)
+    with Image.open(source_path) as original:
+        # Phones store rotation in EXIF rather than rotating the pixels
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if image.mode in ("LA", "P", "PA") else "RGB")
+
+        for size, max_pixels in DERIVATIVE_SIZES.items():
+            variant = image.copy()
+            variant.thumbnail((max_pixels, max_pixels), Image.LANCZOS)
+            for ext, pillow_format, _ in formats:
+                path = derivative_path(derivative_dir, filename, size, ext)
+                temp_path = f"{path}.tmp"
+                variant.save(temp_path, pillow_format, quality=QUALITY)
+                os.replace(temp_path, path)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=settings.image_worker_processes)
+    return _pool
+
+
+def _render_finished(source_path: str, future: Future):
+    _inflight.pop(source_path, None)
+    if not future.cancelled() and future.exception():
+        _failed[os.path.basename(source_path)] = time.monotonic() + settings.image_render_retry_seconds
+        print(f"[Images] Failed to render derivatives for {os.path.basename(source_path)}: {future.exception()}")
+
+
+def _recently_failed(source_path: str) -> bool:
+    filename = os.path.basename(source_path)
+    retry_at = _failed.get(filename)
+    if retry_at is None:
+        return False
+    if time.monotonic() < retry_at:
+        return True
+    _failed.pop(filename, None)
+    return False
+
+
+def start_derivatives(source_path: str, derivative_dir: str) -> Optional[Future]:
+    """Queue rendering of an image's derivatives; returns None when Pillow is unavailable
+    or the image recently failed to render"""
+    formats = available_formats()
+    if not formats or _recently_failed(source_path):
+        return None
+
+    future = _inflight.get(source_path)
+    if future is None:
+        os.makedirs(derivative_dir, exist_ok=True)
+        future = _get_pool().submit(render_derivatives, source_path, derivative_dir, formats)
+        _inflight[source_path] = future
+        future.add_done_callback(lambda done: _render_finished(source_path, done))
+    return future
+
+
+def choose_format(accept: str) -> Optional[Tuple[str, str, str]]:
+    """Best derivative format the client accepts"""
+    for entry in available_formats():
+        if entry[2] in accept:
+            return entry
+    return None
+
+
+async def get_derivative(source_path: str, derivative_dir: str, size: str, accept: str) -> Optional[Tuple[str, str]]:
+    """(path, media type) of a derivative, rendering it if needed; None to serve the original"""
+    entry = choose_format(accept)
+    if entry is None:
+        return None
+
+    ext, _, media_type = entry
+    path = derivative_path(derivative_dir, os.path.basename(source_path), size, ext)
+    if not os.path.exists(path):
+        future = start_derivatives(source_path, derivative_dir)
+        if future is None:
+            return None
+        try:
+            # Shielded so a disconnecting client doesn't cancel the shared render
+            await asyncio.shield(asyncio.wrap_future(future))
+        except Exception:
+            return None
+    return (path, media_type) if os.path.exists(path) else None
+
+
+def remove_derivatives(derivative_dir: str, filename: str):
+    """Delete every derivative of an image"""
+    _failed.pop(filename, None)
+    for size in DERIVATIVE_SIZES:
+        for ext, _, _ in FORMATS:
+            path = derivative_path(derivative_dir, filename, size, ext)
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -2,7 +2,8 @@
 """
 Initialize database with sample data and default admin user
 """
-from database import SessionLocal, engine, Base
+from database import SessionLocal
+from migrate import run_migrations
 from models import User, DeliveryTask, TaskStatus, TaskSource
 from auth import get_password_hash
 from datetime import datetime, timedelta
@@ -10,7 +11,7 @@ from datetime import datetime, timedelta
 def init_database():
     """Initialize database with tables and sample data"""
     print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
+    run_migrations()
     
     db = SessionLocal()
     
@@ -1,124 +1,70 @@
+from startup_timing import startup_timer  # First, so import time is measured
+
 import os
+import asyncio
+import hashlib
+import hmac
+import json
+from contextlib import asynccontextmanager
 
-# DEBUG: Print all database-related env vars
-print("=" * 50)
-print("DATABASE DEBUG INFO")
-print("=" * 50)
-for var_name in ["POSTGRES_URL", "DATABASE_PRIVATE_URL", "DATABASE_URL"]:
-    val = os.environ.get(var_name, "NOT SET")
-    if val != "NOT SET" and "@" in val:
-        print(f"{var_name}: postgresql://***@{val.split('@')[1][:30]}...")
-    elif val != "NOT SET":
-        print(f"{var_name}: {val[:50]}...")
-    else:
-        print(f"{var_name}: NOT SET")
-print("=" * 50)
-
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
-from database import engine, Base, SessionLocal
-from routers import auth_router, tasks_router, calendar_router, webhooks_router, schedule_router, items_router, pickups_router, sms_router, uploads_router, directions_router
+from database import SessionLocal, async_engine, pool_stats
+from migrate import run_migrations
+from routers import auth_router, tasks_router, calendar_router, webhooks_router, schedule_router, items_router, pickups_router, sms_router, uploads_router, directions_router, events_router, drivers_router
 from config import get_settings
 from models import User
-from auth import get_password_hash
+from auth import get_password_hash, invalidate_principal, require_role
 from users_config import USERS
+from change_bus import change_bus
+from image_derivatives import shutdown_pool as shutdown_image_pool
+from file_store import run_garbage_collector
+from archiver import run_archiver
+from query_metrics import QueryMetricsMiddleware
 
 settings = get_settings()
 
-# Print what settings ended up using
-db_type = "PostgreSQL" if "postgresql" in settings.database_url else "SQLite"
-print(f"🗄️  Using Database: {db_type}")
-
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
-# Ensure enum types are up to date
-def ensure_enum_updates():
-    """Add missing values to PostgreSQL enum types - safe for production"""
-    from sqlalchemy import text
-    from database import engine
-
-    if "postgresql" not in settings.database_url:
-        return  # Only needed for PostgreSQL
-
-    # List of enum updates: (enum_name, value)
-    enum_updates = [
-        ("pickupstatus", "pending"),
-        ("pickupstatus", "scheduled"),
-        ("pickupstatus", "completed"),
-    ]
-
-    with engine.connect() as conn:
-        for enum_name, value in enum_updates:
-            try:
-                # Check if value exists in enum
-                result = conn.execute(text(
-                    f"SELECT 1 FROM pg_enum WHERE enumlabel = '{value}' "
-                    f"AND enumtypid = (SELECT oid FROM pg_type WHERE typname = '{enum_name}')"
-                ))
-                if result.fetchone() is None:
-                    # Add the value to the enum
-                    conn.execute(text(f"ALTER TYPE {enum_name} ADD VALUE IF NOT EXISTS '{value}'"))
-                    conn.commit()
-                    print(f"✓ Added enum value: {enum_name}.{value}")
-                else:
-                    print(f"✓ Enum value exists: {enum_name}.{value}")
-            except Exception as e:
-                print(f"Enum update skipped for {enum_name}.{value}: {e}")
-
-ensure_enum_updates()
-
-# Ensure schema is up to date (add missing columns safely)
-def ensure_schema_updates():
-    """Add any missing columns to existing tables - safe for production"""
-    from sqlalchemy import text
-    from database import engine
-
-    # List of schema updates (column additions only - safe operations)
-    schema_updates = [
-        # Add items column to delivery_tasks if it doesn't exist
-        ("delivery_tasks", "items", "ALTER TABLE delivery_tasks ADD COLUMN IF NOT EXISTS items JSON"),
-        # Add signature_url column to delivery_tasks for e-signatures
-        ("delivery_tasks", "signature_url", "ALTER TABLE delivery_tasks ADD COLUMN IF NOT EXISTS signature_url VARCHAR(255)"),
-    ]
-    
-    with engine.connect() as conn:
-        for table, column, sql in schema_updates:
-            try:
-                # Check if column exists (PostgreSQL)
-                if "postgresql" in settings.database_url:
-                    result = conn.execute(text(
-                        f"SELECT column_name FROM information_schema.columns "
-                        f"WHERE table_name='{table}' AND column_name='{column}'"
-                    ))
-                    if result.fetchone() is None:
-                        conn.execute(text(sql))
-                        conn.commit()
-                        print(f"✓ Added column: {table}.{column}")
-                    else:
-                        print(f"✓ Column exists: {table}.{column}")
-                else:
-                    # SQLite - just try to add, ignore if exists
-                    try:
-                        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} JSON"))
-                        conn.commit()
-                        print(f"✓ Added column: {table}.{column}")
-                    except:
-                        print(f"✓ Column exists: {table}.{column}")
-            except Exception as e:
-                print(f"Schema update skipped for {table}.{column}: {e}")
-
-ensure_schema_updates()
+startup_timer.mark("imports")
+
+
+def print_database_info():
+    """Which database settings ended up using (credentials hidden)"""
+    url = settings.database_url
+    db_type = "PostgreSQL" if "postgresql" in url else "SQLite"
+    location = url.split("@")[1][:30] if "@" in url else url[:50]
+    print(f"🗄️  Using Database: {db_type} ({location})")
+
 
 # Sync users from config file
+def user_config_fingerprint(user_data: dict) -> str:
+    """
+    Fingerprint of a users_config entry. Keyed with the JWT secret because it
+    covers the plain-text password, so it can't be used to guess passwords.
+    """
+    entry = json.dumps([
+        user_data["username"],
+        user_data["password"],
+        user_data["role"],
+        user_data.get("full_name", ""),
+    ])
+    return hmac.new(settings.jwt_secret.encode(), entry.encode(), hashlib.sha256).hexdigest()
+
+
 def sync_users():
-    """Sync users from users_config.py to database"""
+    """Sync users from users_config.py to database, skipping entries that haven't changed"""
     db = SessionLocal()
     try:
+        usernames = [user_data["username"] for user_data in USERS]
+        existing_users = {
+            user.username: user
+            for user in db.query(User).filter(User.username.in_(usernames))
+        }
+        changed = []
         for user_data in USERS:
-            existing = db.query(User).filter(User.username == user_data["username"]).first()
+            fingerprint = user_config_fingerprint(user_data)
+            existing = existing_users.get(user_data["username"])
             if not existing:
                 # Create new user
                 user = User(
@@ -126,54 +72,63 @@ def sync_users():
                     hashed_password=get_password_hash(user_data["password"]),
                     role=user_data["role"],
                     full_name=user_data.get("full_name", ""),
-                    is_active=1
+                    is_active=1,
+                    config_fingerprint=fingerprint
                 )
                 db.add(user)
                 print(f"✓ Created user: {user_data['username']}")
-            else:
-                # Update existing user (in case password/role changed)
+            elif existing.config_fingerprint != fingerprint:
+                # Update existing user (password/role changed) - bcrypt only runs here
                 existing.hashed_password = get_password_hash(user_data["password"])
                 existing.role = user_data["role"]
                 existing.full_name = user_data.get("full_name", "")
+                existing.config_fingerprint = fingerprint
+                changed.append(user_data["username"])
+                print(f"✓ Updated user: {user_data['username']}")
         db.commit()
+        for username in changed:
+            invalidate_principal(username)
     except Exception as e:
         print(f"Error syncing users: {e}")
         db.rollback()
     finally:
         db.close()
 
-sync_users()
-
-# Initialize FastAPI app
-app = FastAPI(
-    title="Consigned By Design API",
-    description="Delivery and pickup management for Consigned By Design",
-    version="1.0.0"
-)
-
-# Configure CORS - allow ngrok for development testing
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Allow all origins for development
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include routers
-app.include_router(auth_router.router)
-app.include_router(tasks_router.router)
-app.include_router(calendar_router.router)
-app.include_router(webhooks_router.router)
-app.include_router(schedule_router.router)
-app.include_router(items_router.router)
-app.include_router(pickups_router.router)
-app.include_router(sms_router.router)
-app.include_router(uploads_router.router)
-app.include_router(directions_router.router)
-
-
-@app.get("/health")
+ROUTERS = [
+    auth_router, tasks_router, calendar_router, webhooks_router, schedule_router, items_router,
+    pickups_router, sms_router, uploads_router, directions_router, events_router, drivers_router,
+]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup work runs here rather than at import, and is timed"""
+    print_database_info()
+    with startup_timer.phase("migrations"):
+        run_migrations()
+    with startup_timer.phase("user sync"):
+        sync_users()
+    with startup_timer.phase("background services"):
+        # Listen for changes made by other workers
+        change_bus.start()
+        # Periodically remove uploaded images nothing references
+        upload_gc = asyncio.create_task(
+            run_garbage_collector(uploads_router.UPLOAD_DIR, uploads_router.DERIVATIVE_DIR, uploads_router.PARTIAL_DIR)
+        )
+        # Move long-finished tasks, pickups and conversations to the archive tables
+        archiver = asyncio.create_task(run_archiver()) if settings.archive_after_days > 0 else None
+    app.state.startup = startup_timer.report()
+
+    yield
+
+    upload_gc.cancel()
+    if archiver:
+        archiver.cancel()
+    change_bus.stop()
+    shutdown_image_pool()
+    await async_engine.dispose()
+
+
 def health_check():
     """Health check endpoint"""
     db_type = "postgresql" if "postgresql" in settings.database_url else "sqlite"
@@ -183,7 +138,6 @@ def health_check():
     }
 
 
-@app.get("/api-info")
 def api_info():
     """API info endpoint"""
     return {
@@ -193,11 +147,34 @@ def api_info():
     }
 
 
-# Serve frontend static files in production
-STATIC_DIR = os.path.join(os.path.dirname(__file__), "static")
-if os.path.exists(STATIC_DIR):
+def database_pool_stats(current_user=Depends(require_role(["admin"]))):
+    """Connections in use and time spent waiting for one, per engine"""
+    return pool_stats()
+
+
+def startup_timings(request: Request, current_user=Depends(require_role(["admin"]))):
+    """How long each phase of this process's startup took"""
+    return getattr(request.app.state, "startup", None)
+
+
+def mount_frontend(app: FastAPI):
+    """Serve frontend static files in production"""
+    static_dir = os.path.join(os.path.dirname(__file__), "static")
+    if not os.path.exists(static_dir):
+        # No static folder - show API info at root
+        @app.get("/")
+        def root():
+            """Root endpoint when no frontend"""
+            return {
+                "name": "Consigned By Design API",
+                "version": "1.0.0", 
+                "status": "operational",
+                "message": "Frontend not deployed. Visit /health for health check."
+            }
+        return
+
     # Mount assets folder
-    assets_dir = os.path.join(STATIC_DIR, "assets")
+    assets_dir = os.path.join(static_dir, "assets")
     if os.path.exists(assets_dir):
         app.mount("/assets", StaticFiles(directory=assets_dir), name="assets")
     
@@ -209,27 +186,51 @@ if os.path.exists(STATIC_DIR):
             return {"error": "Not found"}
         
         # Try to serve the exact file
-        file_path = os.path.join(STATIC_DIR, full_path)
+        file_path = os.path.join(static_dir, full_path)
         if os.path.exists(file_path) and os.path.isfile(file_path):
             return FileResponse(file_path)
         
         # Return index.html for SPA routing (React Router)
-        index_path = os.path.join(STATIC_DIR, "index.html")
+        index_path = os.path.join(static_dir, "index.html")
         if os.path.exists(index_path):
             return FileResponse(index_path)
         
         return {"error": "Frontend not found"}
-else:
-    # No static folder - show API info at root
-    @app.get("/")
-    def root():
-        """Root endpoint when no frontend"""
-        return {
-            "name": "Consigned By Design API",
-            "version": "1.0.0", 
-            "status": "operational",
-            "message": "Frontend not deployed. Visit /health for health check."
-        }
+
+
+def create_app() -> FastAPI:
+    app = FastAPI(
+        title="Consigned By Design API",
+        description="Delivery and pickup management for Consigned By Design",
+        version="1.0.0",
+        lifespan=lifespan
+    )
+
+    # Configure CORS - allow ngrok for development testing
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # Allow all origins for development
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    if settings.sql_instrumentation:
+        app.add_middleware(QueryMetricsMiddleware)
+
+    for router_module in ROUTERS:
+        app.include_router(router_module.router)
+
+    app.get("/health")(health_check)
+    app.get("/api-info")(api_info)
+    app.get("/api/database/pool-stats")(database_pool_stats)
+    app.get("/api/startup-timings")(startup_timings)
+
+    mount_frontend(app)
+    return app
+
+
+app = create_app()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,141 @@
+"""
+Migrate - Versioned schema migrations applied at startup
+
+Schema changes are alembic revisions in migrations/versions. At startup every
+worker calls run_migrations(), which compares the revision recorded in
+alembic_version with the latest revision and only runs the pending steps. An
+up-to-date database costs one version check.
+
+On PostgreSQL the check and upgrade run under an advisory lock, so when
+several workers start together one migrates and the others wait, then find
+the database current. SQLite deployments are single-process.
+
+Databases created before migrations existed have tables but no
+alembic_version. They get the old startup patches (missing tables, columns,
+enum values and indexes) once, are stamped at the baseline revision, and are
+upgraded from there.
+
+New revision after changing models.py:
+    cd backend && alembic revision --autogenerate -m "describe the change"
+"""
+
+import os
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+from database import Base, engine
+import models  # noqa: F401 - registers the tables on Base.metadata
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_REVISION = "0001"
+
+# Arbitrary key for pg_advisory_lock, so one worker migrates at a time
+MIGRATION_LOCK_KEY = 380044
+
+# Created by revisions after the baseline, so never by the legacy upgrade
+POST_BASELINE_TABLES = {
+    "delivery_tasks_archive", "pickup_requests_archive", "sms_conversations_archive",
+    "driver_eta_snapshots",
+}
+
+# Added by revisions after the baseline to tables that existed before it
+POST_BASELINE_COLUMNS = [("upload_sessions", "claimed_until")]
+
+# Patches the app used to apply on every start, for pre-migration databases
+LEGACY_ENUM_VALUES = [
+    ("pickupstatus", "pending"),
+    ("pickupstatus", "scheduled"),
+    ("pickupstatus", "completed"),
+]
+LEGACY_COLUMNS = [
+    ("delivery_tasks", "items", "JSON"),
+    ("delivery_tasks", "signature_url", "VARCHAR(255)"),
+    ("delivery_tasks", "signature_strokes", "TEXT"),
+    ("delivery_tasks", "lat", "FLOAT"),
+    ("delivery_tasks", "lng", "FLOAT"),
+    ("pickup_requests", "lat", "FLOAT"),
+    ("pickup_requests", "lng", "FLOAT"),
+    ("users", "config_fingerprint", "VARCHAR(64)"),
+]
+LEGACY_INDEXES = [
+    ("ix_delivery_tasks_scheduled_start", "delivery_tasks", "scheduled_start"),
+    ("ix_pickup_requests_scheduled_start", "pickup_requests", "scheduled_start"),
+    ("ix_delivery_tasks_lat_lng", "delivery_tasks", "lat, lng"),
+    ("ix_pickup_requests_lat_lng", "pickup_requests", "lat, lng"),
+]
+
+
+def alembic_config(connection: Connection = None) -> Config:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    config.attributes["connection"] = connection
+    return config
+
+
+def upgrade_legacy_schema(connection: Connection):
+    """Bring a database created by create_all and the old startup patches level with the baseline"""
+    # Tables added since the database was created
+    baseline_tables = [table for table in Base.metadata.sorted_tables if table.name not in POST_BASELINE_TABLES]
+    missing = {table.name for table in baseline_tables if not inspect(connection).has_table(table.name)}
+    Base.metadata.create_all(bind=connection, tables=baseline_tables, checkfirst=True)
+    # create_all uses today's models; leave later columns to their revisions
+    for table, column in POST_BASELINE_COLUMNS:
+        if table in missing:
+            connection.execute(text(f"ALTER TABLE {table} DROP COLUMN {column}"))
+
+    inspector = inspect(connection)
+    for table, column, column_type in LEGACY_COLUMNS:
+        existing = {col["name"] for col in inspector.get_columns(table)}
+        if column not in existing:
+            connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"))
+            print(f"✓ Added column: {table}.{column}")
+
+    for index_name, table, columns in LEGACY_INDEXES:
+        connection.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({columns})"))
+
+    if connection.dialect.name == "postgresql":
+        for enum_name, value in LEGACY_ENUM_VALUES:
+            connection.execute(text(f"ALTER TYPE {enum_name} ADD VALUE IF NOT EXISTS '{value}'"))
+
+    connection.commit()
+
+
+def run_migrations():
+    """Apply pending migrations (call once per worker at startup)"""
+    head = ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+    with engine.connect() as connection:
+        is_postgres = connection.dialect.name == "postgresql"
+        if is_postgres:
+            # Session-level lock: held across the commits below until unlocked
+            connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            connection.commit()
+
+        try:
+            current = MigrationContext.configure(connection).get_current_revision()
+            if current == head:
+                print(f"✓ Database schema up to date (revision {head})")
+                return
+
+            config = alembic_config(connection)
+            if current is None and inspect(connection).has_table("delivery_tasks"):
+                print("Upgrading pre-migration database to the baseline schema...")
+                upgrade_legacy_schema(connection)
+                command.stamp(config, BASELINE_REVISION)
+                connection.commit()
+                current = BASELINE_REVISION
+
+            if current != head:
+                command.upgrade(config, "head")
+                connection.commit()
+            print(f"✓ Database schema migrated to revision {head}")
+        finally:
+            if is_postgres:
+                connection.rollback()
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+                connection.commit()
@@ -0,0 +1,51 @@
+"""sqlite autoincrement
+
+Without AUTOINCREMENT, SQLite gives a new row max(id) + 1 of the live table,
+so once rows have moved to the archive tables their ids can be handed out
+again and with_archive() would see two rows with one id. The live tables are
+rebuilt with AUTOINCREMENT and their counters start past the archived ids.
+PostgreSQL sequences never reuse ids, so nothing changes there.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 11:02:15.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ARCHIVED_TABLES = ['delivery_tasks', 'pickup_requests', 'sms_conversations']
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table in ARCHIVED_TABLES:
+        with op.batch_alter_table(table, recreate='always', table_kwargs={'sqlite_autoincrement': True}):
+            pass
+        # Copying the rows set the counter to the live max id; move it past the archive too
+        op.execute(sa.text(
+            "INSERT INTO sqlite_sequence (name, seq) SELECT :table, 0 "
+            "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = :table)"
+        ).bindparams(table=table))
+        op.execute(sa.text(
+            f"UPDATE sqlite_sequence SET seq = max(seq, (SELECT coalesce(max(id), 0) FROM {table}_archive)) "
+            "WHERE name = :table"
+        ).bindparams(table=table))
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table in ARCHIVED_TABLES:
+        with op.batch_alter_table(table, recreate='always', table_kwargs={'sqlite_autoincrement': False}):
+            pass
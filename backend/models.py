@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, JSON, Float, Index
 from sqlalchemy.sql import func
 from database import Base
 import enum
@@ -48,10 +48,9 @@ class SMSRequestType(str, enum.Enum):
     pickup = "pickup"
 
 
-class DeliveryTask(Base):
-    __tablename__ = "delivery_tasks"
-    
-    id = Column(Integer, primary_key=True, index=True)
+class DeliveryTaskFields:
+    """Columns shared by delivery_tasks and delivery_tasks_archive"""
+
     source = Column(Enum(TaskSource), nullable=False)
     status = Column(Enum(TaskStatus), default=TaskStatus.pending, nullable=False)
     
@@ -81,9 +80,13 @@ class DeliveryTask(Base):
     delivery_state = Column(String, nullable=False)
     delivery_zip = Column(String, nullable=False)
     delivery_notes = Column(Text, nullable=True)
+
+    # Geocoded delivery address (filled in the background, see geocoding.py)
+    lat = Column(Float, nullable=True)
+    lng = Column(Float, nullable=True)
     
     # Scheduling
-    scheduled_start = Column(DateTime, nullable=True)
+    scheduled_start = Column(DateTime, nullable=True, index=True)
     scheduled_end = Column(DateTime, nullable=True)
     assigned_to = Column(String, nullable=True)
     
@@ -93,12 +96,32 @@ class DeliveryTask(Base):
 
     # E-signature
     signature_url = Column(String, nullable=True)   # URL to customer signature image
+    signature_strokes = Column(Text, nullable=True)  # Stroke-encoded signature (see signatures.py)
 
     # Timestamps
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
 
 
+class DeliveryTask(DeliveryTaskFields, Base):
+    __tablename__ = "delivery_tasks"
+    
+    id = Column(Integer, primary_key=True, index=True)
+
+    __table_args__ = (
+        Index("ix_delivery_tasks_lat_lng", "lat", "lng"),  # Bounding-box lookups
+        {"sqlite_autoincrement": True},  # Never reuse ids of archived rows
+    )
+
+
+class ArchivedDeliveryTask(DeliveryTaskFields, Base):
+    """Paid deliveries moved out of delivery_tasks (see archiver.py)"""
+    __tablename__ = "delivery_tasks_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)  # Same id as in delivery_tasks
+    archived_at = Column(DateTime, server_default=func.now(), nullable=False, index=True)
+
+
 class DeliveryInvite(Base):
     __tablename__ = "delivery_invites"
     
@@ -114,10 +137,9 @@ class DeliveryInvite(Base):
     last_sms_at = Column(DateTime, nullable=True)
 
 
-class PickupRequest(Base):
-    __tablename__ = "pickup_requests"
-    
-    id = Column(Integer, primary_key=True, index=True)
+class PickupRequestFields:
+    """Columns shared by pickup_requests and pickup_requests_archive"""
+
     status = Column(Enum(PickupStatus), default=PickupStatus.pending, nullable=False)
 
     # Customer information
@@ -131,6 +153,10 @@ class PickupRequest(Base):
     pickup_city = Column(String, nullable=False)
     pickup_state = Column(String, nullable=False)
     pickup_zip = Column(String, nullable=False)
+
+    # Geocoded pickup address (filled in the background, see geocoding.py)
+    lat = Column(Float, nullable=True)
+    lng = Column(Float, nullable=True)
     
     # Item information
     item_description = Column(Text, nullable=False)  # What they want picked up
@@ -143,7 +169,7 @@ class PickupRequest(Base):
     decline_reason = Column(Text, nullable=True)  # Reason if declined
     
     # Scheduling
-    scheduled_start = Column(DateTime, nullable=True)
+    scheduled_start = Column(DateTime, nullable=True, index=True)
     scheduled_end = Column(DateTime, nullable=True)
     assigned_to = Column(String, nullable=True)
     
@@ -155,6 +181,25 @@ class PickupRequest(Base):
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
 
 
+class PickupRequest(PickupRequestFields, Base):
+    __tablename__ = "pickup_requests"
+    
+    id = Column(Integer, primary_key=True, index=True)
+
+    __table_args__ = (
+        Index("ix_pickup_requests_lat_lng", "lat", "lng"),  # Bounding-box lookups
+        {"sqlite_autoincrement": True},  # Never reuse ids of archived rows
+    )
+
+
+class ArchivedPickupRequest(PickupRequestFields, Base):
+    """Completed pickups moved out of pickup_requests (see archiver.py)"""
+    __tablename__ = "pickup_requests_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)  # Same id as in pickup_requests
+    archived_at = Column(DateTime, server_default=func.now(), nullable=False, index=True)
+
+
 class User(Base):
     __tablename__ = "users"
     
@@ -165,14 +210,13 @@ class User(Base):
     full_name = Column(String, nullable=True)
     role = Column(String, default="staff", nullable=False)  # staff, scheduler, admin
     is_active = Column(Integer, default=1, nullable=False)
+    config_fingerprint = Column(String, nullable=True)  # users_config entry last synced (see main.sync_users)
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
 
 
-class SMSConversation(Base):
-    """Tracks SMS conversation state for incoming customer requests"""
-    __tablename__ = "sms_conversations"
-    
-    id = Column(Integer, primary_key=True, index=True)
+class SMSConversationFields:
+    """Columns shared by sms_conversations and sms_conversations_archive"""
+
     phone_number = Column(String, nullable=False, index=True)  # Customer's phone (From field)
     status = Column(Enum(SMSConversationStatus), default=SMSConversationStatus.started, nullable=False)
     request_type = Column(Enum(SMSRequestType), nullable=True)  # delivery or pickup
@@ -199,6 +243,97 @@ class SMSConversation(Base):
     last_message_at = Column(DateTime, nullable=True)  # Last time customer sent a message
 
 
+class SMSConversation(SMSConversationFields, Base):
+    """Tracks SMS conversation state for incoming customer requests"""
+    __tablename__ = "sms_conversations"
+    
+    id = Column(Integer, primary_key=True, index=True)
+
+    __table_args__ = {"sqlite_autoincrement": True}  # Never reuse ids of archived rows
+
+
+class ArchivedSMSConversation(SMSConversationFields, Base):
+    """Finished conversations moved out of sms_conversations (see archiver.py)"""
+    __tablename__ = "sms_conversations_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)  # Same id as in sms_conversations
+    archived_at = Column(DateTime, server_default=func.now(), nullable=False, index=True)
+
+
+class GeocodedAddress(Base):
+    """Geocoding results, one row per normalized address string"""
+    __tablename__ = "geocoded_addresses"
+
+    id = Column(Integer, primary_key=True, index=True)
+    normalized_address = Column(String, unique=True, nullable=False, index=True)
+    formatted_address = Column(String, nullable=True)  # Google's canonical form
+    lat = Column(Float, nullable=True)
+    lng = Column(Float, nullable=True)
+    status = Column(String, nullable=False)  # ok, not_found
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+
+class DriverLocation(Base):
+    """Sampled driver positions (the full trail is only kept in memory)"""
+    __tablename__ = "driver_locations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    driver = Column(String, nullable=False)  # Username of the driver
+    lat = Column(Float, nullable=False)
+    lng = Column(Float, nullable=False)
+    accuracy = Column(Float, nullable=True)  # Meters, as reported by the device
+    recorded_at = Column(DateTime, nullable=False)
 
+    __table_args__ = (
+        Index("ix_driver_locations_driver_recorded_at", "driver", "recorded_at"),
+    )
 
 
+class DriverETASnapshot(Base):
+    """Latest ETAs per driver, so every worker can read what one worker computed"""
+    __tablename__ = "driver_eta_snapshots"
+
+    driver = Column(String, primary_key=True)  # Username of the driver
+    snapshot = Column(JSON, nullable=False)  # As returned by GET /api/drivers/{driver}/etas
+    computed_at = Column(DateTime, nullable=False)
+
+
+
+class UploadedFile(Base):
+    """An uploaded image, stored once under its SHA-256 hash"""
+    __tablename__ = "uploaded_files"
+
+    id = Column(Integer, primary_key=True, index=True)
+    filename = Column(String, unique=True, nullable=False, index=True)  # {sha256}{ext}
+    sha256 = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    last_uploaded_at = Column(DateTime, nullable=False)  # Latest upload of the same content
+
+
+class FileReference(Base):
+    """Links an uploaded file to a row that uses it (maintained by file_store)"""
+    __tablename__ = "file_references"
+
+    id = Column(Integer, primary_key=True, index=True)
+    filename = Column(String, nullable=False, index=True)
+    entity = Column(String, nullable=False)  # Table name: delivery_tasks, pickup_requests, sms_conversations or their _archive tables
+    entity_id = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_file_references_entity", "entity", "entity_id"),
+    )
+
+
+class UploadSession(Base):
+    """A resumable upload in progress; the bytes so far are in uploads/partial/{id}.part"""
+    __tablename__ = "upload_sessions"
+
+    id = Column(String, primary_key=True)  # Random hex token
+    owner = Column(String, nullable=False)  # Username that started the upload
+    filename = Column(String, nullable=True)  # Client filename, informational only
+    size = Column(Integer, nullable=False)  # Total bytes expected
+    offset = Column(Integer, default=0, nullable=False)  # Bytes received so far
+    claimed_until = Column(DateTime, nullable=True)  # Set while a chunk is being written
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)  # Extended by every chunk
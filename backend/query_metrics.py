@@ -0,0 +1,139 @@
+"""
+Query Metrics - Per-request SQL counts and timings
+
+Every HTTP request gets a RequestQueries record in a context variable. Cursor
+events on all engines (sync, async and replica) add each statement's duration
+to the current request's record. Statements run outside a request, such as
+migrations or background jobs, are not counted.
+
+When the response starts, the totals are sent as a Server-Timing header,
+which browser dev tools show next to the request:
+
+    Server-Timing: db;dur=12.4;desc="9 queries", db-slowest;dur=4.1
+
+and warnings are printed when a request crosses a threshold from settings:
+too many queries, the same statement repeated (usually an N+1 loop over a
+relationship), or a single slow statement.
+
+Sync endpoints run in the threadpool, which copies the request's context, so
+their queries are counted the same way as async ones.
+"""
+
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from config import get_settings
+
+settings = get_settings()
+
+STATEMENT_PREVIEW_LENGTH = 200
+
+
+class RequestQueries:
+    """SQL statements run while handling one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        self.statements[statement] += 1
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+    def server_timing(self) -> str:
+        timing = f'db;dur={self.seconds * 1000:.1f};desc="{self.count} queries"'
+        if self.count:
+            timing += f", db-slowest;dur={self.slowest_seconds * 1000:.1f}"
+        return timing
+
+    def warnings(self) -> list:
+        found = []
+        if self.count > settings.sql_warn_query_count:
+            found.append(f"{self.count} queries ({self.seconds * 1000:.0f}ms)")
+        if self.statements:
+            statement, repeats = self.statements.most_common(1)[0]
+            if repeats > settings.sql_warn_repeated_statement:
+                found.append(f"possible N+1, {repeats}x: {_preview(statement)}")
+        if self.slowest_seconds * 1000 > settings.sql_slow_query_ms:
+            found.append(f"slow query {self.slowest_seconds * 1000:.0f}ms: {_preview(self.slowest_statement)}")
+        return found
+
+
+_current: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+
+def _preview(statement: str) -> str:
+    statement = " ".join(statement.split())
+    if len(statement) > STATEMENT_PREVIEW_LENGTH:
+        return statement[:STATEMENT_PREVIEW_LENGTH] + "..."
+    return statement
+
+
+# ============================================
+# ENGINE HOOKS
+# ============================================
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+    queries = _current.get()
+    started = conn.info.get("query_started")
+    if queries is not None and started:
+        queries.record(statement, time.perf_counter() - started.pop())
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_timer(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+# ============================================
+# MIDDLEWARE
+# ============================================
+
+class QueryMetricsMiddleware:
+    """Collects each request's queries and reports them when the response starts"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        queries = RequestQueries()
+        token = _current.set(queries)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("Server-Timing", queries.server_timing())
+                for warning in queries.warnings():
+                    print(f"[SQL] {scope['method']} {scope['path']}: {warning}")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
@@ -0,0 +1,248 @@
+"""
+Resumable Uploads - Chunked uploads that survive dropped connections
+
+Protocol (all under /api/uploads/sessions):
+
+    POST   ""                    {size, filename}  -> {id, offset: 0, chunk_size, ...}
+    GET    "/{id}"                                 -> {id, offset, ...}  (where to resume)
+    PUT    "/{id}?offset=N"      raw bytes         -> {id, offset, ...}
+    POST   "/{id}/complete"                        -> {url}
+    DELETE "/{id}"
+
+Received bytes are appended to uploads/partial/{id}.part and the offset is
+kept in upload_sessions, so a client that lost its connection asks for the
+offset and sends only the rest. Bytes that arrived before a connection dropped
+mid-chunk are kept too.
+
+A chunk claims its session with a conditional UPDATE before touching the
+partial file, so a retried PUT that overlaps one still streaming (possibly on
+another worker) gets a 409 instead of writing the same file. The claim is a
+lease of upload_chunk_timeout_seconds, so a crashed worker cannot hold it
+forever. Sessions expire upload_session_ttl_seconds after their
+last chunk and are removed by the upload garbage collector.
+
+Completed uploads go through the same checks and content-addressed storage
+as regular uploads.
+"""
+
+import hashlib
+import os
+import secrets
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Optional
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Select, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models import UploadSession
+from upload_stream import detect_image_type, store_content_addressed, SIGNATURE_LENGTH
+from config import get_settings
+
+settings = get_settings()
+
+
+class CompletedUpload:
+    """A finished resumable upload, in the shape register_uploads expects"""
+
+    def __init__(self, filename: str, sha256: str, size: int, final_path: str, created: bool):
+        self.filename = filename
+        self.sha256 = sha256
+        self.size = size
+        self.final_path = final_path
+        self.created = created
+
+
+def partial_path(partial_dir: str, session_id: str) -> str:
+    return os.path.join(partial_dir, f"{session_id}.part")
+
+
+def session_status(upload_session: UploadSession) -> dict:
+    return {
+        "id": upload_session.id,
+        "size": upload_session.size,
+        "offset": upload_session.offset,
+        "chunk_size": settings.upload_chunk_size,
+        "expires_at": upload_session.expires_at,
+    }
+
+
+def create_session(db: Session, partial_dir: str, owner: str, size: int, filename: Optional[str]) -> UploadSession:
+    upload_session = UploadSession(
+        id=secrets.token_hex(16),
+        owner=owner,
+        filename=filename,
+        size=size,
+        offset=0,
+        expires_at=datetime.utcnow() + timedelta(seconds=settings.upload_session_ttl_seconds),
+    )
+    os.makedirs(partial_dir, exist_ok=True)
+    open(partial_path(partial_dir, upload_session.id), "wb").close()
+    db.add(upload_session)
+    db.commit()
+    db.refresh(upload_session)
+    return upload_session
+
+
+def _live_session(session_id: str, owner: str) -> Select:
+    return select(UploadSession).where(
+        UploadSession.id == session_id,
+        UploadSession.owner == owner,
+        UploadSession.expires_at > datetime.utcnow(),
+    )
+
+
+def _found(upload_session: Optional[UploadSession]) -> UploadSession:
+    if not upload_session:
+        raise HTTPException(status_code=404, detail="Upload session not found or expired")
+    return upload_session
+
+
+def get_session(db: Session, session_id: str, owner: str) -> UploadSession:
+    """A live session owned by `owner`, or 404"""
+    return _found(db.scalar(_live_session(session_id, owner)))
+
+
+async def get_session_async(db: AsyncSession, session_id: str, owner: str) -> UploadSession:
+    """get_session for async endpoints"""
+    return _found(await db.scalar(_live_session(session_id, owner)))
+
+
+def delete_session(db: Session, partial_dir: str, upload_session: UploadSession):
+    path = partial_path(partial_dir, upload_session.id)
+    if os.path.exists(path):
+        os.remove(path)
+    db.delete(upload_session)
+    db.commit()
+
+
+async def _claim(db: AsyncSession, upload_session: UploadSession, offset: int) -> datetime:
+    """Claim the session for a chunk at `offset`; returns the claim's expiry, or raises 409"""
+    now = datetime.utcnow()
+    claimed_until = now + timedelta(seconds=settings.upload_chunk_timeout_seconds)
+    result = await db.execute(
+        update(UploadSession)
+        .where(
+            UploadSession.id == upload_session.id,
+            UploadSession.offset == offset,
+            or_(UploadSession.claimed_until.is_(None), UploadSession.claimed_until <= now),
+        )
+        .values(claimed_until=claimed_until)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    if result.rowcount == 1:
+        return claimed_until
+
+    await db.refresh(upload_session)
+    if upload_session.offset != offset:
+        message = "Offset does not match the bytes received"
+    else:
+        message = "Another chunk is being written to this upload"
+    raise HTTPException(status_code=409, detail={"message": message, "offset": upload_session.offset})
+
+
+async def _release(db: AsyncSession, upload_session: UploadSession, claimed_until: datetime, offset: int):
+    """Record the bytes written under a claim and give the claim up"""
+    await db.execute(
+        update(UploadSession)
+        .where(UploadSession.id == upload_session.id, UploadSession.claimed_until == claimed_until)
+        .values(
+            offset=offset,
+            claimed_until=None,
+            expires_at=datetime.utcnow() + timedelta(seconds=settings.upload_session_ttl_seconds),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    await db.refresh(upload_session)
+
+
+async def write_chunk(
+    db: AsyncSession, partial_dir: str, upload_session: UploadSession, offset: int, stream: AsyncIterator[bytes]
+) -> UploadSession:
+    """Append a chunk sent at `offset`; progress is saved even if the client disconnects"""
+    claimed_until = await _claim(db, upload_session, offset)
+
+    path = partial_path(partial_dir, upload_session.id)
+    written = 0
+    try:
+        handle = await run_in_threadpool(open, path, "r+b")
+        try:
+            # Drop anything past the confirmed offset (e.g. from an interrupted write)
+            await run_in_threadpool(handle.truncate, offset)
+            await run_in_threadpool(handle.seek, offset)
+
+            head_checked = offset >= SIGNATURE_LENGTH
+            head = b""
+            async for data in stream:
+                if not data:
+                    continue
+                if datetime.utcnow() >= claimed_until:
+                    # The claim has lapsed, so another chunk may now write the file
+                    raise HTTPException(status_code=408, detail="Chunk took too long; resume from the saved offset")
+                if offset + written + len(data) > upload_session.size:
+                    raise HTTPException(status_code=413, detail="Chunk goes past the declared upload size")
+                if not head_checked:
+                    # Reject non-images on the first bytes rather than after the whole upload
+                    head += data
+                    if len(head) >= SIGNATURE_LENGTH or offset + written + len(data) == upload_session.size:
+                        if detect_image_type(head) is None:
+                            raise HTTPException(status_code=400, detail="File is not a supported image (JPEG, PNG, GIF or WebP)")
+                        head_checked = True
+                await run_in_threadpool(handle.write, data)
+                written += len(data)
+        finally:
+            await run_in_threadpool(handle.close)
+    finally:
+        await _release(db, upload_session, claimed_until, offset + written)
+
+    return upload_session
+
+
+def _hash_file(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def complete_session(db: Session, partial_dir: str, upload_dir: str, upload_session: UploadSession) -> CompletedUpload:
+    """Verify a fully received upload and move it to content-addressed storage (run in the threadpool)"""
+    if upload_session.offset != upload_session.size:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Upload is incomplete", "offset": upload_session.offset}
+        )
+
+    path = partial_path(partial_dir, upload_session.id)
+    with open(path, "rb") as handle:
+        ext = detect_image_type(handle.read(SIGNATURE_LENGTH))
+    if ext is None:
+        delete_session(db, partial_dir, upload_session)
+        raise HTTPException(status_code=400, detail="File is not a supported image (JPEG, PNG, GIF or WebP)")
+
+    sha256 = _hash_file(path)
+    filename = f"{sha256}{ext}"
+    final_path = os.path.join(upload_dir, filename)
+    created = store_content_addressed(path, final_path)
+    size = upload_session.size
+
+    db.delete(upload_session)
+    db.commit()
+    return CompletedUpload(filename, sha256, size, final_path, created)
+
+
+def expire_sessions(db: Session, partial_dir: str) -> int:
+    """Delete sessions past their expiry and their partial files"""
+    expired = db.query(UploadSession).filter(UploadSession.expires_at <= datetime.utcnow()).all()
+    for upload_session in expired:
+        path = partial_path(partial_dir, upload_session.id)
+        if os.path.exists(path):
+            os.remove(path)
+        db.delete(upload_session)
+    db.commit()
+    return len(expired)
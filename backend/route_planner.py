@@ -0,0 +1,257 @@
+"""
+Route Planner - Orders a driver's stops for the day
+
+Given the stops (with scheduled_start/scheduled_end windows) and a travel-time
+matrix, the planner builds a route with a time-window-aware nearest-neighbour
+pass and then improves it with 2-opt (segment reversal) and or-opt (moving runs
+of 1-3 stops) until no move helps or the time budget runs out.
+
+A route's cost is its total driving time plus a penalty for every second a stop
+is reached after its window ends. Arriving before a window opens means waiting.
+
+Travel times missing from the matrix (no API key, no network) are estimated
+from straight-line (haversine) distance when both stops have coordinates, and
+fall back to a fixed leg time otherwise.
+"""
+
+import math
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+# Time spent at each stop (unloading, signature, payment)
+SERVICE_SECONDS = 15 * 60
+# Window length assumed when a stop has no scheduled_end (calendar default)
+DEFAULT_WINDOW_SECONDS = 60 * 60
+# One second late costs as much as this many seconds of driving
+LATE_PENALTY_WEIGHT = 10
+# Haversine estimate: average urban speed and road-vs-straight-line factor
+AVERAGE_SPEED_MPS = 11.0
+DETOUR_FACTOR = 1.3
+# Leg time when nothing is known about the two locations
+DEFAULT_TRAVEL_SECONDS = 20 * 60
+
+
+def haversine_meters(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two coordinates in meters"""
+    radius = 6371000
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = math.radians(lat2 - lat1)
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * radius * math.asin(math.sqrt(a))
+
+
+def estimate_travel_seconds(origin: dict, destination: dict) -> int:
+    """Estimate driving time between two stops without the network"""
+    coords = (origin.get("lat"), origin.get("lng"), destination.get("lat"), destination.get("lng"))
+    if any(value is None for value in coords):
+        return DEFAULT_TRAVEL_SECONDS
+    meters = haversine_meters(*coords) * DETOUR_FACTOR
+    return int(meters / AVERAGE_SPEED_MPS)
+
+
+def fill_missing_durations(
+    stops: List[dict], durations: List[List[Optional[int]]]
+) -> Tuple[List[List[int]], int]:
+    """Replace unknown matrix entries with estimates; returns (matrix, number estimated)"""
+    filled = []
+    estimated = 0
+    for i, row in enumerate(durations):
+        filled_row = []
+        for j, value in enumerate(row):
+            if value is None:
+                value = 0 if i == j else estimate_travel_seconds(stops[i], stops[j])
+                estimated += 1 if i != j else 0
+            filled_row.append(value)
+        filled.append(filled_row)
+    return filled, estimated
+
+
+class RoutePlanner:
+    """Plans one driver's route over a subset of matrix nodes"""
+
+    def __init__(
+        self,
+        travel: List[List[int]],
+        windows: Dict[int, Tuple[float, float]],
+        depot: Optional[int] = None,
+        time_budget_seconds: float = 0.5,
+    ):
+        self.travel = travel
+        self.windows = windows
+        self.depot = depot
+        self.time_budget_seconds = time_budget_seconds
+        self.start_time = self._start_time()
+
+    def _start_time(self) -> float:
+        """Leave early enough to reach the earliest window exactly when it opens"""
+        if self.depot is None:
+            return min(start for start, _ in self.windows.values())
+        return min(start - self.travel[self.depot][node] for node, (start, _) in self.windows.items())
+
+    def simulate(self, order: List[int]) -> List[Tuple[float, float, float]]:
+        """(arrival, departure, late_seconds) for each stop in order"""
+        timeline = []
+        t = self.start_time
+        previous = self.depot
+        for node in order:
+            if previous is not None:
+                t += self.travel[previous][node]
+            arrival = t
+            window_start, window_end = self.windows[node]
+            t = max(t, window_start)
+            late = max(0.0, t - window_end)
+            t += SERVICE_SECONDS
+            timeline.append((arrival, t, late))
+            previous = node
+        return timeline
+
+    def cost(self, order: List[int]) -> float:
+        t = self.start_time
+        previous = self.depot
+        driving = 0.0
+        late = 0.0
+        for node in order:
+            if previous is not None:
+                leg = self.travel[previous][node]
+                driving += leg
+                t += leg
+            window_start, window_end = self.windows[node]
+            if t < window_start:
+                t = window_start
+            elif t > window_end:
+                late += t - window_end
+            t += SERVICE_SECONDS
+            previous = node
+        return driving + LATE_PENALTY_WEIGHT * late
+
+    def driving_seconds(self, order: List[int]) -> int:
+        legs = ([self.depot] if self.depot is not None else []) + order
+        return sum(self.travel[a][b] for a, b in zip(legs, legs[1:]))
+
+    def nearest_neighbour(self) -> List[int]:
+        """Greedy construction: always go to the stop that can be served soonest"""
+        remaining = set(self.windows)
+        order = []
+        t = self.start_time
+        current = self.depot
+        while remaining:
+            best_node, best_score, best_finish = None, None, None
+            for node in remaining:
+                window_start, window_end = self.windows[node]
+                arrival = t + (self.travel[current][node] if current is not None else 0)
+                service_start = max(arrival, window_start)
+                score = service_start + LATE_PENALTY_WEIGHT * max(0.0, service_start - window_end)
+                if best_score is None or (score, node) < (best_score, best_node):
+                    best_node, best_score, best_finish = node, score, service_start + SERVICE_SECONDS
+            order.append(best_node)
+            remaining.discard(best_node)
+            t = best_finish
+            current = best_node
+        return order
+
+    def improve(self, order: List[int], deadline: float) -> List[int]:
+        """Apply first-improvement 2-opt and or-opt moves until none helps"""
+        best_cost = self.cost(order)
+        n = len(order)
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+
+            # 2-opt: reverse order[i..j]
+            for i in range(n - 1):
+                for j in range(i + 1, n):
+                    candidate = order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+                    candidate_cost = self.cost(candidate)
+                    if candidate_cost < best_cost - 1e-6:
+                        order, best_cost, improved = candidate, candidate_cost, True
+                if time.perf_counter() >= deadline:
+                    return order
+
+            # or-opt: move a run of 1-3 stops elsewhere
+            for length in (1, 2, 3):
+                for i in range(n - length + 1):
+                    segment = order[i:i + length]
+                    rest = order[:i] + order[i + length:]
+                    for k in range(len(rest) + 1):
+                        if k == i:
+                            continue
+                        candidate = rest[:k] + segment + rest[k:]
+                        candidate_cost = self.cost(candidate)
+                        if candidate_cost < best_cost - 1e-6:
+                            order, best_cost, improved = candidate, candidate_cost, True
+                            break
+                    if time.perf_counter() >= deadline:
+                        return order
+        return order
+
+    def plan(self) -> List[int]:
+        deadline = time.perf_counter() + self.time_budget_seconds
+        return self.improve(self.nearest_neighbour(), deadline)
+
+
+def plan_routes(
+    stops: List[dict],
+    durations: List[List[Optional[int]]],
+    depot: Optional[int] = None,
+    time_budget_seconds: float = 0.5,
+) -> dict:
+    """
+    Plan one route per driver (stops grouped by assigned_to).
+
+    `stops` are matrix nodes with scheduled_start/scheduled_end datetimes; `depot`
+    is the index of a non-stop start location (e.g. the driver's position).
+    """
+    travel, estimated = fill_missing_durations(stops, durations)
+
+    stop_indices = [index for index in range(len(stops)) if index != depot]
+    if not stop_indices:
+        return {"routes": [], "estimated_legs": estimated}
+
+    day_start = min(stops[index]["scheduled_start"] for index in stop_indices).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+
+    def seconds(value: datetime) -> float:
+        return (value - day_start).total_seconds()
+
+    drivers: Dict[Optional[str], List[int]] = {}
+    for index in stop_indices:
+        drivers.setdefault(stops[index].get("assigned_to"), []).append(index)
+
+    # Share the time budget between drivers
+    budget = time_budget_seconds / len(drivers)
+
+    routes = []
+    for assigned_to, indices in drivers.items():
+        windows = {}
+        for index in indices:
+            window_start = seconds(stops[index]["scheduled_start"])
+            window_end = (
+                seconds(stops[index]["scheduled_end"]) if stops[index].get("scheduled_end")
+                else window_start + DEFAULT_WINDOW_SECONDS
+            )
+            windows[index] = (window_start, max(window_start, window_end))
+
+        planner = RoutePlanner(travel, windows, depot=depot, time_budget_seconds=budget)
+        order = planner.plan()
+
+        planned_stops = []
+        for index, (arrival, departure, late) in zip(order, planner.simulate(order)):
+            planned_stops.append({
+                **stops[index],
+                "index": index,
+                "arrival": day_start + timedelta(seconds=arrival),
+                "departure": day_start + timedelta(seconds=departure),
+                "late_seconds": int(late),
+            })
+
+        routes.append({
+            "assigned_to": assigned_to,
+            "stops": planned_stops,
+            "total_travel_seconds": planner.driving_seconds(order),
+            "late_stops": sum(1 for stop in planned_stops if stop["late_seconds"] > 0),
+        })
+
+    return {"routes": routes, "estimated_legs": estimated}
@@ -1,5 +1,5 @@
 # Routers package
-from . import auth_router, tasks_router, calendar_router, webhooks_router, schedule_router, items_router, pickups_router, sms_router, uploads_router
+from . import auth_router, tasks_router, calendar_router, webhooks_router, schedule_router, items_router, pickups_router, sms_router, uploads_router, directions_router, events_router, drivers_router
 
 
 
@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from database import get_db
 from models import User
 from schemas import UserLogin, Token, UserResponse, UserCreate
-from auth import authenticate_user, create_access_token, get_current_user, get_password_hash
+from auth import authenticate_user, create_access_token, get_current_user, get_password_hash, invalidate_principal
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
@@ -56,6 +56,7 @@ def register_user(user_create: UserCreate, db: Session = Depends(get_db)):
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    invalidate_principal(db_user.username)
     
     return db_user
 
@@ -1,11 +1,14 @@
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
+from sqlalchemy import select, union_all, literal, null, cast, func, String
 from typing import List
 from datetime import datetime
-from database import get_db
+from database import get_db, get_read_db
 from models import User, DeliveryTask, TaskStatus, PickupRequest, PickupStatus
 from schemas import CalendarEvent
 from auth import get_current_user
+from calendar_cache import calendar_cache, normalize_datetime
+from archiver import with_archive
 
 router = APIRouter(prefix="/api/calendar", tags=["calendar"])
 
@@ -32,96 +35,194 @@ def get_pickup_event_color(status: PickupStatus) -> tuple:
     return colors.get(status, ("#f87171", "#ef4444"))  # Red default
 
 
+def calendar_feed_query(start: datetime, end: datetime, include_archived: bool = False):
+    """
+    Build a single UNION ALL query over deliveries and pickups that selects
+    only the columns the calendar renders, ordered by start time.
+    """
+    Task = with_archive(DeliveryTask) if include_archived else DeliveryTask
+    Pickup = with_archive(PickupRequest) if include_archived else PickupRequest
+
+    deliveries = select(
+        literal("delivery").label("type"),
+        Task.id.label("id"),
+        cast(Task.status, String).label("status"),
+        Task.customer_name.label("customer_name"),
+        Task.customer_phone.label("customer_phone"),
+        Task.item_title.label("item_title"),
+        Task.sku.label("sku"),
+        null().label("item_description"),
+        null().label("item_count"),
+        Task.delivery_address_line1.label("address_line1"),
+        Task.delivery_city.label("city"),
+        Task.delivery_state.label("state"),
+        Task.delivery_notes.label("notes"),
+        Task.image_url.label("image_url"),
+        Task.scheduled_start.label("scheduled_start"),
+        Task.scheduled_end.label("scheduled_end"),
+    ).where(
+        Task.scheduled_start >= start,
+        Task.scheduled_start <= end
+    )
+
+    pickups = select(
+        literal("pickup").label("type"),
+        Pickup.id.label("id"),
+        cast(Pickup.status, String).label("status"),
+        Pickup.customer_name.label("customer_name"),
+        Pickup.customer_phone.label("customer_phone"),
+        null().label("item_title"),
+        null().label("sku"),
+        # Only the first 50 characters are ever displayed
+        func.substr(Pickup.item_description, 1, 51).label("item_description"),
+        Pickup.item_count.label("item_count"),
+        Pickup.pickup_address_line1.label("address_line1"),
+        Pickup.pickup_city.label("city"),
+        Pickup.pickup_state.label("state"),
+        Pickup.pickup_notes.label("notes"),
+        null().label("image_url"),
+        Pickup.scheduled_start.label("scheduled_start"),
+        Pickup.scheduled_end.label("scheduled_end"),
+    ).where(
+        Pickup.scheduled_start >= start,
+        Pickup.scheduled_start <= end
+    )
+
+    feed = union_all(deliveries, pickups).subquery()
+    return select(feed).order_by(feed.c.scheduled_start)
+
+
+def build_calendar_event(row) -> dict:
+    """Convert a calendar feed row into a FullCalendar event dict"""
+    address = f"{row.address_line1}, {row.city}, {row.state}"
+
+    if row.type == "delivery":
+        bg_color, border_color = get_event_color(TaskStatus(row.status))
+        extended_props = {
+            "type": "delivery",
+            "task_id": row.id,
+            "status": row.status,
+            "customer_name": row.customer_name,
+            "customer_phone": row.customer_phone,
+            "item_title": row.item_title,
+            "sku": row.sku,
+            "address": address,
+            "notes": row.notes or "",
+            "image_url": row.image_url if row.image_url else None
+        }
+    else:
+        bg_color, border_color = get_pickup_event_color(PickupStatus(row.status))
+        item_description = row.item_description or ""
+        extended_props = {
+            "type": "pickup",
+            "pickup_id": row.id,
+            "status": row.status,
+            "customer_name": row.customer_name,
+            "customer_phone": row.customer_phone,
+            "item_description": item_description[:50] + "..." if len(item_description) > 50 else item_description,
+            "item_count": row.item_count,
+            "address": address,
+            "notes": row.notes or "",
+        }
+
+    return {
+        "id": f"{row.type}-{row.id}",
+        "title": row.customer_name,  # Just customer name for cleaner display
+        "start": row.scheduled_start.isoformat(),
+        "end": (row.scheduled_end or row.scheduled_start).isoformat(),
+        "backgroundColor": bg_color,
+        "borderColor": border_color,
+        "extendedProps": extended_props
+    }
+
+
 @router.get("", response_model=List[dict])
 def get_calendar_events(
     start: datetime = Query(..., description="Start date for calendar range"),
     end: datetime = Query(..., description="End date for calendar range"),
+    include_archived: bool = Query(False, description="Include archived deliveries and pickups"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get calendar events in FullCalendar format (deliveries and pickups)"""
-    events = []
-    
-    # Query delivery tasks within date range
-    delivery_tasks = db.query(DeliveryTask).filter(
-        (DeliveryTask.scheduled_start >= start) &
-        (DeliveryTask.scheduled_start <= end)
-    ).all()
-    
-    # Convert deliveries to FullCalendar format
-    for task in delivery_tasks:
-        if not task.scheduled_start:
-            continue
-        
-        bg_color, border_color = get_event_color(task.status)
-        
-        # Format title - just customer name for cleaner display
-        title = task.customer_name
-        
-        # Build extended props
-        extended_props = {
-            "type": "delivery",
-            "task_id": task.id,
-            "status": task.status.value,
-            "customer_name": task.customer_name,
-            "customer_phone": task.customer_phone,
-            "item_title": task.item_title,
-            "sku": task.sku,
-            "address": f"{task.delivery_address_line1}, {task.delivery_city}, {task.delivery_state}",
-            "notes": task.delivery_notes or "",
-            "image_url": task.image_url if task.image_url else None
-        }
-        
-        events.append({
-            "id": f"delivery-{task.id}",
-            "title": title,
-            "start": task.scheduled_start.isoformat(),
-            "end": (task.scheduled_end or task.scheduled_start).isoformat(),
-            "backgroundColor": bg_color,
-            "borderColor": border_color,
-            "extendedProps": extended_props
-        })
-    
-    # Query pickup requests within date range
-    pickup_requests = db.query(PickupRequest).filter(
-        (PickupRequest.scheduled_start >= start) &
-        (PickupRequest.scheduled_start <= end)
-    ).all()
-    
-    # Convert pickups to FullCalendar format
-    for pickup in pickup_requests:
-        if not pickup.scheduled_start:
-            continue
-        
-        bg_color, border_color = get_pickup_event_color(pickup.status)
-        
-        # Format title - just customer name for cleaner display
-        title = pickup.customer_name
-        
-        # Build extended props
-        extended_props = {
-            "type": "pickup",
-            "pickup_id": pickup.id,
-            "status": pickup.status.value,
-            "customer_name": pickup.customer_name,
-            "customer_phone": pickup.customer_phone,
-            "item_description": pickup.item_description[:50] + "..." if len(pickup.item_description) > 50 else pickup.item_description,
-            "item_count": pickup.item_count,
-            "address": f"{pickup.pickup_address_line1}, {pickup.pickup_city}, {pickup.pickup_state}",
-            "notes": pickup.pickup_notes or "",
-        }
-        
-        events.append({
-            "id": f"pickup-{pickup.id}",
-            "title": title,
-            "start": pickup.scheduled_start.isoformat(),
-            "end": (pickup.scheduled_end or pickup.scheduled_start).isoformat(),
-            "backgroundColor": bg_color,
-            "borderColor": border_color,
-            "extendedProps": extended_props
+    if include_archived:
+        # History lookups are rare and not cached
+        feed = calendar_feed_query(normalize_datetime(start), normalize_datetime(end), include_archived=True)
+        return [build_calendar_event(row) for row in db.execute(feed).all()]
+
+    # Segments are refilled right after a change invalidates them, so they are
+    # read from the primary; a lagging replica would cache the old events
+    def load_events(range_start: datetime, range_end: datetime):
+        rows = db.execute(calendar_feed_query(range_start, range_end)).all()
+        return [(row.scheduled_start, build_calendar_event(row)) for row in rows]
+
+    return calendar_cache.get_range(start, end, load_events)
+
+
+def calendar_summary_query(start: datetime, end: datetime, include_archived: bool = False):
+    """
+    Build a single UNION ALL query that counts deliveries and pickups per
+    day and status, so month views don't need the full event payload.
+    """
+    Task = with_archive(DeliveryTask) if include_archived else DeliveryTask
+    Pickup = with_archive(PickupRequest) if include_archived else PickupRequest
+
+    delivery_day = func.date(Task.scheduled_start)
+    deliveries = select(
+        literal("delivery").label("type"),
+        delivery_day.label("day"),
+        cast(Task.status, String).label("status"),
+        func.count().label("count"),
+    ).where(
+        Task.scheduled_start >= start,
+        Task.scheduled_start <= end
+    ).group_by(delivery_day, Task.status)
+
+    pickup_day = func.date(Pickup.scheduled_start)
+    pickups = select(
+        literal("pickup").label("type"),
+        pickup_day.label("day"),
+        cast(Pickup.status, String).label("status"),
+        func.count().label("count"),
+    ).where(
+        Pickup.scheduled_start >= start,
+        Pickup.scheduled_start <= end
+    ).group_by(pickup_day, Pickup.status)
+
+    summary = union_all(deliveries, pickups).subquery()
+    return select(summary).order_by(summary.c.day)
+
+
+@router.get("/summary", response_model=List[dict])
+def get_calendar_summary(
+    start: datetime = Query(..., description="Start date for calendar range"),
+    end: datetime = Query(..., description="End date for calendar range"),
+    include_archived: bool = Query(False, description="Include archived deliveries and pickups"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get per-day event counts by status (deliveries and pickups).
+    Use GET /api/calendar with a single day's range to load that day's events.
+    """
+    summary = calendar_summary_query(normalize_datetime(start), normalize_datetime(end), include_archived)
+    rows = db.execute(summary).all()
+
+    days = {}
+    for row in rows:
+        # SQLite returns date() as a string, PostgreSQL as a date
+        day = row.day if isinstance(row.day, str) else row.day.isoformat()
+        summary = days.setdefault(day, {
+            "date": day,
+            "total": 0,
+            "deliveries": {},
+            "pickups": {},
         })
-    
-    return events
+        bucket = summary["deliveries"] if row.type == "delivery" else summary["pickups"]
+        bucket[row.status] = row.count
+        summary["total"] += row.count
+
+    return list(days.values())
 
 
 @router.get("/unscheduled", response_model=List[dict])
@@ -1,7 +1,19 @@
 import os
+import asyncio
 import httpx
-from fastapi import APIRouter, HTTPException, Query
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_async_db
+from models import User
+from auth import get_current_user, require_role
+from eta_cache import eta_cache
+from routing import load_day_stops_async, build_distance_matrix, matrix_cache, stop_location
+from route_planner import plan_routes
 
 router = APIRouter(prefix="/api/directions", tags=["directions"])
 
@@ -14,6 +26,59 @@ class ETAResponse(BaseModel):
     status: str
 
 
+class MatrixRequest(BaseModel):
+    day: date
+    assigned_to: Optional[str] = None   # Only this driver's stops
+    origin_lat: Optional[float] = None  # Optional start point (driver location)
+    origin_lng: Optional[float] = None
+
+
+class MatrixStop(BaseModel):
+    index: int
+    type: str                           # origin, delivery or pickup
+    id: Optional[int] = None
+    customer_name: Optional[str] = None
+    address: str
+    lat: Optional[float] = None
+    lng: Optional[float] = None
+    scheduled_start: Optional[datetime] = None
+    scheduled_end: Optional[datetime] = None
+
+
+class MatrixResponse(BaseModel):
+    day: date
+    stops: List[MatrixStop]
+    durations: List[List[Optional[int]]]    # Seconds, durations[from][to]
+    distances: List[List[Optional[int]]]    # Meters, distances[from][to]
+    status: str                             # ok, partial or fallback
+    upstream_calls: int
+    cached_pairs: int
+
+
+class PlannedStop(MatrixStop):
+    arrival: datetime
+    departure: datetime
+    late_seconds: int
+
+
+class DriverRoute(BaseModel):
+    assigned_to: Optional[str] = None
+    stops: List[PlannedStop]
+    total_travel_seconds: int
+    late_stops: int
+
+
+class RoutePlanResponse(BaseModel):
+    day: date
+    routes: List[DriverRoute]
+    status: str             # Matrix status: ok, partial or fallback
+    estimated_legs: int     # Legs estimated from straight-line distance
+
+
+# Upstream lookups in progress, so concurrent identical requests share one call
+_inflight: Dict[Tuple[str, str], "asyncio.Future[ETAResponse]"] = {}
+
+
 @router.get("/eta", response_model=ETAResponse)
 async def get_eta(
     origin_lat: float = Query(..., description="Origin latitude"),
@@ -23,6 +88,7 @@ async def get_eta(
     """
     Get ETA from origin coordinates to destination address using Google Maps Distance Matrix API.
     This endpoint proxies the request to avoid CORS issues in the browser.
+    Results are cached per ~150m origin cell and destination (see eta_cache).
     """
     if not GOOGLE_MAPS_API_KEY:
         # Return fallback if no API key configured
@@ -32,6 +98,110 @@ async def get_eta(
             status="fallback"
         )
 
+    key = eta_cache.key(origin_lat, origin_lng, destination)
+    cached = eta_cache.get(key)
+    if cached is not None:
+        return cached
+
+    pending = _inflight.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    pending = asyncio.ensure_future(fetch_eta(origin_lat, origin_lng, destination))
+    _inflight[key] = pending
+    try:
+        result = await asyncio.shield(pending)
+    finally:
+        _inflight.pop(key, None)
+
+    # Only cache real answers - fallbacks should be retried next time
+    if result.status == "ok":
+        eta_cache.set(key, result)
+    return result
+
+
+async def day_stops_with_origin(db: AsyncSession, matrix_request: MatrixRequest) -> List[dict]:
+    """Load a day's stops, prefixed with the origin when one was given"""
+    if (matrix_request.origin_lat is None) != (matrix_request.origin_lng is None):
+        raise HTTPException(status_code=400, detail="origin_lat and origin_lng must be given together")
+
+    stops = await load_day_stops_async(db, matrix_request.day, matrix_request.assigned_to)
+    if matrix_request.origin_lat is not None:
+        stops.insert(0, {
+            "type": "origin",
+            "id": None,
+            "customer_name": None,
+            "address": f"{matrix_request.origin_lat},{matrix_request.origin_lng}",
+            "scheduled_start": None,
+            "scheduled_end": None,
+            "lat": matrix_request.origin_lat,
+            "lng": matrix_request.origin_lng,
+        })
+    return stops
+
+
+@router.post("/matrix", response_model=MatrixResponse)
+async def get_distance_matrix(
+    matrix_request: MatrixRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get the travel time/distance matrix between the open stops scheduled on a day.
+    Cached pairs are reused; missing pairs are fetched in batched upstream calls.
+    """
+    stops = await day_stops_with_origin(db, matrix_request)
+    matrix = await build_distance_matrix([stop_location(stop) for stop in stops])
+
+    return MatrixResponse(
+        day=matrix_request.day,
+        stops=[MatrixStop(index=index, **stop) for index, stop in enumerate(stops)],
+        **matrix
+    )
+
+
+@router.post("/optimize", response_model=RoutePlanResponse)
+async def optimize_routes(
+    matrix_request: MatrixRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get an optimized visit order per driver for a day's open deliveries and pickups.
+    Falls back to straight-line estimates when travel times are unavailable.
+    """
+    stops = await day_stops_with_origin(db, matrix_request)
+    if not stops:
+        return RoutePlanResponse(day=matrix_request.day, routes=[], status="ok", estimated_legs=0)
+
+    matrix = await build_distance_matrix([stop_location(stop) for stop in stops])
+    depot = 0 if stops[0]["type"] == "origin" else None
+
+    # Planning is CPU-bound - keep it off the event loop
+    plan = await run_in_threadpool(plan_routes, stops, matrix["durations"], depot)
+
+    return RoutePlanResponse(
+        day=matrix_request.day,
+        routes=plan["routes"],
+        status=matrix["status"],
+        estimated_legs=plan["estimated_legs"]
+    )
+
+
+@router.get("/cache-stats")
+def get_eta_cache_stats(
+    current_user: User = Depends(require_role(["admin"]))
+):
+    """ETA and distance matrix cache sizes and hit ratios"""
+    return {
+        "eta": eta_cache.stats(),
+        "matrix": matrix_cache.stats(),
+    }
+
+
+async def fetch_eta(origin_lat: float, origin_lng: float, destination: str) -> ETAResponse:
+    """Call the Google Distance Matrix API for a single origin/destination pair"""
+    eta_cache.record_upstream_call()
     try:
         url = "https://maps.googleapis.com/maps/api/distancematrix/json"
         params = {
@@ -0,0 +1,124 @@
+"""
+Drivers Router - Driver location pings, trails and ETAs to upcoming stops
+
+Drivers post their position to /location as often as they like; everything
+else reads in-memory state and never calls Google (see driver_tracking).
+"""
+
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+
+from models import User
+from auth import get_current_user
+from driver_tracking import tracker, save_driver_location, refresh_etas
+
+router = APIRouter(prefix="/api/drivers", tags=["drivers"])
+
+
+class LocationPing(BaseModel):
+    lat: float = Field(..., ge=-90, le=90)
+    lng: float = Field(..., ge=-180, le=180)
+    accuracy: Optional[float] = None        # Meters
+    heading: Optional[float] = None         # Degrees from north
+    speed: Optional[float] = None           # Meters per second
+    recorded_at: Optional[datetime] = None  # Device time; defaults to now
+
+
+class DriverPosition(BaseModel):
+    driver: str
+    lat: float
+    lng: float
+    accuracy: Optional[float] = None
+    heading: Optional[float] = None
+    speed: Optional[float] = None
+    recorded_at: datetime
+
+
+class StopETA(BaseModel):
+    type: str                               # delivery or pickup
+    id: int
+    customer_name: Optional[str] = None
+    address: str
+    scheduled_start: datetime
+    scheduled_end: Optional[datetime] = None
+    eta: datetime
+    travel_seconds: int                     # Direct drive time from the driver
+    distance_meters: Optional[int] = None
+    source: str                             # traffic or estimate
+    late: bool
+
+
+class DriverETAs(BaseModel):
+    driver: str
+    lat: float
+    lng: float
+    computed_at: datetime
+    stops: List[StopETA]
+
+
+class SingleStopETA(StopETA):
+    driver: str
+    computed_at: datetime
+
+
+@router.post("/location")
+async def post_location(
+    ping: LocationPing,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user)
+):
+    """Record the current user's position; ETAs are refreshed after the response"""
+    data = ping.model_dump()
+    if data["recorded_at"] is None:
+        data["recorded_at"] = datetime.now()
+    elif data["recorded_at"].tzinfo is not None:
+        data["recorded_at"] = data["recorded_at"].replace(tzinfo=None)
+
+    persist, refresh = tracker.record(current_user.username, data)
+    if persist:
+        background_tasks.add_task(save_driver_location, current_user.username, data)
+    if refresh:
+        background_tasks.add_task(refresh_etas, current_user.username, ping.lat, ping.lng)
+
+    return {"recorded": True, "persisted": persist, "eta_refresh": refresh}
+
+
+@router.get("/locations", response_model=List[DriverPosition])
+def get_locations(current_user: User = Depends(get_current_user)):
+    """Latest known position of every driver"""
+    return tracker.positions()
+
+
+@router.get("/etas/{stop_type}/{stop_id}", response_model=SingleStopETA)
+def get_stop_eta(
+    stop_type: str,
+    stop_id: int,
+    current_user: User = Depends(get_current_user)
+):
+    """ETA for one delivery or pickup, from its driver's latest snapshot"""
+    eta = tracker.stop_eta(stop_type, stop_id)
+    if not eta:
+        raise HTTPException(status_code=404, detail="No ETA for this stop")
+    return eta
+
+
+@router.get("/{username}/trail", response_model=List[DriverPosition])
+def get_trail(
+    username: str,
+    limit: Optional[int] = Query(None, ge=1),
+    current_user: User = Depends(get_current_user)
+):
+    """Recent pings for a driver, oldest first"""
+    return [{"driver": username, **ping} for ping in tracker.trail(username, limit)]
+
+
+@router.get("/{username}/etas", response_model=DriverETAs)
+def get_etas(username: str, current_user: User = Depends(get_current_user)):
+    """ETAs to a driver's next stops"""
+    etas = tracker.etas(username)
+    if not etas:
+        raise HTTPException(status_code=404, detail="No ETAs for this driver yet")
+    return etas
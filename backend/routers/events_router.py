@@ -0,0 +1,83 @@
+"""
+Events Router - Server-sent events stream of data changes
+
+Clients open one long-lived connection instead of polling:
+
+    const source = new EventSource(`/api/events/stream?token=${token}`);
+    source.addEventListener('change', (e) => { ...JSON.parse(e.data)... });
+    source.addEventListener('resync', () => { ...refetch everything... });
+"""
+
+import asyncio
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from models import User, SMSConversation
+from auth import get_current_user_from_query
+from change_feed import broadcaster
+from config import get_settings
+
+router = APIRouter(prefix="/api/events", tags=["events"])
+settings = get_settings()
+
+# SMS conversations are admin-only everywhere else in the API
+ADMIN_ONLY_ENTITIES = {SMSConversation.__tablename__}
+
+
+def format_sse(change: dict) -> str:
+    """Format a change as a server-sent event frame"""
+    event_name = "resync" if change["action"] == "resync" else "change"
+    lines = [f"event: {event_name}"]
+    if change.get("version") is not None:
+        lines.append(f"id: {change['version']}")
+    lines.append(f"data: {json.dumps(change)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def change_stream(request: Request, include_admin: bool):
+    """Yield SSE frames for a single subscriber until it disconnects"""
+    # Subscribed here rather than in the route: a client that disconnects before
+    # the body starts never runs this, so it never leaves a queue behind
+    queue = broadcaster.subscribe()
+    if queue is None:
+        return  # Filled up since the route checked; EventSource retries
+    try:
+        # Tell EventSource how long to wait before reconnecting
+        yield "retry: 5000\n\n"
+        while True:
+            if await request.is_disconnected():
+                break
+            try:
+                change = await asyncio.wait_for(
+                    queue.get(), timeout=settings.change_feed_heartbeat_seconds
+                )
+            except asyncio.TimeoutError:
+                # Comment frame keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            if change["entity"] in ADMIN_ONLY_ENTITIES and not include_admin:
+                continue
+            yield format_sse(change)
+    finally:
+        broadcaster.unsubscribe(queue)
+
+
+@router.get("/stream")
+async def stream_changes(
+    request: Request,
+    current_user: User = Depends(get_current_user_from_query)
+):
+    """Stream create/update/delete events for tasks, pickups and SMS conversations"""
+    if broadcaster.subscriber_count >= broadcaster.max_subscribers:
+        raise HTTPException(status_code=503, detail="Too many open event streams")
+
+    return StreamingResponse(
+        change_stream(request, include_admin=current_user.role == "admin"),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Disable proxy buffering (nginx/Railway)
+        },
+    )
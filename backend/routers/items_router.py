@@ -1,7 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
 from typing import Optional
-from database import get_db
 from models import User
 from auth import get_current_user
 import httpx
@@ -438,7 +436,6 @@ async def search_items(
 @router.get("/lookup")
 async def lookup_item(
     sku: str = Query(..., description="SKU or Item ID to lookup"),
-    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
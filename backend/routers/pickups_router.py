@@ -4,10 +4,13 @@ from sqlalchemy import case, func
 from typing import List, Optional
 from datetime import datetime, date, timezone
 
-from database import get_db
+from database import get_db, get_read_db
 from models import PickupRequest, PickupStatus, User
 from schemas import PickupRequestCreate, PickupRequestUpdate, PickupRequestResponse
 from auth import get_current_user, require_role
+from calendar_cache import invalidate_calendar_days
+from geocoding import geocode_pickup_in_background, PICKUP_ADDRESS_FIELDS
+from archiver import with_archive, archived_counts
 
 router = APIRouter(prefix="/api/pickups", tags=["pickups"])
 
@@ -17,29 +20,31 @@ def get_pickups(
     status: Optional[PickupStatus] = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    include_archived: bool = Query(False, description="Include archived rows"),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all pickup requests, optionally filtered by status"""
-    query = db.query(PickupRequest)
+    Pickup = with_archive(PickupRequest) if include_archived else PickupRequest
+    query = db.query(Pickup)
     
     if status:
-        query = query.filter(PickupRequest.status == status)
+        query = query.filter(Pickup.status == status)
     
     # Special sorting for completed items: most recently completed first
     if status == PickupStatus.completed:
-        query = query.order_by(PickupRequest.completed_at.desc().nullslast())
+        query = query.order_by(Pickup.completed_at.desc().nullslast())
     else:
         # Order by: today's scheduled first, then future dates, then past, then unscheduled
         today = date.today()
         query = query.order_by(
             case(
-                (func.date(PickupRequest.scheduled_start) == today, 0),  # Today first
-                (PickupRequest.scheduled_start > datetime.now(), 1),      # Future second
-                (PickupRequest.scheduled_start.is_(None), 3),             # Unscheduled last
-                else_=2                                                    # Past third
+                (func.date(Pickup.scheduled_start) == today, 0),  # Today first
+                (Pickup.scheduled_start > datetime.now(), 1),     # Future second
+                (Pickup.scheduled_start.is_(None), 3),            # Unscheduled last
+                else_=2                                           # Past third
             ),
-            PickupRequest.scheduled_start.asc().nullslast()  # Sort by date ascending, nulls last
+            Pickup.scheduled_start.asc().nullslast()  # Sort by date ascending, nulls last
         )
     
     return query.offset(skip).limit(limit).all()
@@ -47,7 +52,7 @@ def get_pickups(
 
 @router.get("/stats")
 def get_pickup_stats(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get pickup statistics by status"""
@@ -68,6 +73,9 @@ def get_pickup_stats(
         PickupRequest.scheduled_start.is_(None)
     ).count()
 
+    # Archived pickups are all completed
+    completed_count += sum(archived_counts(db, PickupRequest).values())
+
     return {
         "pending": pending_count,
         "scheduled": scheduled_count,
@@ -78,11 +86,13 @@ def get_pickup_stats(
 @router.get("/{pickup_id}", response_model=PickupRequestResponse)
 def get_pickup(
     pickup_id: int,
+    include_archived: bool = Query(False, description="Include archived rows"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific pickup request by ID"""
-    pickup = db.query(PickupRequest).filter(PickupRequest.id == pickup_id).first()
+    Pickup = with_archive(PickupRequest) if include_archived else PickupRequest
+    pickup = db.query(Pickup).filter(Pickup.id == pickup_id).first()
     if not pickup:
         raise HTTPException(status_code=404, detail="Pickup request not found")
     return pickup
@@ -99,6 +109,8 @@ def create_pickup(
     db.add(pickup)
     db.commit()
     db.refresh(pickup)
+    invalidate_calendar_days(pickup.scheduled_start)
+    geocode_pickup_in_background(pickup.id)
     return pickup
 
 
@@ -114,13 +126,19 @@ def update_pickup(
     if not pickup:
         raise HTTPException(status_code=404, detail="Pickup request not found")
     
-    # Store old status to detect changes
+    # Store old status and schedule to detect changes
     old_status = pickup.status
+    previous_start = pickup.scheduled_start
     
     # Update fields
     update_data = pickup_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(pickup, field, value)
+
+    # Stored coordinates no longer match a changed address
+    address_changed = bool(PICKUP_ADDRESS_FIELDS & update_data.keys())
+    if address_changed:
+        pickup.lat = pickup.lng = None
     
     # If status changed to completed, set completed_at timestamp
     if old_status != PickupStatus.completed and pickup.status == PickupStatus.completed:
@@ -132,6 +150,9 @@ def update_pickup(
 
     db.commit()
     db.refresh(pickup)
+    invalidate_calendar_days(previous_start, pickup.scheduled_start)
+    if address_changed:
+        geocode_pickup_in_background(pickup.id)
     return pickup
 
 
@@ -146,8 +167,10 @@ def delete_pickup(
     if not pickup:
         raise HTTPException(status_code=404, detail="Pickup request not found")
     
+    scheduled_start = pickup.scheduled_start
     db.delete(pickup)
     db.commit()
+    invalidate_calendar_days(scheduled_start)
     return {"message": "Pickup request deleted"}
 
 
@@ -170,5 +193,6 @@ def complete_pickup(
     
     db.commit()
     db.refresh(pickup)
+    invalidate_calendar_days(pickup.scheduled_start)
     return pickup
 
@@ -9,12 +9,13 @@ Flow:
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Form, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, timezone
 
-from database import get_db
+from database import get_db, get_read_db
 from models import (
     SMSConversation, SMSConversationStatus, SMSRequestType,
     DeliveryTask, TaskSource, TaskStatus,
@@ -24,6 +25,9 @@ from models import (
 from schemas import SMSConversationResponse
 from config import get_settings
 from auth import require_role
+from calendar_cache import invalidate_calendar_days
+from geocoding import geocode_task_in_background, geocode_pickup_in_background
+from archiver import with_archive, archived_counts
 import requests
 
 router = APIRouter(prefix="/sms", tags=["sms"])
@@ -355,6 +359,8 @@ def create_delivery_task(conversation: SMSConversation, db: Session) -> Delivery
     db.add(task)
     db.commit()
     db.refresh(task)
+    invalidate_calendar_days(task.scheduled_start)
+    geocode_task_in_background(task.id)
     return task
 
 
@@ -376,6 +382,8 @@ def create_pickup_request(conversation: SMSConversation, db: Session) -> PickupR
     db.add(pickup)
     db.commit()
     db.refresh(pickup)
+    invalidate_calendar_days(pickup.scheduled_start)
+    geocode_pickup_in_background(pickup.id)
     return pickup
 
 
@@ -389,6 +397,12 @@ def format_phone_for_storage(phone: str) -> str:
     return phone
 
 
+def handle_incoming_message(phone: str, message: str, media_urls: List[str], db: Session) -> str:
+    """Advance the sender's conversation and return the reply text"""
+    conversation = get_or_create_conversation(phone, db)
+    return process_message(conversation, message, media_urls, db)
+
+
 # ============================================
 # WEBHOOK ENDPOINTS
 # ============================================
@@ -423,11 +437,9 @@ async def twilio_webhook(
     elif from_phone.startswith("+"):
         from_phone = from_phone[1:]
     
-    # Get or create conversation
-    conversation = get_or_create_conversation(from_phone, db)
-    
-    # Process message and get response
-    response_text = process_message(conversation, body, media_urls, db)
+    # The conversation flow queries the database and calls Shopify with blocking
+    # clients - run it off the event loop
+    response_text = await run_in_threadpool(handle_incoming_message, from_phone, body, media_urls, db)
     
     # Return TwiML response
     return generate_twiml_response(response_text)
@@ -440,24 +452,28 @@ async def twilio_webhook(
 @router.get("/conversations", response_model=List[SMSConversationResponse])
 def list_conversations(
     status: Optional[SMSConversationStatus] = Query(None),
-    db: Session = Depends(get_db),
+    include_archived: bool = Query(False, description="Include archived rows"),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(require_role(["admin"]))
 ):
     """Get all SMS conversations for admin review"""
-    query = db.query(SMSConversation)
+    Conversation = with_archive(SMSConversation) if include_archived else SMSConversation
+    query = db.query(Conversation)
     if status:
-        query = query.filter(SMSConversation.status == status)
-    return query.order_by(SMSConversation.created_at.desc()).all()
+        query = query.filter(Conversation.status == status)
+    return query.order_by(Conversation.created_at.desc()).all()
 
 
 @router.get("/conversations/{conversation_id}", response_model=SMSConversationResponse)
 def get_conversation(
     conversation_id: int,
+    include_archived: bool = Query(False, description="Include archived rows"),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role(["admin"]))
 ):
     """Get a specific SMS conversation"""
-    conversation = db.query(SMSConversation).filter(SMSConversation.id == conversation_id).first()
+    Conversation = with_archive(SMSConversation) if include_archived else SMSConversation
+    conversation = db.query(Conversation).filter(Conversation.id == conversation_id).first()
     if not conversation:
         raise HTTPException(status_code=404, detail="Conversation not found")
     return conversation
@@ -480,7 +496,7 @@ def delete_conversation(
 
 @router.get("/stats")
 def get_sms_stats(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(require_role(["admin"]))
 ):
     """Get SMS conversation statistics"""
@@ -495,6 +511,11 @@ def get_sms_stats(
         SMSConversation.status == SMSConversationStatus.completed
     ).count()
     
+    # Archived conversations are completed or cancelled
+    archived = archived_counts(db, SMSConversation)
+    total += sum(archived.values())
+    completed += archived.get(SMSConversationStatus.completed.value, 0)
+    
     return {
         "total": total,
         "in_progress": in_progress,
@@ -1,16 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import case, func
-from typing import List, Optional
+from sqlalchemy import case, func, select
+from typing import List, Literal, Optional
+import os
 from datetime import datetime, date, timezone
-from database import get_db
-from models import User, DeliveryTask, TaskStatus
+from database import get_db, get_async_db, get_read_db
+from models import User, DeliveryTask, ArchivedDeliveryTask, TaskStatus
 from schemas import DeliveryTaskCreate, DeliveryTaskResponse, DeliveryTaskUpdate
 from auth import get_current_user, require_role
 from notifications import notify_scheduler_new_task, notify_customer_delivery_scheduled
+from calendar_cache import invalidate_calendar_days
+from geocoding import geocode_task_in_background, TASK_ADDRESS_FIELDS
+from signatures import decode_signature, signature_digest, signature_url, rendered_signature
+from file_responses import CachedFileResponse
+from routers.uploads_router import UPLOAD_DIR
+from archiver import with_archive
 
 router = APIRouter(prefix="/api/tasks", tags=["tasks"])
 
+# Rendered signatures, named {sha256}.{svg|png}
+SIGNATURE_DIR = os.path.join(UPLOAD_DIR, "signatures")
+
 
 @router.post("", response_model=DeliveryTaskResponse, status_code=status.HTTP_201_CREATED)
 def create_task(
@@ -24,6 +35,8 @@ def create_task(
     db.add(db_task)
     db.commit()
     db.refresh(db_task)
+    invalidate_calendar_days(db_task.scheduled_start)
+    geocode_task_in_background(db_task.id)
     
     # Notify scheduler
     notify_scheduler_new_task(db_task)
@@ -39,46 +52,48 @@ def list_tasks(
     date_to: Optional[datetime] = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    include_archived: bool = Query(False, description="Include archived rows"),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """List all delivery tasks with optional filters"""
-    query = db.query(DeliveryTask)
+    Task = with_archive(DeliveryTask) if include_archived else DeliveryTask
+    query = db.query(Task)
     
     # Filter by status
     if status:
-        query = query.filter(DeliveryTask.status == status)
+        query = query.filter(Task.status == status)
     
     # Search by name, SKU, or order number
     if search:
         search_filter = f"%{search}%"
         query = query.filter(
-            (DeliveryTask.customer_name.ilike(search_filter)) |
-            (DeliveryTask.sku.ilike(search_filter)) |
-            (DeliveryTask.shopify_order_number.ilike(search_filter)) |
-            (DeliveryTask.item_title.ilike(search_filter))
+            (Task.customer_name.ilike(search_filter)) |
+            (Task.sku.ilike(search_filter)) |
+            (Task.shopify_order_number.ilike(search_filter)) |
+            (Task.item_title.ilike(search_filter))
         )
     
     # Filter by date range
     if date_from:
-        query = query.filter(DeliveryTask.created_at >= date_from)
+        query = query.filter(Task.created_at >= date_from)
     if date_to:
-        query = query.filter(DeliveryTask.created_at <= date_to)
+        query = query.filter(Task.created_at <= date_to)
     
     # Special sorting for completed (paid) items: most recently completed first
     if status == TaskStatus.paid:
-        query = query.order_by(DeliveryTask.paid_at.desc().nullslast())
+        query = query.order_by(Task.paid_at.desc().nullslast())
     else:
         # Order by: today's scheduled first, then future dates, then past, then unscheduled
         today = date.today()
         query = query.order_by(
             case(
-                (func.date(DeliveryTask.scheduled_start) == today, 0),  # Today first
-                (DeliveryTask.scheduled_start > datetime.now(), 1),      # Future second
-                (DeliveryTask.scheduled_start.is_(None), 3),             # Unscheduled last
-                else_=2                                                   # Past third
+                (func.date(Task.scheduled_start) == today, 0),  # Today first
+                (Task.scheduled_start > datetime.now(), 1),     # Future second
+                (Task.scheduled_start.is_(None), 3),            # Unscheduled last
+                else_=2                                         # Past third
             ),
-            DeliveryTask.scheduled_start.asc().nullslast()  # Sort by date ascending, nulls last
+            Task.scheduled_start.asc().nullslast()  # Sort by date ascending, nulls last
         )
     
     tasks = query.offset(skip).limit(limit).all()
@@ -88,11 +103,13 @@ def list_tasks(
 @router.get("/{task_id}", response_model=DeliveryTaskResponse)
 def get_task(
     task_id: int,
+    include_archived: bool = Query(False, description="Include archived rows"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get delivery task details"""
-    task = db.query(DeliveryTask).filter(DeliveryTask.id == task_id).first()
+    Task = with_archive(DeliveryTask) if include_archived else DeliveryTask
+    task = db.query(Task).filter(Task.id == task_id).first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     return task
@@ -112,11 +129,28 @@ def update_task(
     
     # Track if scheduling changed
     was_scheduled = task.scheduled_start is not None
+    previous_start = task.scheduled_start
     
     # Update fields
     update_data = task_update.dict(exclude_unset=True)
+    signature = update_data.pop("signature", None)
+    if signature is not None:
+        try:
+            decode_signature(signature)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid signature: {e}")
     for field, value in update_data.items():
         setattr(task, field, value)
+
+    # Stored as sent; images are rendered when viewed
+    if signature is not None:
+        task.signature_strokes = signature
+        task.signature_url = signature_url(task.id, signature)
+
+    # Stored coordinates no longer match a changed address
+    address_changed = bool(TASK_ADDRESS_FIELDS & update_data.keys())
+    if address_changed:
+        task.lat = task.lng = None
     
     # If scheduling changed and now has a scheduled time, update status
     if not was_scheduled and task.scheduled_start:
@@ -134,10 +168,39 @@ def update_task(
     
     db.commit()
     db.refresh(task)
+    invalidate_calendar_days(previous_start, task.scheduled_start)
+    if address_changed:
+        geocode_task_in_background(task.id)
     
     return task
 
 
+@router.get("/{task_id}/signature")
+async def get_signature(
+    task_id: int,
+    request: Request,
+    v: str = Query(..., description="Signature version from signature_url"),
+    format: Literal["svg", "png"] = "svg",
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Customer signature image (no auth, so it works in <img>; the version makes the URL unguessable)"""
+    strokes = await db.scalar(select(DeliveryTask.signature_strokes).where(DeliveryTask.id == task_id))
+    if strokes is None:
+        strokes = await db.scalar(
+            select(ArchivedDeliveryTask.signature_strokes).where(ArchivedDeliveryTask.id == task_id)
+        )
+    if not strokes:
+        raise HTTPException(status_code=404, detail="Signature not found")
+    digest = signature_digest(strokes)
+    if v != digest[:16]:
+        raise HTTPException(status_code=404, detail="Signature not found")
+
+    path, media_type = await rendered_signature(SIGNATURE_DIR, strokes, format)
+    # Tagged with the format actually served (PNG falls back to SVG without Pillow)
+    rendered_format = os.path.splitext(path)[1].lstrip(".")
+    return CachedFileResponse(request, path, media_type=media_type, etag=f'"{digest}-{rendered_format}"', immutable=True)
+
+
 @router.delete("/{task_id}")
 def delete_task(
     task_id: int,
@@ -149,8 +212,10 @@ def delete_task(
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
+    scheduled_start = task.scheduled_start
     db.delete(task)
     db.commit()
+    invalidate_calendar_days(scheduled_start)
     
     return {"success": True}
 
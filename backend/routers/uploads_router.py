@@ -1,94 +1,223 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from fastapi.responses import FileResponse
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Request, Query
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import Optional
 import os
-import uuid
-import shutil
 
-from auth import get_current_user
+from database import get_db, get_async_db
+from auth import get_current_user, require_role
 from models import User
+from upload_stream import ImageUploadParser
+from image_derivatives import DERIVATIVE_SIZES, start_derivatives, get_derivative, remove_derivatives
+from file_store import register_uploads, is_referenced, forget_upload, collect_garbage, content_hash
+from file_responses import CachedFileResponse
+import resumable_uploads
 
 router = APIRouter(prefix="/api/uploads", tags=["uploads"])
 
 # Create uploads directory if it doesn't exist
 UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "uploads")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
+# Resized variants, named {stem}_{size}.{webp|avif}
+DERIVATIVE_DIR = os.path.join(UPLOAD_DIR, "derivatives")
+# Bytes received so far for resumable uploads
+PARTIAL_DIR = os.path.join(UPLOAD_DIR, "partial")
 
-# Allowed file extensions
-ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+MAX_FILES = 10
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+# Whole request: every file at the limit plus room for multipart headers
+MAX_REQUEST_SIZE = MAX_FILES * MAX_FILE_SIZE + 1024 * 1024
 
+# The body is parsed by hand, so describe it for the OpenAPI docs
+UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "files": {"type": "array", "items": {"type": "string", "format": "binary"}}
+                    },
+                    "required": ["files"],
+                }
+            }
+        },
+    }
+}
 
-def validate_file(file: UploadFile):
-    """Validate uploaded file"""
-    # Check extension
-    ext = os.path.splitext(file.filename)[1].lower()
-    if ext not in ALLOWED_EXTENSIONS:
+
+@router.post("/images", openapi_extra=UPLOAD_REQUEST_BODY)
+async def upload_images(
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """Upload one or more images (JPEG, PNG, GIF or WebP) and return their URLs"""
+    # Reject oversized requests before reading any of the body
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_REQUEST_SIZE:
+        raise HTTPException(status_code=413, detail="Upload too large")
+
+    parser = ImageUploadParser(
+        request.headers.get("content-type", ""),
+        UPLOAD_DIR,
+        max_files=MAX_FILES,
+        max_file_size=MAX_FILE_SIZE,
+    )
+    try:
+        files = await parser.parse(request.stream())
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+
+    if not files:
+        raise HTTPException(status_code=400, detail="No files uploaded")
+
+    await run_in_threadpool(register_uploads, files)
+
+    # Render thumbnails in the background (process pool); re-uploads already have them
+    for file in files:
+        if file.created:
+            start_derivatives(file.final_path, DERIVATIVE_DIR)
+
+    # Generate URLs (relative paths that will be served)
+    return {"urls": [f"/api/uploads/images/{file.filename}" for file in files]}
+
+
+class UploadSessionCreate(BaseModel):
+    size: int = Field(..., gt=0)
+    filename: Optional[str] = None
+
+
+@router.post("/sessions")
+def create_upload_session(
+    session_data: UploadSessionCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Start a resumable upload of `size` bytes"""
+    if session_data.size > MAX_FILE_SIZE:
         raise HTTPException(
-            status_code=400,
-            detail=f"File type not allowed. Allowed: {', '.join(ALLOWED_EXTENSIONS)}"
+            status_code=413,
+            detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024 * 1024)}MB"
         )
-    return ext
+    upload_session = resumable_uploads.create_session(
+        db, PARTIAL_DIR, current_user.username, session_data.size, session_data.filename
+    )
+    return resumable_uploads.session_status(upload_session)
 
 
-@router.post("/images")
-async def upload_images(
-    files: List[UploadFile] = File(...),
+@router.get("/sessions/{session_id}")
+def get_upload_session(
+    session_id: str,
+    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Upload one or more images and return their URLs"""
-    if len(files) > 10:
-        raise HTTPException(status_code=400, detail="Maximum 10 files allowed per upload")
-    
-    uploaded_urls = []
-    
-    for file in files:
-        # Validate file
-        ext = validate_file(file)
-        
-        # Generate unique filename
-        unique_id = str(uuid.uuid4())
-        filename = f"{unique_id}{ext}"
-        file_path = os.path.join(UPLOAD_DIR, filename)
-        
-        try:
-            # Save file
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            
-            # Generate URL (relative path that will be served)
-            url = f"/api/uploads/images/{filename}"
-            uploaded_urls.append(url)
-            
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
-        finally:
-            file.file.close()
-    
-    return {"urls": uploaded_urls}
+    """Where to resume: the number of bytes received so far"""
+    upload_session = resumable_uploads.get_session(db, session_id, current_user.username)
+    return resumable_uploads.session_status(upload_session)
+
+
+@router.put("/sessions/{session_id}")
+async def upload_chunk(
+    session_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Append the raw request body at `offset` (must equal the bytes received so far)"""
+    upload_session = await resumable_uploads.get_session_async(db, session_id, current_user.username)
+    upload_session = await resumable_uploads.write_chunk(db, PARTIAL_DIR, upload_session, offset, request.stream())
+    return resumable_uploads.session_status(upload_session)
+
+
+@router.post("/sessions/{session_id}/complete")
+async def complete_upload_session(
+    session_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Finish a resumable upload and return its URL"""
+    # Session lookup, hashing and moving the file are all blocking
+    upload_session = await run_in_threadpool(resumable_uploads.get_session, db, session_id, current_user.username)
+    upload = await run_in_threadpool(resumable_uploads.complete_session, db, PARTIAL_DIR, UPLOAD_DIR, upload_session)
+    await run_in_threadpool(register_uploads, [upload])
+    if upload.created:
+        start_derivatives(upload.final_path, DERIVATIVE_DIR)
+    return {"url": f"/api/uploads/images/{upload.filename}"}
+
+
+@router.delete("/sessions/{session_id}")
+def abort_upload_session(
+    session_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Abandon a resumable upload"""
+    upload_session = resumable_uploads.get_session(db, session_id, current_user.username)
+    resumable_uploads.delete_session(db, PARTIAL_DIR, upload_session)
+    return {"message": "Upload cancelled"}
 
 
 @router.get("/images/{filename}")
-async def get_image(filename: str):
-    """Serve an uploaded image"""
-    file_path = os.path.join(UPLOAD_DIR, filename)
-    
-    if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="Image not found")
-    
+async def get_image(
+    filename: str,
+    request: Request,
+    size: Optional[str] = Query(None, description="thumb, small or medium; omit for the original")
+):
+    """
+    Serve an uploaded image, optionally resized.
+
+    Content-addressed files never change, so they are sent with a hash ETag
+    and an immutable Cache-Control; conditional and Range requests are honoured.
+    """
     # Validate filename to prevent directory traversal
     if ".." in filename or "/" in filename or "\\" in filename:
         raise HTTPException(status_code=400, detail="Invalid filename")
-    
-    return FileResponse(file_path)
+
+    file_path = os.path.join(UPLOAD_DIR, filename)
+
+    if not os.path.isfile(file_path):
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    if size is not None:
+        if size not in DERIVATIVE_SIZES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid size. Allowed: {', '.join(DERIVATIVE_SIZES)}"
+            )
+        derivative = await get_derivative(file_path, DERIVATIVE_DIR, size, request.headers.get("accept", ""))
+        if derivative:
+            path, media_type = derivative
+            sha256 = content_hash(filename)
+            return CachedFileResponse(
+                request, path, media_type=media_type,
+                etag=f'"{sha256}-{size}-{media_type.split("/")[1]}"' if sha256 else None,
+                immutable=sha256 is not None,
+                headers={"Vary": "Accept"},
+            )
+        # No derivative available - the original may be replaced by one later
+        return CachedFileResponse(request, file_path, headers={"Vary": "Accept"})
+
+    sha256 = content_hash(filename)
+    return CachedFileResponse(
+        request, file_path,
+        etag=f'"{sha256}"' if sha256 else None,
+        immutable=sha256 is not None,
+    )
 
 
 @router.delete("/images/{filename}")
-async def delete_image(
+def delete_image(
     filename: str,
+    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Delete an uploaded image"""
+    """Delete an uploaded image, unless a task, pickup or conversation still uses it"""
     # Validate filename
     if ".." in filename or "/" in filename or "\\" in filename:
         raise HTTPException(status_code=400, detail="Invalid filename")
@@ -98,9 +227,20 @@ async def delete_image(
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="Image not found")
     
+    # Identical photos share one file, so it may belong to other records too
+    if is_referenced(db, filename):
+        return {"message": "Image is still in use and was kept"}
+
     try:
         os.remove(file_path)
+        remove_derivatives(DERIVATIVE_DIR, filename)
+        forget_upload(db, filename)
         return {"message": "Image deleted"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete file: {str(e)}")
 
+
+@router.post("/gc")
+def run_garbage_collection(current_user: User = Depends(require_role(["admin"]))):
+    """Remove uploaded images that no task, pickup or conversation references"""
+    return collect_garbage(UPLOAD_DIR, DERIVATIVE_DIR)
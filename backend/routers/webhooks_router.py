@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, Header
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from datetime import datetime
-from database import get_db
+from database import get_async_db
 from models import DeliveryInvite, DeliveryTask, TaskStatus, TaskSource
 from schemas import ShopifyWebhookOrder, SMSWebhookIncoming
 from utils import (
@@ -21,7 +23,7 @@ router = APIRouter(prefix="/webhooks", tags=["webhooks"])
 @router.post("/shopify/orders")
 async def shopify_order_webhook(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     x_shopify_hmac_sha256: Optional[str] = Header(None)
 ):
     """Receive Shopify order webhooks"""
@@ -71,13 +73,13 @@ async def shopify_order_webhook(
     )
     
     db.add(invite)
-    db.commit()
-    db.refresh(invite)
+    await db.commit()
+    await db.refresh(invite)
     
     # Send SMS invitation
     invite.last_sms_at = datetime.utcnow()
-    db.commit()
-    send_delivery_invite_sms(invite)
+    await db.commit()
+    await run_in_threadpool(send_delivery_invite_sms, invite)
     
     return {
         "status": "success",
@@ -89,17 +91,19 @@ async def shopify_order_webhook(
 @router.post("/sms/incoming")
 async def sms_incoming_webhook(
     webhook_data: SMSWebhookIncoming,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Handle incoming SMS messages"""
     from_phone = normalize_phone(webhook_data.From)
     body = webhook_data.Body.strip().upper()
     
     # Look up delivery invite by phone
-    invite = db.query(DeliveryInvite).filter(
-        DeliveryInvite.customer_phone == from_phone,
-        DeliveryInvite.status == "sent"
-    ).order_by(DeliveryInvite.created_at.desc()).first()
+    invite = await db.scalar(
+        select(DeliveryInvite).where(
+            DeliveryInvite.customer_phone == from_phone,
+            DeliveryInvite.status == "sent"
+        ).order_by(DeliveryInvite.created_at.desc()).limit(1)
+    )
     
     if not invite:
         return {"status": "ignored", "reason": "No pending invite for this number"}
@@ -108,10 +112,10 @@ async def sms_incoming_webhook(
     if "YES" in body or "Y" == body:
         # Update invite status
         invite.status = "responded_yes"
-        db.commit()
+        await db.commit()
         
         # Notify scheduler
-        notify_scheduler_customer_responded(invite)
+        await run_in_threadpool(notify_scheduler_customer_responded, invite)
         
         return {
             "status": "success",
@@ -0,0 +1,288 @@
+"""
+Routing - Stops and distance matrices for a day's deliveries and pickups
+
+A driver's day is every delivery task and pickup request scheduled on that
+date that still needs a visit; delivered, paid, cancelled and completed stops
+are left out, so they cost no matrix elements and are never routed. The distance matrix between those stops is built from as few Google
+Distance Matrix calls as possible:
+
+- Pairs already in the matrix cache are filled in without any request.
+- Missing pairs are requested in tiles of at most 10 origins x 10 destinations
+  (the API allows 100 elements per request), and tiles that are fully cached
+  are skipped.
+
+Durations are seconds and distances are meters; unknown pairs are None.
+"""
+
+import asyncio
+import os
+import re
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional, Tuple
+
+import httpx
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models import DeliveryTask, PickupRequest, TaskStatus, PickupStatus
+from utils import format_address, format_pickup_address
+from eta_cache import ETACache, geohash, normalize_destination
+from config import get_settings
+
+settings = get_settings()
+
+GOOGLE_MAPS_API_KEY = os.environ.get("GOOGLE_MAPS_API_KEY")
+DISTANCE_MATRIX_URL = "https://maps.googleapis.com/maps/api/distancematrix/json"
+
+# Tile size per upstream request: 10 x 10 = 100 elements (the API maximum)
+MATRIX_TILE_SIZE = 10
+
+COORDINATE_PATTERN = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$")
+
+# Stops that no longer need a visit
+FINISHED_TASK_STATUSES = [TaskStatus.delivered, TaskStatus.paid, TaskStatus.cancelled]
+FINISHED_PICKUP_STATUSES = [PickupStatus.completed]
+
+# Origin/destination pairs, keyed by (location key, location key)
+matrix_cache = ETACache(
+    max_entries=settings.eta_cache_max_entries,
+    precision=settings.eta_cache_geohash_precision,
+)
+
+
+def _day_stop_queries(day: date, assigned_to: Optional[str] = None) -> Tuple[Select, Select]:
+    """Statements selecting the open deliveries and pickups scheduled on a day"""
+    day_start = datetime.combine(day, time.min)
+    day_end = day_start + timedelta(days=1)
+
+    task_query = select(DeliveryTask).where(
+        DeliveryTask.scheduled_start >= day_start,
+        DeliveryTask.scheduled_start < day_end,
+        DeliveryTask.status.notin_(FINISHED_TASK_STATUSES)
+    )
+    pickup_query = select(PickupRequest).where(
+        PickupRequest.scheduled_start >= day_start,
+        PickupRequest.scheduled_start < day_end,
+        PickupRequest.status.notin_(FINISHED_PICKUP_STATUSES)
+    )
+    if assigned_to:
+        task_query = task_query.where(DeliveryTask.assigned_to == assigned_to)
+        pickup_query = pickup_query.where(PickupRequest.assigned_to == assigned_to)
+    return task_query, pickup_query
+
+
+def _day_stops(tasks, pickups) -> List[dict]:
+    stops = []
+    for task in tasks:
+        stops.append({
+            "type": "delivery",
+            "id": task.id,
+            "status": task.status.value,
+            "customer_name": task.customer_name,
+            "address": format_address(task),
+            "lat": task.lat,
+            "lng": task.lng,
+            "scheduled_start": task.scheduled_start,
+            "scheduled_end": task.scheduled_end,
+            "assigned_to": task.assigned_to,
+        })
+    for pickup in pickups:
+        stops.append({
+            "type": "pickup",
+            "id": pickup.id,
+            "status": pickup.status.value,
+            "customer_name": pickup.customer_name,
+            "address": format_pickup_address(pickup),
+            "lat": pickup.lat,
+            "lng": pickup.lng,
+            "scheduled_start": pickup.scheduled_start,
+            "scheduled_end": pickup.scheduled_end,
+            "assigned_to": pickup.assigned_to,
+        })
+
+    stops.sort(key=lambda stop: stop["scheduled_start"])
+    return stops
+
+
+def load_day_stops(db: Session, day: date, assigned_to: Optional[str] = None) -> List[dict]:
+    """Get the open deliveries and pickups scheduled on a day, ordered by start time"""
+    task_query, pickup_query = _day_stop_queries(day, assigned_to)
+    return _day_stops(db.scalars(task_query).all(), db.scalars(pickup_query).all())
+
+
+async def load_day_stops_async(db: AsyncSession, day: date, assigned_to: Optional[str] = None) -> List[dict]:
+    """load_day_stops for async endpoints"""
+    task_query, pickup_query = _day_stop_queries(day, assigned_to)
+    tasks = (await db.scalars(task_query)).all()
+    pickups = (await db.scalars(pickup_query)).all()
+    return _day_stops(tasks, pickups)
+
+
+def stop_location(stop: dict) -> str:
+    """Location sent upstream - stored coordinates when known, so Google skips geocoding"""
+    if stop.get("lat") is not None and stop.get("lng") is not None:
+        return f"{stop['lat']},{stop['lng']}"
+    return stop["address"]
+
+
+def location_key(location: str) -> str:
+    """Cache key for a location - a geohash cell for coordinates, else the normalized address"""
+    match = COORDINATE_PATTERN.match(location)
+    if match:
+        lat, lng = float(match.group(1)), float(match.group(2))
+        return "geo:" + geohash(lat, lng, matrix_cache.precision)
+    return normalize_destination(location)
+
+
+async def fetch_matrix_tile(
+    client: httpx.AsyncClient, origins: List[str], destinations: List[str]
+) -> Optional[List[List[Optional[Tuple[int, int]]]]]:
+    """Request one tile; returns rows of (seconds, meters) or None per element, or None on failure"""
+    matrix_cache.record_upstream_call()
+    params = {
+        "origins": "|".join(origins),
+        "destinations": "|".join(destinations),
+        "key": GOOGLE_MAPS_API_KEY,
+        "units": "imperial",
+    }
+    try:
+        response = await client.get(DISTANCE_MATRIX_URL, params=params, timeout=10.0)
+        response.raise_for_status()
+        data = response.json()
+    except (httpx.HTTPError, ValueError) as e:
+        print(f"[Routing] Distance matrix request failed: {e}")
+        return None
+
+    if data.get("status") != "OK":
+        print(f"[Routing] Distance matrix error: {data.get('status')}")
+        return None
+
+    tile = []
+    for row in data.get("rows", []):
+        values = []
+        for element in row.get("elements", []):
+            if element.get("status") == "OK":
+                values.append((element["duration"]["value"], element["distance"]["value"]))
+            else:
+                values.append(None)
+        tile.append(values)
+    return tile
+
+
+async def build_distance_matrix(locations: List[str]) -> dict:
+    """
+    Build full duration/distance matrices between locations (addresses or "lat,lng").
+    Returns {"durations", "distances", "status", "upstream_calls", "cached_pairs"}.
+    """
+    size = len(locations)
+    keys = [location_key(location) for location in locations]
+    durations: List[List[Optional[int]]] = [[None] * size for _ in range(size)]
+    distances: List[List[Optional[int]]] = [[None] * size for _ in range(size)]
+
+    missing = set()
+    cached_pairs = 0
+    for i in range(size):
+        for j in range(size):
+            if i == j or keys[i] == keys[j]:
+                durations[i][j] = distances[i][j] = 0
+                continue
+            cached = matrix_cache.get((keys[i], keys[j]))
+            if cached is not None:
+                durations[i][j], distances[i][j] = cached
+                cached_pairs += 1
+            else:
+                missing.add((i, j))
+
+    upstream_calls = 0
+    if missing and GOOGLE_MAPS_API_KEY:
+        chunks = [list(range(start, min(start + MATRIX_TILE_SIZE, size))) for start in range(0, size, MATRIX_TILE_SIZE)]
+        tiles = [
+            (origin_chunk, destination_chunk)
+            for origin_chunk in chunks
+            for destination_chunk in chunks
+            if any((i, j) in missing for i in origin_chunk for j in destination_chunk)
+        ]
+        upstream_calls = len(tiles)
+
+        async with httpx.AsyncClient() as client:
+            results = await asyncio.gather(*[
+                fetch_matrix_tile(
+                    client,
+                    [locations[i] for i in origin_chunk],
+                    [locations[j] for j in destination_chunk],
+                )
+                for origin_chunk, destination_chunk in tiles
+            ])
+
+        for (origin_chunk, destination_chunk), tile in zip(tiles, results):
+            if tile is None:
+                continue
+            for row_index, i in enumerate(origin_chunk):
+                for column_index, j in enumerate(destination_chunk):
+                    if (i, j) not in missing:
+                        continue
+                    try:
+                        value = tile[row_index][column_index]
+                    except IndexError:
+                        value = None
+                    if value is None:
+                        continue
+                    durations[i][j], distances[i][j] = value
+                    matrix_cache.set((keys[i], keys[j]), value)
+                    missing.discard((i, j))
+
+    if not missing:
+        status = "ok"
+    elif not GOOGLE_MAPS_API_KEY:
+        status = "fallback"
+    else:
+        status = "partial"
+
+    return {
+        "durations": durations,
+        "distances": distances,
+        "status": status,
+        "upstream_calls": upstream_calls,
+        "cached_pairs": cached_pairs,
+    }
+
+
+async def build_travel_row(origin: str, destinations: List[str]) -> List[Optional[Tuple[int, int]]]:
+    """
+    Travel (seconds, meters) from one origin to each destination, or None if unknown.
+    Uses cached pairs first and requests the rest in chunks of 25 destinations.
+    """
+    origin_key = location_key(origin)
+    keys = [location_key(destination) for destination in destinations]
+    row: List[Optional[Tuple[int, int]]] = [None] * len(destinations)
+
+    missing = []
+    for j, key in enumerate(keys):
+        if key == origin_key:
+            row[j] = (0, 0)
+            continue
+        cached = matrix_cache.get((origin_key, key))
+        if cached is not None:
+            row[j] = cached
+        else:
+            missing.append(j)
+
+    if missing and GOOGLE_MAPS_API_KEY:
+        # The API allows at most 25 destinations per request
+        chunks = [missing[start:start + 25] for start in range(0, len(missing), 25)]
+        async with httpx.AsyncClient() as client:
+            results = await asyncio.gather(*[
+                fetch_matrix_tile(client, [origin], [destinations[j] for j in chunk])
+                for chunk in chunks
+            ])
+        for chunk, tile in zip(chunks, results):
+            if not tile:
+                continue
+            for column_index, j in enumerate(chunk):
+                value = tile[0][column_index] if column_index < len(tile[0]) else None
+                if value is not None:
+                    row[j] = value
+                    matrix_cache.set((origin_key, keys[j]), value)
+
+    return row
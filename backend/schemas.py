@@ -84,6 +84,7 @@ class DeliveryTaskUpdate(BaseModel):
     delivery_state: Optional[str] = None
     delivery_zip: Optional[str] = None
     signature_url: Optional[str] = None
+    signature: Optional[str] = None  # Stroke-encoded signature (see signatures.py)
 
 
 class DeliveryTaskResponse(DeliveryTaskBase):
@@ -98,6 +99,8 @@ class DeliveryTaskResponse(DeliveryTaskBase):
     delivered_at: Optional[datetime] = None    # When actually delivered
     paid_at: Optional[datetime] = None         # When payment received
     signature_url: Optional[str] = None        # E-signature image URL
+    lat: Optional[float] = None                # Geocoded delivery address
+    lng: Optional[float] = None
     created_at: datetime
     updated_at: datetime
     
@@ -214,6 +217,8 @@ class PickupRequestResponse(PickupRequestBase):
     scheduled_end: Optional[datetime] = None
     assigned_to: Optional[str] = None
     completed_at: Optional[datetime] = None
+    lat: Optional[float] = None                # Geocoded pickup address
+    lng: Optional[float] = None
     created_at: datetime
     updated_at: datetime
     
@@ -0,0 +1,219 @@
+"""
+Signatures - Compact stroke-encoded e-signatures, rendered on demand
+
+The signature pad sends the pen strokes instead of a PNG. A signature is the
+canvas size plus a list of strokes, each a list of integer points, packed as:
+
+    "s1." + base64url(varint width, varint height,
+                      per stroke: varint point count, then zigzag varint dx, dy per point)
+
+Points are deltas from the previous point (carried across strokes, starting at
+0,0), so a typical signature is 1-3 KB instead of 20-60 KB of base64 PNG.
+
+The encoded string is stored as-is on the task. SVG or PNG renderings are made
+the first time someone views the signature and cached on disk by content hash.
+Concurrent first views share one render, and PNGs are capped at MAX_PNG_SIZE
+pixels per side whatever canvas size the signature claims.
+"""
+
+import asyncio
+import base64
+import hashlib
+import io
+import os
+import uuid
+from typing import Dict, List, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+try:
+    from PIL import Image, ImageDraw
+    PIL_AVAILABLE = True
+except ImportError:
+    Image = ImageDraw = None
+    PIL_AVAILABLE = False
+
+PREFIX = "s1."
+MAX_ENCODED_LENGTH = 64 * 1024
+MAX_CANVAS_SIZE = 4096
+
+STROKE_WIDTH = 2
+PNG_SCALE = 2  # Render PNGs at 2x for high DPI screens and print
+MAX_PNG_SIZE = 2048  # Longest side of a rendered PNG, in pixels
+
+Point = Tuple[int, int]
+
+
+# ============================================
+# ENCODING
+# ============================================
+
+def _write_varint(out: bytearray, value: int):
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def _zigzag(value: int) -> int:
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value // 2 if value % 2 == 0 else -(value + 1) // 2
+
+
+def encode_signature(width: int, height: int, strokes: List[List[Point]]) -> str:
+    out = bytearray()
+    _write_varint(out, width)
+    _write_varint(out, height)
+    last_x = last_y = 0
+    for stroke in strokes:
+        _write_varint(out, len(stroke))
+        for x, y in stroke:
+            _write_varint(out, _zigzag(x - last_x))
+            _write_varint(out, _zigzag(y - last_y))
+            last_x, last_y = x, y
+    return PREFIX + base64.urlsafe_b64encode(bytes(out)).decode().rstrip("=")
+
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.position = 0
+
+    @property
+    def done(self) -> bool:
+        return self.position >= len(self.data)
+
+    def varint(self) -> int:
+        value = shift = 0
+        while True:
+            if self.done or shift > 28:
+                raise ValueError("truncated or oversized number")
+            byte = self.data[self.position]
+            self.position += 1
+            value |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                return value
+            shift += 7
+
+
+def decode_signature(encoded: str) -> Tuple[int, int, List[List[Point]]]:
+    """(width, height, strokes) of an encoded signature; raises ValueError if malformed"""
+    if not encoded.startswith(PREFIX):
+        raise ValueError("unknown signature format")
+    if len(encoded) > MAX_ENCODED_LENGTH:
+        raise ValueError("signature is too large")
+
+    payload = encoded[len(PREFIX):]
+    try:
+        data = base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+    except (ValueError, TypeError):
+        raise ValueError("signature is not valid base64")
+
+    reader = _Reader(data)
+    width, height = reader.varint(), reader.varint()
+    if not (0 < width <= MAX_CANVAS_SIZE and 0 < height <= MAX_CANVAS_SIZE):
+        raise ValueError("invalid canvas size")
+
+    strokes = []
+    x = y = 0
+    while not reader.done:
+        count = reader.varint()
+        if count == 0:
+            raise ValueError("empty stroke")
+        stroke = []
+        for _ in range(count):
+            x += _unzigzag(reader.varint())
+            y += _unzigzag(reader.varint())
+            stroke.append((x, y))
+        strokes.append(stroke)
+    if not strokes:
+        raise ValueError("signature has no strokes")
+    return width, height, strokes
+
+
+def signature_digest(encoded: str) -> str:
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+# ============================================
+# RENDERING
+# ============================================
+
+def render_svg(encoded: str) -> bytes:
+    width, height, strokes = decode_signature(encoded)
+    paths = []
+    for stroke in strokes:
+        (start_x, start_y), rest = stroke[0], stroke[1:]
+        # A lone point becomes a dot thanks to the round line caps
+        segments = " ".join(f"L{x} {y}" for x, y in rest) or "l0 0"
+        paths.append(f'<path d="M{start_x} {start_y} {segments}"/>')
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">'
+        f'<rect width="100%" height="100%" fill="#fff"/>'
+        f'<g fill="none" stroke="#000" stroke-width="{STROKE_WIDTH}" stroke-linecap="round" stroke-linejoin="round">'
+        f'{"".join(paths)}</g></svg>'
+    ).encode()
+
+
+def render_png(encoded: str) -> bytes:
+    width, height, strokes = decode_signature(encoded)
+    # Signatures are unauthenticated input, so a huge canvas must not mean a huge image
+    scale = min(PNG_SCALE, MAX_PNG_SIZE / max(width, height))
+    image = Image.new("RGB", (max(1, round(width * scale)), max(1, round(height * scale))), "white")
+    draw = ImageDraw.Draw(image)
+    line_width = max(1, round(STROKE_WIDTH * scale))
+    radius = line_width / 2
+    for stroke in strokes:
+        points = [(x * scale, y * scale) for x, y in stroke]
+        if len(points) > 1:
+            draw.line(points, fill="black", width=line_width, joint="curve")
+        # Round caps
+        for px, py in (points[0], points[-1]):
+            draw.ellipse((px - radius, py - radius, px + radius, py + radius), fill="black")
+
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def _render_to_cache(encoded: str, path: str, fmt: str):
+    data = render_png(encoded) if fmt == "png" else render_svg(encoded)
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, "wb") as handle:
+        handle.write(data)
+    os.replace(temp_path, path)
+
+
+# Renders in progress by cache path, so concurrent first views share one
+_inflight: Dict[str, "asyncio.Future[None]"] = {}
+
+
+async def rendered_signature(cache_dir: str, encoded: str, fmt: str) -> Tuple[str, str]:
+    """(path, media type) of a rendering, made on first request; PNG falls back to SVG without Pillow"""
+    if fmt == "png" and not PIL_AVAILABLE:
+        fmt = "svg"
+    media_type = "image/png" if fmt == "png" else "image/svg+xml"
+
+    path = os.path.join(cache_dir, f"{signature_digest(encoded)}.{fmt}")
+    if not os.path.exists(path):
+        pending = _inflight.get(path)
+        if pending is None:
+            os.makedirs(cache_dir, exist_ok=True)
+            pending = asyncio.ensure_future(run_in_threadpool(_render_to_cache, encoded, path, fmt))
+            _inflight[path] = pending
+            pending.add_done_callback(lambda _: _inflight.pop(path, None))
+        # A disconnecting viewer must not cancel the render the others wait for
+        await asyncio.shield(pending)
+    return path, media_type
+
+
+def signature_url(task_id: int, encoded: str) -> str:
+    """Viewing URL; the digest makes it unguessable and changes with the signature"""
+    return f"/api/tasks/{task_id}/signature?v={signature_digest(encoded)[:16]}"
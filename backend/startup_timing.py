@@ -0,0 +1,47 @@
+"""
+Startup Timing - How long each phase of a cold start took
+
+main.py imports this first and marks the end of its imports; the lifespan
+handler times the remaining phases (migrations, user sync, background
+services). The report is printed once the app is ready and exposed to admins
+on /api/startup-timings, so slow deploys can be traced to a phase.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+
+class StartupTimer:
+    """Durations of consecutive startup phases, measured from process import"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._checkpoint = self.started
+        self.phases: List[Tuple[str, float]] = []
+
+    def mark(self, name: str):
+        """Record everything since the previous phase as `name`"""
+        now = time.perf_counter()
+        self.phases.append((name, now - self._checkpoint))
+        self._checkpoint = now
+
+    @contextmanager
+    def phase(self, name: str):
+        self._checkpoint = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.mark(name)
+
+    def report(self) -> dict:
+        total = self._checkpoint - self.started
+        summary = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.phases)
+        print(f"[Startup] Ready in {total:.2f}s ({summary})")
+        return {
+            "total_seconds": round(total, 3),
+            "phases": {name: round(seconds, 3) for name, seconds in self.phases},
+        }
+
+
+startup_timer = StartupTimer()
@@ -0,0 +1,237 @@
+"""
+Upload Stream - Streaming multipart parser for image uploads
+
+Starlette buffers a whole multipart body into temporary files before the
+endpoint runs, so size limits can only be checked after everything arrived.
+This parser reads the request stream directly:
+
+- Each file part is written to disk chunk by chunk, in the threadpool, so large
+  photos never block the event loop.
+- A part is rejected as soon as it passes the size limit, without reading the
+  rest of the body.
+- The file type comes from the first bytes of the content (magic numbers), not
+  from the client's filename.
+
+Files are stored under the SHA-256 of their content ({sha256}{ext}), hashed
+while streaming, so uploading the same photo twice keeps a single copy. They
+are written as hidden ".part" files and only renamed into place once the whole
+request has been read; on any error every file the request created is removed.
+"""
+
+import hashlib
+import os
+import uuid
+from typing import AsyncIterator, List, Optional
+
+import multipart
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import parse_options_header
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+# Leading bytes of each supported image format
+IMAGE_SIGNATURES = [
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+]
+# Bytes needed to recognize any supported format (RIFF....WEBP is 12)
+SIGNATURE_LENGTH = 12
+
+
+def detect_image_type(head: bytes) -> Optional[str]:
+    """File extension for the image format in `head`, or None if it is not a supported image"""
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp"
+    for signature, ext in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return ext
+    return None
+
+
+def store_content_addressed(temp_path: str, final_path: str) -> bool:
+    """Move a finished file to its content address, or drop it if already stored. Returns True if stored."""
+    if os.path.exists(final_path):
+        os.remove(temp_path)
+        return False
+    os.replace(temp_path, final_path)
+    return True
+
+
+class StreamedFile:
+    """One file part being written to disk"""
+
+    def __init__(self, upload_dir: str):
+        self.upload_dir = upload_dir
+        self.temp_path = os.path.join(upload_dir, f".{uuid.uuid4()}.part")
+        self.final_path: Optional[str] = None
+        self.created = False  # False when identical content was already stored
+        self.ext: Optional[str] = None
+        self.size = 0
+        self.head = b""
+        self.handle = None
+        self.hasher = hashlib.sha256()
+
+    @property
+    def sha256(self) -> str:
+        return self.hasher.hexdigest()
+
+    @property
+    def filename(self) -> str:
+        return f"{self.sha256}{self.ext}"
+
+    def write(self, data: bytes):
+        """Write and hash a chunk (called in the threadpool)"""
+        self.handle.write(data)
+        self.hasher.update(data)
+
+
+class ImageUploadParser:
+    """Streams the image parts of a multipart request to disk"""
+
+    def __init__(self, content_type: str, upload_dir: str, field_name: str = "files",
+                 max_files: int = 10, max_file_size: int = 10 * 1024 * 1024):
+        self.content_type = content_type
+        self.upload_dir = upload_dir
+        self.field_name = field_name
+        self.max_files = max_files
+        self.max_file_size = max_file_size
+        self.files: List[StreamedFile] = []
+
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._current: Optional[StreamedFile] = None
+        # Filled by the (synchronous) parser callbacks, drained after each chunk
+        self._pending_writes: List[tuple] = []
+        self._pending_finish: List[StreamedFile] = []
+
+    # Parser callbacks
+
+    def on_part_begin(self):
+        self._disposition = b""
+        self._current = None
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        if b"filename" not in options or options.get(b"name", b"").decode("latin-1") != self.field_name:
+            return  # Form fields and other file fields are skipped
+        if len(self.files) >= self.max_files:
+            raise HTTPException(status_code=400, detail=f"Maximum {self.max_files} files allowed per upload")
+        self._current = StreamedFile(self.upload_dir)
+        self.files.append(self._current)
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self._current is not None:
+            self._pending_writes.append((self._current, data[start:end]))
+
+    def on_part_end(self):
+        if self._current is not None:
+            self._pending_finish.append(self._current)
+
+    # Async side - all file I/O goes through the threadpool
+
+    async def _write(self, part: StreamedFile, data: bytes):
+        part.size += len(data)
+        if part.size > self.max_file_size:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large. Maximum size is {self.max_file_size // (1024 * 1024)}MB"
+            )
+
+        if part.handle is None:
+            part.head += data
+            if len(part.head) < SIGNATURE_LENGTH:
+                return
+            await self._open(part)
+            data, part.head = part.head, b""
+
+        await run_in_threadpool(part.write, data)
+
+    async def _open(self, part: StreamedFile):
+        part.ext = detect_image_type(part.head)
+        if part.ext is None:
+            raise HTTPException(status_code=400, detail="File is not a supported image (JPEG, PNG, GIF or WebP)")
+        part.handle = await run_in_threadpool(open, part.temp_path, "wb")
+
+    async def _finish(self, part: StreamedFile):
+        if part.handle is None:
+            # Smaller than the signature length
+            await self._open(part)
+            await run_in_threadpool(part.write, part.head)
+            part.head = b""
+        await run_in_threadpool(part.handle.close)
+
+    async def _drain(self):
+        writes, self._pending_writes = self._pending_writes, []
+        finished, self._pending_finish = self._pending_finish, []
+        # Join the pieces of each part so a chunk costs one threadpool hop per file
+        joined = {}
+        for part, data in writes:
+            joined.setdefault(part, []).append(data)
+        for part, pieces in joined.items():
+            await self._write(part, b"".join(pieces))
+        for part in finished:
+            await self._finish(part)
+
+    async def parse(self, stream: AsyncIterator[bytes]) -> List[StreamedFile]:
+        """Read the whole request and move the files into place"""
+        _, params = parse_options_header(self.content_type)
+        boundary = params.get(b"boundary")
+        if not boundary:
+            raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+
+        parser = multipart.MultipartParser(boundary, {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        })
+
+        try:
+            try:
+                async for chunk in stream:
+                    parser.write(chunk)
+                    await self._drain()
+                parser.finalize()
+                await self._drain()
+            except MultipartParseError:
+                raise HTTPException(status_code=400, detail="Malformed multipart upload")
+
+            for part in self.files:
+                await run_in_threadpool(self._store, part)
+        except Exception:
+            await run_in_threadpool(self.cleanup)
+            raise
+
+        return self.files
+
+    def _store(self, part: StreamedFile):
+        part.final_path = os.path.join(self.upload_dir, part.filename)
+        part.created = store_content_addressed(part.temp_path, part.final_path)
+
+    def cleanup(self):
+        """Remove everything written for this request (never files stored earlier)"""
+        for part in self.files:
+            if part.handle is not None and not part.handle.closed:
+                part.handle.close()
+            if os.path.exists(part.temp_path):
+                os.remove(part.temp_path)
+            if part.created and os.path.exists(part.final_path):
+                os.remove(part.final_path)
@@ -2,13 +2,20 @@ import secrets
 import string
 import hmac
 import hashlib
+from functools import lru_cache
 from typing import Optional
-from twilio.rest import Client
 from config import get_settings
 
 settings = get_settings()
 
 
+@lru_cache()
+def get_twilio_client():
+    """Twilio REST client, imported and created on first SMS (twilio.rest is slow to import)"""
+    from twilio.rest import Client
+    return Client(settings.twilio_account_sid, settings.twilio_auth_token)
+
+
 def generate_random_token(length: int = 8) -> str:
     """Generate a random alphanumeric token"""
     alphabet = string.ascii_lowercase + string.digits
@@ -37,8 +44,7 @@ def send_sms(to: str, body: str) -> bool:
         return True  # Skip in development
     
     try:
-        client = Client(settings.twilio_account_sid, settings.twilio_auth_token)
-        message = client.messages.create(
+        message = get_twilio_client().messages.create(
             body=body,
             from_=settings.twilio_phone_number,
             to=to
@@ -88,6 +94,15 @@ def format_address(task) -> str:
     return ", ".join(parts)
 
 
+def format_pickup_address(pickup) -> str:
+    """Format pickup address for display"""
+    parts = [pickup.pickup_address_line1]
+    if pickup.pickup_address_line2:
+        parts.append(pickup.pickup_address_line2)
+    parts.append(f"{pickup.pickup_city}, {pickup.pickup_state} {pickup.pickup_zip}")
+    return ", ".join(parts)
+
+
 def format_phone(phone: str) -> str:
     """Format phone number for display"""
     # Remove non-digits
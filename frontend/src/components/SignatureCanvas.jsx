@@ -1,10 +1,13 @@
 import React, { useRef, useEffect, useState } from 'react';
+import { encodeSignature } from '../utils/signature';
 import './SignatureCanvas.css';
 
 const SignatureCanvas = ({ onSave, onCancel, saving }) => {
   const canvasRef = useRef(null);
   const [isDrawing, setIsDrawing] = useState(false);
   const [hasSignature, setHasSignature] = useState(false);
+  // Pen strokes as [x, y] points, sent instead of a PNG
+  const strokesRef = useRef([]);
 
   useEffect(() => {
     const canvas = canvasRef.current;
@@ -44,6 +47,15 @@ const SignatureCanvas = ({ onSave, onCancel, saving }) => {
     };
   };
 
+  const addPoint = (x, y) => {
+    const stroke = strokesRef.current[strokesRef.current.length - 1];
+    const point = [Math.round(x), Math.round(y)];
+    const last = stroke[stroke.length - 1];
+    if (!last || last[0] !== point[0] || last[1] !== point[1]) {
+      stroke.push(point);
+    }
+  };
+
   const startDrawing = (e) => {
     e.preventDefault();
     setIsDrawing(true);
@@ -52,6 +64,8 @@ const SignatureCanvas = ({ onSave, onCancel, saving }) => {
     const ctx = canvasRef.current.getContext('2d');
     ctx.beginPath();
     ctx.moveTo(x, y);
+    strokesRef.current.push([]);
+    addPoint(x, y);
   };
 
   const draw = (e) => {
@@ -61,6 +75,7 @@ const SignatureCanvas = ({ onSave, onCancel, saving }) => {
     const ctx = canvasRef.current.getContext('2d');
     ctx.lineTo(x, y);
     ctx.stroke();
+    addPoint(x, y);
   };
 
   const stopDrawing = () => {
@@ -73,6 +88,7 @@ const SignatureCanvas = ({ onSave, onCancel, saving }) => {
     const rect = canvas.getBoundingClientRect();
     ctx.fillStyle = '#fff';
     ctx.fillRect(0, 0, rect.width, rect.height);
+    strokesRef.current = [];
     setHasSignature(false);
   };
 
@@ -82,14 +98,8 @@ const SignatureCanvas = ({ onSave, onCancel, saving }) => {
       return;
     }
 
-    const canvas = canvasRef.current;
-    canvas.toBlob(
-      (blob) => {
-        const file = new File([blob], 'signature.png', { type: 'image/png' });
-        onSave(file);
-      },
-      'image/png'
-    );
+    const rect = canvasRef.current.getBoundingClientRect();
+    onSave(encodeSignature(strokesRef.current, rect.width, rect.height));
   };
 
   return (
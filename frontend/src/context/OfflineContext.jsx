@@ -1,6 +1,7 @@
 import { createContext, useContext, useState, useEffect, useCallback } from 'react';
 import { offlineService } from '../services/offline';
-import { tasksAPI, pickupsAPI, uploadsAPI } from '../services/api';
+import { tasksAPI, pickupsAPI } from '../services/api';
+import { uploadFileResumable } from '../utils/resumableUpload';
 
 const OfflineContext = createContext();
 
@@ -111,11 +112,25 @@ export const OfflineProvider = ({ children }) => {
         // Get the pending signature from IndexedDB
         const pendingSignature = await offlineService.getPendingSignature(action.taskId);
 
-        if (pendingSignature && pendingSignature.signatureBase64) {
+        if (pendingSignature && pendingSignature.signature) {
+          // Stroke-encoded signature - sent with the update, rendered by the server when viewed
+          await tasksAPI.update(action.taskId, {
+            ...action.data,
+            signature: pendingSignature.signature,
+          });
+          await offlineService.removePendingSignature(action.taskId);
+        } else if (pendingSignature && pendingSignature.signatureBase64) {
+          // PNG signature queued before the stroke format
           // Convert base64 back to file and upload
+          // Resumable, so a retry after a dropped connection only sends the missing bytes
           const signatureFile = base64ToFile(pendingSignature.signatureBase64, 'signature.png');
-          const uploadResponse = await uploadsAPI.uploadImages([signatureFile]);
-          const signatureUrl = uploadResponse.data.urls[0];
+          const signatureUrl = pendingSignature.signatureUrl || await uploadFileResumable(signatureFile, {
+            sessionId: pendingSignature.uploadSessionId,
+            onSession: (uploadSessionId) =>
+              offlineService.updatePendingSignature(action.taskId, { uploadSessionId }),
+          });
+          // Kept in case the task update fails, so the next retry doesn't upload again
+          await offlineService.updatePendingSignature(action.taskId, { signatureUrl });
 
           // Update task with delivered status and signature URL
           await tasksAPI.update(action.taskId, {
@@ -284,9 +299,9 @@ export const OfflineProvider = ({ children }) => {
   }, []);
 
   // Save a pending signature for offline sync
-  const savePendingSignature = useCallback(async (taskId, signatureBase64) => {
+  const savePendingSignature = useCallback(async (taskId, signature) => {
     try {
-      return await offlineService.savePendingSignature(taskId, signatureBase64);
+      return await offlineService.savePendingSignature(taskId, signature);
     } catch (error) {
       console.error('Failed to save pending signature:', error);
       return null;
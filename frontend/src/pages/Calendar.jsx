@@ -6,39 +6,42 @@ import timeGridPlugin from '@fullcalendar/timegrid';
 import interactionPlugin, { Draggable } from '@fullcalendar/interaction';
 import { calendarAPI, tasksAPI, pickupsAPI } from '../services/api';
 import { useOffline } from '../context/OfflineContext';
+import { sizedImageUrl } from '../utils/images';
 import './Calendar.css';
 
 const Calendar = () => {
   const weekCalendarRef = useRef(null);
+  const monthCalendarRef = useRef(null);
   const dayCalendarRef = useRef(null);
   const navigate = useNavigate();
   const { isOnline, cacheCalendarEvents, getCachedCalendarEvents } = useOffline();
   const [unscheduledDeliveries, setUnscheduledDeliveries] = useState([]);
   const [unscheduledPickups, setUnscheduledPickups] = useState([]);
   const [calendarEvents, setCalendarEvents] = useState([]);
+  const [daySummaries, setDaySummaries] = useState([]);
+  const [viewMode, setViewMode] = useState('week');
   const [selectedEvent, setSelectedEvent] = useState(null);
   const [showEventModal, setShowEventModal] = useState(false);
   const [selectedDate, setSelectedDate] = useState(null);
   const [currentTitle, setCurrentTitle] = useState('');
   const deliveryDraggableRef = useRef(null);
   const pickupDraggableRef = useRef(null);
+  // Date the week/month views reopen on, and the latest range request (older responses are dropped)
+  const focusDateRef = useRef(new Date());
+  const rangeRequestRef = useRef(0);
 
   useEffect(() => {
     fetchUnscheduledDeliveries();
     fetchUnscheduledPickups();
-    fetchCalendarEvents();
   }, []);
 
-  const fetchCalendarEvents = async () => {
+  // Full events are only loaded for the week or day on screen (see handleDatesSet)
+  const fetchCalendarEvents = async (start, end) => {
+    const request = ++rangeRequestRef.current;
     try {
-      const start = new Date();
-      start.setMonth(start.getMonth() - 3);
-      const end = new Date();
-      end.setMonth(end.getMonth() + 6);
-
       // CACHE-FIRST: Show cached events immediately
       const cachedEvents = await getCachedCalendarEvents();
-      if (cachedEvents.length > 0) {
+      if (cachedEvents.length > 0 && request === rangeRequestRef.current) {
         setCalendarEvents(cachedEvents);
       }
 
@@ -46,6 +49,7 @@ const Calendar = () => {
       if (isOnline) {
         try {
           const response = await calendarAPI.getEvents(start, end);
+          if (request !== rangeRequestRef.current) return;
           const eventsWithStringIds = response.data.map(event => ({
             ...event,
             id: String(event.id)
@@ -63,6 +67,48 @@ const Calendar = () => {
     }
   };
 
+  // The month view only needs per-day counts, not full events
+  const fetchDaySummaries = async (start, end) => {
+    const request = ++rangeRequestRef.current;
+    try {
+      const response = await calendarAPI.getSummary(start, end);
+      if (request === rangeRequestRef.current) {
+        setDaySummaries(response.data);
+      }
+    } catch (error) {
+      console.error('Error fetching calendar summary:', error);
+    }
+  };
+
+  const countTitle = (count, singular, plural) => `${count} ${count === 1 ? singular : plural}`;
+
+  const summaryEvents = daySummaries.flatMap(day => {
+    const deliveries = Object.values(day.deliveries).reduce((sum, count) => sum + count, 0);
+    const pickups = Object.values(day.pickups).reduce((sum, count) => sum + count, 0);
+    const events = [];
+    if (deliveries > 0) {
+      events.push({
+        id: `summary-delivery-${day.date}`,
+        title: countTitle(deliveries, 'delivery', 'deliveries'),
+        start: day.date,
+        allDay: true,
+        backgroundColor: '#4ade80',
+        borderColor: '#22c55e',
+      });
+    }
+    if (pickups > 0) {
+      events.push({
+        id: `summary-pickup-${day.date}`,
+        title: countTitle(pickups, 'pickup', 'pickups'),
+        start: day.date,
+        allDay: true,
+        backgroundColor: '#a78bfa',
+        borderColor: '#8b5cf6',
+      });
+    }
+    return events;
+  });
+
   // Initialize draggable for delivery events
   useEffect(() => {
     const containerEl = document.getElementById('unscheduled-deliveries');
@@ -348,13 +394,15 @@ const Calendar = () => {
   };
 
   // Navigation functions
+  const activeCalendarRef = () => (viewMode === 'month' ? monthCalendarRef : weekCalendarRef);
+
   const navigatePrev = () => {
     if (selectedDate) {
       const newDate = new Date(selectedDate);
       newDate.setDate(newDate.getDate() - 1);
       setSelectedDate(newDate);
-    } else if (weekCalendarRef.current) {
-      weekCalendarRef.current.getApi().prev();
+    } else if (activeCalendarRef().current) {
+      activeCalendarRef().current.getApi().prev();
       updateTitle();
     }
   };
@@ -364,8 +412,8 @@ const Calendar = () => {
       const newDate = new Date(selectedDate);
       newDate.setDate(newDate.getDate() + 1);
       setSelectedDate(newDate);
-    } else if (weekCalendarRef.current) {
-      weekCalendarRef.current.getApi().next();
+    } else if (activeCalendarRef().current) {
+      activeCalendarRef().current.getApi().next();
       updateTitle();
     }
   };
@@ -373,15 +421,15 @@ const Calendar = () => {
   const navigateToday = () => {
     if (selectedDate) {
       setSelectedDate(new Date());
-    } else if (weekCalendarRef.current) {
-      weekCalendarRef.current.getApi().today();
+    } else if (activeCalendarRef().current) {
+      activeCalendarRef().current.getApi().today();
       updateTitle();
     }
   };
 
   const updateTitle = () => {
-    if (weekCalendarRef.current) {
-      const api = weekCalendarRef.current.getApi();
+    if (activeCalendarRef().current) {
+      const api = activeCalendarRef().current.getApi();
       setCurrentTitle(api.view.title);
     }
   };
@@ -425,9 +473,25 @@ const Calendar = () => {
     });
   };
 
-  // Update title when calendar loads
-  const handleDatesSet = () => {
+  // Load the visible range whenever a week or day is shown
+  const handleDatesSet = (arg) => {
+    updateTitle();
+    if (!selectedDate) {
+      focusDateRef.current = arg.view.currentStart;
+    }
+    fetchCalendarEvents(arg.start, arg.end);
+  };
+
+  const handleMonthDatesSet = (arg) => {
     updateTitle();
+    focusDateRef.current = arg.view.currentStart;
+    fetchDaySummaries(arg.start, arg.end);
+  };
+
+  // Opening a day in the month view loads that day's full events
+  const openDay = (date) => {
+    focusDateRef.current = date;
+    setSelectedDate(date);
   };
 
   return (
@@ -500,11 +564,11 @@ const Calendar = () => {
         </div>
 
         <div className="calendar-main">
-          {/* Week View */}
+          {/* Week / Month View */}
           {!selectedDate && (
-            <div className="calendar-wrapper week-view">
+            <div className={`calendar-wrapper ${viewMode}-view`}>
               <div className="week-nav-bar">
-                <button className="nav-btn nav-arrow" onClick={navigatePrev} title="Previous week">
+                <button className="nav-btn nav-arrow" onClick={navigatePrev} title={`Previous ${viewMode}`}>
                   <svg width="18" height="18" viewBox="0 0 24 24" fill="currentColor">
                     <path d="M15.41 7.41L14 6l-6 6 6 6 1.41-1.41L10.83 12z"/>
                   </svg>
@@ -512,50 +576,86 @@ const Calendar = () => {
                 <button className="nav-btn today-btn" onClick={navigateToday}>
                   Today
                 </button>
-                <button className="nav-btn nav-arrow" onClick={navigateNext} title="Next week">
+                <button className="nav-btn nav-arrow" onClick={navigateNext} title={`Next ${viewMode}`}>
                   <svg width="18" height="18" viewBox="0 0 24 24" fill="currentColor">
                     <path d="M8.59 16.59L10 18l6-6-6-6-1.41 1.41L13.17 12z"/>
                   </svg>
                 </button>
+                <div className="view-toggle">
+                  <button
+                    className={`nav-btn today-btn ${viewMode === 'week' ? 'active' : ''}`}
+                    onClick={() => setViewMode('week')}
+                  >
+                    Week
+                  </button>
+                  <button
+                    className={`nav-btn today-btn ${viewMode === 'month' ? 'active' : ''}`}
+                    onClick={() => setViewMode('month')}
+                  >
+                    Month
+                  </button>
+                </div>
               </div>
-              <FullCalendar
-                ref={weekCalendarRef}
-                plugins={[dayGridPlugin, timeGridPlugin, interactionPlugin]}
-                initialView="timeGridWeek"
-                headerToolbar={{
-                  left: '',
-                  center: 'title',
-                  right: '',
-                }}
-                titleFormat={{ year: 'numeric', month: 'long' }}
-                height="calc(100vh - 160px)"
-                events={calendarEvents}
-                eventClick={handleEventClick}
-                eventDrop={handleEventDrop}
-                eventResize={handleEventResize}
-                eventReceive={handleEventReceive}
-                datesSet={handleDatesSet}
-                dayHeaderContent={renderDayHeaderContent}
-                editable={true}
-                droppable={true}
-                weekends={true}
-                dropAccept=".unscheduled-item"
-                eventDisplay="block"
-                slotMinTime="06:00:00"
-                slotMaxTime="22:00:00"
-                slotDuration="00:30:00"
-                snapDuration="00:15:00"
-                allDaySlot={false}
-                eventDurationEditable={true}
-                eventOverlap={true}
-                nowIndicator={true}
-                longPressDelay={150}
-                eventTimeFormat={{
-                  hour: 'numeric',
-                  minute: '2-digit',
-                  meridiem: 'short',
-                }}
-              />
+              {viewMode === 'month' ? (
+                <FullCalendar
+                  ref={monthCalendarRef}
+                  plugins={[dayGridPlugin, interactionPlugin]}
+                  initialView="dayGridMonth"
+                  initialDate={focusDateRef.current}
+                  headerToolbar={{
+                    left: '',
+                    center: 'title',
+                    right: '',
+                  }}
+                  height="calc(100vh - 160px)"
+                  events={summaryEvents}
+                  eventClick={(info) => openDay(info.event.start)}
+                  dateClick={(info) => openDay(info.date)}
+                  datesSet={handleMonthDatesSet}
+                  eventDisplay="block"
+                  dayMaxEvents={false}
+                />
+              ) : (
+                <FullCalendar
+                  ref={weekCalendarRef}
+                  plugins={[dayGridPlugin, timeGridPlugin, interactionPlugin]}
+                  initialView="timeGridWeek"
+                  initialDate={focusDateRef.current}
+                  headerToolbar={{
+                    left: '',
+                    center: 'title',
+                    right: '',
+                  }}
+                  titleFormat={{ year: 'numeric', month: 'long' }}
+                  height="calc(100vh - 160px)"
+                  events={calendarEvents}
+                  eventClick={handleEventClick}
+                  eventDrop={handleEventDrop}
+                  eventResize={handleEventResize}
+                  eventReceive={handleEventReceive}
+                  datesSet={handleDatesSet}
+                  dayHeaderContent={renderDayHeaderContent}
+                  editable={true}
+                  droppable={true}
+                  weekends={true}
+                  dropAccept=".unscheduled-item"
+                  eventDisplay="block"
+                  slotMinTime="06:00:00"
+                  slotMaxTime="22:00:00"
+                  slotDuration="00:30:00"
+                  snapDuration="00:15:00"
+                  allDaySlot={false}
+                  eventDurationEditable={true}
+                  eventOverlap={true}
+                  nowIndicator={true}
+                  longPressDelay={150}
+                  eventTimeFormat={{
+                    hour: 'numeric',
+                    minute: '2-digit',
+                    meridiem: 'short',
+                  }}
+                />
+              )}
             </div>
           )}
 
@@ -564,7 +664,7 @@ const Calendar = () => {
             <div className="calendar-wrapper day-view">
               <div className="day-view-header">
                 <button className="btn-back-day" onClick={closeDayView}>
-                  ← Back to Week
+                  ← Back to {viewMode === 'month' ? 'Month' : 'Week'}
                 </button>
                 <div className="day-view-title">
                   <h2>{formatSelectedDate(selectedDate)}</h2>
@@ -579,6 +679,7 @@ const Calendar = () => {
                 headerToolbar={false}
                 height="calc(100vh - 220px)"
                 events={calendarEvents}
+                datesSet={handleDatesSet}
                 eventClick={handleEventClick}
                 eventDrop={handleEventDrop}
                 eventResize={handleEventResize}
@@ -621,7 +722,7 @@ const Calendar = () => {
               {selectedEvent.extendedProps.image_url && (
                 <div className="modal-image">
                   <img
-                    src={selectedEvent.extendedProps.image_url}
+                    src={sizedImageUrl(selectedEvent.extendedProps.image_url, 'medium')}
                     alt={selectedEvent.extendedProps.item_title}
                     onError={(e) => e.target.style.display = 'none'}
                   />
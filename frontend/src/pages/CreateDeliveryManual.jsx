@@ -1,6 +1,7 @@
 import React, { useState, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
-import { tasksAPI, uploadsAPI } from '../services/api';
+import { tasksAPI } from '../services/api';
+import { uploadFileResumable } from '../utils/resumableUpload';
 import './CreateTask.css';
 
 const CreateDeliveryManual = () => {
@@ -52,8 +53,7 @@ const CreateDeliveryManual = () => {
     setError('');
     
     try {
-      const response = await uploadsAPI.uploadImages(files);
-      const imageUrl = response.data.urls[0];
+      const imageUrl = await uploadFileResumable(files[0]);
       
       setFormData(prev => ({
         ...prev,
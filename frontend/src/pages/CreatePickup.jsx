@@ -1,7 +1,8 @@
 import React, { useState, useRef } from 'react';
 import { useNavigate, Link } from 'react-router-dom';
-import { pickupsAPI, uploadsAPI } from '../services/api';
+import { pickupsAPI } from '../services/api';
 import { useOffline } from '../context/OfflineContext';
+import { uploadFileResumable } from '../utils/resumableUpload';
 import './CreateTask.css';
 import './TaskDetail.css';
 
@@ -67,8 +68,11 @@ const CreatePickup = () => {
     setError('');
     
     try {
-      const response = await uploadsAPI.uploadImages(files);
-      const newUrls = response.data.urls;
+      // One at a time, each resumable, so a dropped connection doesn't restart every photo
+      const newUrls = [];
+      for (const file of files) {
+        newUrls.push(await uploadFileResumable(file));
+      }
       
       // Add to form data
       setFormData(prev => ({
@@ -2,6 +2,7 @@ import React, { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { tasksAPI, itemsAPI } from '../services/api';
 import { useAuth } from '../context/AuthContext';
+import { sizedImageUrl } from '../utils/images';
 import './CreateTask.css';
 
 const CreateTask = () => {
@@ -328,7 +329,7 @@ const CreateTask = () => {
                 {items.map((item, index) => (
                   <div key={index} className="item-card">
                     {item.image_url && (
-                      <img src={item.image_url} alt={item.title} className="item-card-image" />
+                      <img src={sizedImageUrl(item.image_url, 'thumb')} alt={item.title} className="item-card-image" />
                     )}
                     <div className="item-card-info">
                       <h4>{item.title}</h4>
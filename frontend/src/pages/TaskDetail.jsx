@@ -1,11 +1,13 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, useNavigate, Link } from 'react-router-dom';
-import { tasksAPI, calendarAPI, uploadsAPI } from '../services/api';
+import { tasksAPI, calendarAPI } from '../services/api';
 import { useAuth } from '../context/AuthContext';
 import { useOffline } from '../context/OfflineContext';
 import { openInMaps } from '../utils/maps';
 import { openSmsWithMessage } from '../utils/sms';
 import { getETA, formatArrivalTime } from '../utils/directions';
+import { sizedImageUrl } from '../utils/images';
+import { signatureToDataUrl } from '../utils/signature';
 import SignatureCanvas from '../components/SignatureCanvas';
 import './TaskDetail.css';
 
@@ -67,10 +69,12 @@ const TaskDetail = () => {
         // Also check for pending signature
         if (taskData) {
           const pendingSignature = await getPendingSignature(parseInt(id));
-          if (pendingSignature && pendingSignature.signatureBase64) {
+          if (pendingSignature && (pendingSignature.signature || pendingSignature.signatureBase64)) {
             taskData = {
               ...taskData,
-              local_signature: pendingSignature.signatureBase64,
+              local_signature: pendingSignature.signature
+                ? signatureToDataUrl(pendingSignature.signature)
+                : pendingSignature.signatureBase64,
               pending_signature: true,
             };
           }
@@ -191,70 +195,52 @@ const TaskDetail = () => {
     setShowSignature(true);
   };
 
-  const handleSignatureSave = async (signatureFile) => {
+  const handleSignatureSave = async (signature) => {
     setSavingSignature(true);
 
     try {
       if (!isOnline) {
-        // OFFLINE: Convert signature to base64 and store locally
-        const reader = new FileReader();
-        reader.onloadend = async () => {
-          const signatureBase64 = reader.result;
-
-          try {
-            // Save signature to IndexedDB for later upload
-            await savePendingSignature(parseInt(id), signatureBase64);
-
-            // Queue the status update
-            await queueAction({
-              type: 'UPDATE_TASK_WITH_SIGNATURE',
-              taskId: parseInt(id),
-              data: { status: 'delivered' },
-            });
-
-            // Update local cache with delivered status and local signature
-            await updateCachedTask(parseInt(id), {
-              status: 'delivered',
-              delivered_at: new Date().toISOString(),
-              pending_signature: true,
-            });
+        // OFFLINE: Store the (few KB) stroke-encoded signature locally
+        await savePendingSignature(parseInt(id), signature);
 
-            setTask(prev => ({
-              ...prev,
-              status: 'delivered',
-              delivered_at: new Date().toISOString(),
-              pending_signature: true,
-              local_signature: signatureBase64,
-            }));
-
-            setShowSignature(false);
-            alert('Signature saved! It will upload automatically when you reconnect.');
-          } catch (error) {
-            console.error('Error saving signature offline:', error);
-            alert('Failed to save signature locally.');
-          } finally {
-            setSavingSignature(false);
-          }
-        };
-        reader.readAsDataURL(signatureFile);
+        // Queue the status update
+        await queueAction({
+          type: 'UPDATE_TASK_WITH_SIGNATURE',
+          taskId: parseInt(id),
+          data: { status: 'delivered' },
+        });
+
+        // Update local cache with delivered status and local signature
+        await updateCachedTask(parseInt(id), {
+          status: 'delivered',
+          delivered_at: new Date().toISOString(),
+          pending_signature: true,
+        });
+
+        setTask(prev => ({
+          ...prev,
+          status: 'delivered',
+          delivered_at: new Date().toISOString(),
+          pending_signature: true,
+          local_signature: signatureToDataUrl(signature),
+        }));
+
+        setShowSignature(false);
+        alert('Signature saved! It will upload automatically when you reconnect.');
         return;
       }
 
-      // ONLINE: Upload signature image directly
-      const uploadResponse = await uploadsAPI.uploadImages([signatureFile]);
-      const signatureUrl = uploadResponse.data.urls[0];
-
-      // Update task with delivered status and signature URL
+      // ONLINE: Send the signature with the update; the server renders it when viewed
       await tasksAPI.update(id, {
         status: 'delivered',
-        signature_url: signatureUrl,
+        signature,
       });
 
       await fetchTask();
       setShowSignature(false);
     } catch (error) {
       console.error('Error saving signature:', error);
-      alert('Failed to save signature. Please try again.');
+      alert(isOnline ? 'Failed to save signature. Please try again.' : 'Failed to save signature locally.');
     } finally {
       setSavingSignature(false);
     }
@@ -735,7 +721,7 @@ const TaskDetail = () => {
                     {task.items.map((item, index) => (
                       <div key={index} className="multi-item-card">
                         {item.image_url && (
-                          <img src={item.image_url} alt={item.title} className="multi-item-image" />
+                          <img src={sizedImageUrl(item.image_url, 'thumb')} alt={item.title} className="multi-item-image" />
                         )}
                         <div className="multi-item-info">
                           <h4>{item.title}</h4>
@@ -779,7 +765,7 @@ const TaskDetail = () => {
 
                     {task.image_url && (
                       <div className="item-image">
-                        <img src={task.image_url} alt={task.item_title} />
+                        <img src={sizedImageUrl(task.image_url, 'medium')} alt={task.item_title} />
                       </div>
                     )}
                   </>
@@ -68,6 +68,13 @@ export const calendarAPI = {
         end: end.toISOString() 
       } 
     }),
+  getSummary: (start, end) =>
+    api.get('/api/calendar/summary', {
+      params: {
+        start: start.toISOString(),
+        end: end.toISOString()
+      }
+    }),
   getUnscheduled: () => api.get('/api/calendar/unscheduled'),
   getUnscheduledPickups: () => api.get('/api/calendar/unscheduled-pickups'),
 };
@@ -106,6 +113,16 @@ export const uploadsAPI = {
     });
   },
   deleteImage: (filename) => api.delete(`/api/uploads/images/${filename}`),
+  // Resumable uploads (see utils/resumableUpload.js)
+  createSession: (size, filename) => api.post('/api/uploads/sessions', { size, filename }),
+  getSession: (sessionId) => api.get(`/api/uploads/sessions/${sessionId}`),
+  uploadChunk: (sessionId, offset, chunk) =>
+    api.put(`/api/uploads/sessions/${sessionId}`, chunk, {
+      params: { offset },
+      headers: { 'Content-Type': 'application/octet-stream' },
+    }),
+  completeSession: (sessionId) => api.post(`/api/uploads/sessions/${sessionId}/complete`),
+  cancelSession: (sessionId) => api.delete(`/api/uploads/sessions/${sessionId}`),
 };
 
 export default api;
@@ -219,20 +219,32 @@ class OfflineService {
 
   // ========== PENDING SIGNATURES ==========
 
-  async savePendingSignature(taskId, signatureBase64) {
+  async savePendingSignature(taskId, signature) {
     await this.init();
     const tx = this.db.transaction(STORES.PENDING_SIGNATURES, 'readwrite');
     const store = tx.objectStore(STORES.PENDING_SIGNATURES);
 
+    // Stroke-encoded (utils/signature.js); entries saved by older versions have signatureBase64 instead
     const signatureData = {
       taskId,
-      signatureBase64,
+      signature,
       capturedAt: Date.now(),
     };
 
     return this._promisify(store.put(signatureData));
   }
 
+  async updatePendingSignature(taskId, updates) {
+    await this.init();
+    const tx = this.db.transaction(STORES.PENDING_SIGNATURES, 'readwrite');
+    const store = tx.objectStore(STORES.PENDING_SIGNATURES);
+
+    const existing = await this._promisify(store.get(taskId));
+    if (!existing) return null;
+
+    return this._promisify(store.put({ ...existing, ...updates }));
+  }
+
   async getPendingSignature(taskId) {
     await this.init();
     const tx = this.db.transaction(STORES.PENDING_SIGNATURES, 'readonly');
@@ -0,0 +1,27 @@
+/**
+ * Returns a resized version of an image URL
+ * Uploaded photos: ?size=thumb|small|medium (served as WebP/AVIF)
+ * Shopify CDN images: ?width= (resized by Shopify)
+ * Other URLs are returned unchanged
+ */
+const SIZE_WIDTHS = {
+  thumb: 200,
+  small: 480,
+  medium: 1024,
+};
+
+export const sizedImageUrl = (url, size) => {
+  if (!url || !SIZE_WIDTHS[size]) return url;
+
+  const separator = url.includes('?') ? '&' : '?';
+
+  if (url.includes('/api/uploads/images/')) {
+    return `${url}${separator}size=${size}`;
+  }
+
+  if (url.includes('cdn.shopify.com')) {
+    return `${url}${separator}width=${SIZE_WIDTHS[size]}`;
+  }
+
+  return url;
+};
@@ -0,0 +1,68 @@
+/**
+ * Resumable uploads for flaky connections
+ * The file is sent in chunks to an upload session. When a chunk fails, only
+ * the bytes the server has not confirmed are sent again, and a session id kept
+ * by the caller lets a later attempt (e.g. the offline queue) pick up where
+ * the last one stopped.
+ */
+import { uploadsAPI } from '../services/api';
+
+const MAX_CHUNK_RETRIES = 3;
+
+const wait = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+// Session status ({ offset, chunk_size, ... }), or null if it is gone (expired or finished)
+const getSessionStatus = async (sessionId) => {
+  try {
+    const response = await uploadsAPI.getSession(sessionId);
+    return response.data;
+  } catch (error) {
+    if (error.response?.status === 404) return null;
+    throw error;
+  }
+};
+
+/**
+ * Upload a File or Blob and return its URL.
+ * Pass the sessionId of an earlier attempt to resume it; onSession is called
+ * with the new id whenever a session is started, so it can be saved.
+ */
+export const uploadFileResumable = async (file, { sessionId = null, onSession } = {}) => {
+  let session = sessionId ? await getSessionStatus(sessionId) : null;
+  if (!session) {
+    session = (await uploadsAPI.createSession(file.size, file.name)).data;
+    if (onSession) await onSession(session.id);
+  }
+  sessionId = session.id;
+  const chunkSize = session.chunk_size;
+  let offset = session.offset;
+
+  let failures = 0;
+  while (offset < file.size) {
+    const chunk = file.slice(offset, offset + chunkSize);
+    try {
+      const response = await uploadsAPI.uploadChunk(sessionId, offset, chunk);
+      offset = response.data.offset;
+      failures = 0;
+    } catch (error) {
+      const status = error.response?.status;
+      if (status === 409) {
+        // The server has a different offset (e.g. part of a dropped chunk arrived)
+        offset = error.response.data.detail.offset;
+        continue;
+      }
+      if (status && status < 500) throw error;
+
+      failures += 1;
+      if (failures > MAX_CHUNK_RETRIES) throw error;
+      await wait(1000 * 2 ** failures);
+      // Bytes of the failed chunk may have been stored - ask before resending
+      const current = await getSessionStatus(sessionId);
+      if (!current) throw error;
+      offset = current.offset;
+    }
+  }
+
+  const response = await uploadsAPI.completeSession(sessionId);
+  return response.data.url;
+};
@@ -0,0 +1,94 @@
+/**
+ * Compact stroke-encoded signatures (same format as backend/signatures.py)
+ * "s1." + base64url of varints: width, height, then per stroke a point count
+ * followed by zigzag-encoded x/y deltas from the previous point.
+ * A signature is typically 1-3 KB instead of a base64 PNG.
+ */
+
+const PREFIX = 's1.';
+
+const writeVarint = (out, value) => {
+  while (value > 0x7f) {
+    out.push((value & 0x7f) | 0x80);
+    value = Math.floor(value / 128);
+  }
+  out.push(value);
+};
+
+const zigzag = (value) => (value >= 0 ? value * 2 : -value * 2 - 1);
+const unzigzag = (value) => (value % 2 === 0 ? value / 2 : -(value + 1) / 2);
+
+/**
+ * Encode strokes (arrays of [x, y] in canvas pixels) drawn on a width x height canvas
+ */
+export const encodeSignature = (strokes, width, height) => {
+  const bytes = [];
+  writeVarint(bytes, Math.round(width));
+  writeVarint(bytes, Math.round(height));
+
+  let lastX = 0;
+  let lastY = 0;
+  strokes.forEach(stroke => {
+    writeVarint(bytes, stroke.length);
+    stroke.forEach(([x, y]) => {
+      writeVarint(bytes, zigzag(x - lastX));
+      writeVarint(bytes, zigzag(y - lastY));
+      lastX = x;
+      lastY = y;
+    });
+  });
+
+  const binary = String.fromCharCode(...bytes);
+  return PREFIX + btoa(binary).replace(/\+/g, '-').replace(/\//g, '_').replace(/=+$/, '');
+};
+
+export const decodeSignature = (encoded) => {
+  const base64 = encoded.slice(PREFIX.length).replace(/-/g, '+').replace(/_/g, '/');
+  const binary = atob(base64);
+  let position = 0;
+
+  const readVarint = () => {
+    let value = 0;
+    let multiplier = 1;
+    let byte;
+    do {
+      byte = binary.charCodeAt(position++);
+      value += (byte & 0x7f) * multiplier;
+      multiplier *= 128;
+    } while (byte & 0x80);
+    return value;
+  };
+
+  const width = readVarint();
+  const height = readVarint();
+  const strokes = [];
+  let x = 0;
+  let y = 0;
+  while (position < binary.length) {
+    const count = readVarint();
+    const stroke = [];
+    for (let i = 0; i < count; i++) {
+      x += unzigzag(readVarint());
+      y += unzigzag(readVarint());
+      stroke.push([x, y]);
+    }
+    strokes.push(stroke);
+  }
+  return { width, height, strokes };
+};
+
+/**
+ * SVG data URL for showing a signature that hasn't been uploaded yet
+ */
+export const signatureToDataUrl = (encoded) => {
+  const { width, height, strokes } = decodeSignature(encoded);
+  const paths = strokes.map(([[startX, startY], ...rest]) => {
+    const segments = rest.map(([x, y]) => `L${x} ${y}`).join(' ') || 'l0 0';
+    return `<path d="M${startX} ${startY} ${segments}"/>`;
+  }).join('');
+
+  const svg = `<svg xmlns="http://www.w3.org/2000/svg" width="${width}" height="${height}" viewBox="0 0 ${width} ${height}">`
+    + '<rect width="100%" height="100%" fill="#fff"/>'
+    + `<g fill="none" stroke="#000" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">${paths}</g></svg>`;
+  return `data:image/svg+xml,${encodeURIComponent(svg)}`;
+};
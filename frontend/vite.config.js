@@ -87,6 +87,36 @@ export default defineConfig({
                 statuses: [0, 200]
               }
             }
+          },
+          {
+            // Uploaded photos are named by their content hash and never change
+            urlPattern: ({ url }) => /^\/api\/uploads\/images\/[0-9a-f]{64}\.\w+$/i.test(url.pathname) && !url.search,
+            handler: 'CacheFirst',
+            options: {
+              cacheName: 'uploaded-images-cache',
+              expiration: {
+                maxEntries: 300,
+                maxAgeSeconds: 60 * 60 * 24 * 30 // 30 days
+              },
+              cacheableResponse: {
+                statuses: [0, 200]
+              }
+            }
+          },
+          {
+            // Sized variants fall back to the original until the derivative exists
+            urlPattern: ({ url }) => /^\/api\/uploads\/images\/[0-9a-f]{64}\.\w+$/i.test(url.pathname) && url.searchParams.has('size'),
+            handler: 'StaleWhileRevalidate',
+            options: {
+              cacheName: 'uploaded-image-sizes-cache',
+              expiration: {
+                maxEntries: 300,
+                maxAgeSeconds: 60 * 60 * 24 * 30 // 30 days
+              },
+              cacheableResponse: {
+                statuses: [0, 200]
+              }
+            }
           }
         ]
       },